@@ -9,10 +9,31 @@ class Settings(BaseSettings):
     bricklink_consumer_secret: str = ""
     bricklink_token_value: str = ""
     bricklink_token_secret: str = ""
+    bricklink_base_url: str = "https://api.bricklink.com/api/store/v1"  # Point at fake_bricklink for load tests
+
+    # BrickLink throttling (API allows 5,000 calls per day)
+    bricklink_daily_quota: int = 5000
+    bricklink_requests_per_second: float = 5.0
+    bricklink_burst: int = 10
+    bricklink_timeout: float = 10.0
+    bricklink_max_retries: int = 2
+    bricklink_retry_base_delay: float = 0.5  # Seconds, doubled per attempt with jitter
+    bricklink_breaker_failure_threshold: int = 5
+    bricklink_breaker_recovery_seconds: float = 30.0
     
     # Database
     database_url: str = "sqlite:///./data/minifigure_valuation.db"
-    
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800  # Seconds; ignored for SQLite
+    sqlite_journal_mode: str = "WAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 268435456  # 256MB
+    valuation_count_cache_seconds: float = (
+        30.0  # Cached total for GET /valuations; 0 disables
+    )
+
     # App settings
     debug: bool = False
     max_upload_size: int = 10485760  # 10MB
@@ -21,7 +42,48 @@ class Settings(BaseSettings):
     # Valuation thresholds
     museum_threshold: float = 500.0
     rare_threshold: float = 100.0
-    
+
+    # Offline price table (imported BrickLink price guides)
+    price_table_max_age_hours: int = 168  # Older rows fall back to the API
+
+    # Inventory price refresh
+    price_refresh_max_age_hours: int = 24
+    price_refresh_batch_size: int = 25
+    price_refresh_concurrency: int = 4
+    price_refresh_batch_interval: float = 1.0  # Seconds between batches
+    price_refresh_interval_minutes: int = 60  # Worker mode sleep between runs
+
+    # Web server (`main.py serve`)
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 1  # Processes; each also runs JOB_WORKERS job workers
+    server_drain_seconds: float = 30.0  # Shutdown grace for in-flight requests and jobs
+
+    # Valuation job queue (POST /upload)
+    job_workers: int = (
+        8  # Jobs in flight per API process; 0 leaves jobs to `main.py worker`
+    )
+    job_visibility_timeout_seconds: float = (
+        300.0  # Lease length before another worker may retry
+    )
+    job_max_attempts: int = 3
+    job_poll_interval_seconds: float = 2.0
+    job_retry_base_delay_seconds: float = 10.0  # Doubled per attempt
+    batch_max_files: int = 1000  # Images per POST /upload/batch or process-dir run
+
+    # Valuation pipeline stage concurrency
+    pipeline_decode_workers: int = 2  # Threads decoding uploads (PIL releases the GIL)
+    pipeline_match_workers: int = 2  # Processes for image feature matching
+    pipeline_identify_workers: int = 4  # Concurrent Claude identifications
+    pipeline_price_workers: int = 4  # Concurrent BrickLink valuations
+    pipeline_save_workers: int = 1
+    pipeline_report_workers: int = 2  # Threads rendering PDF reports
+
+    # Metrics (GET /metrics serves the API process's own)
+    cli_metrics_path: str = (
+        "data/metrics/cli.json"  # Totals across main.py runs (+ .prom); empty disables
+    )
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -8,38 +8,70 @@ Use this script to run the web interface or perform command-line operations.
 """
 
 import argparse
-import asyncio
 import sys
+import time
+from functools import cached_property
 from pathlib import Path
 from datetime import datetime
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from config.settings import settings
-from src.database.database import DatabaseManager
-from src.database.models import ValuationRecord
-from src.utils.image_processor import ImageProcessor
-from src.core.lego_identifier import LegoIdentifier
-from src.core.database_identifier import DatabaseDrivenIdentifier
-from src.core.valuation_engine import ValuationEngine
-from src.core.report_generator import ReportGenerator
-from src.database.repository import ValuationRepository, InventoryRepository
-from src.models.schemas import ValuationReport
-from sqlalchemy import desc
+# Components and their dependencies (OpenCV, SQLAlchemy, anthropic, reportlab,
+# PIL) are imported when a command first uses them, so quick commands such as
+# `list` and `stats` only pay for what they touch.
 
 
 class EnhancedLegoValuationCLI:
     """Enhanced CLI with database-driven identification and comprehensive features"""
-    
-    def __init__(self):
-        self.db_manager = DatabaseManager()
-        self.repository = ValuationRepository(self.db_manager)
-        self.image_processor = ImageProcessor()
-        self.lego_identifier = LegoIdentifier()
-        self.enhanced_identifier = DatabaseDrivenIdentifier()
-        self.valuation_engine = ValuationEngine()
-        self.report_generator = ReportGenerator()
+
+    @cached_property
+    def db_manager(self):
+        from src.database.database import DatabaseManager
+
+        return DatabaseManager()
+
+    @cached_property
+    def repository(self):
+        from src.database.repository import ValuationRepository
+
+        return ValuationRepository(self.db_manager)
+
+    @cached_property
+    def image_processor(self):
+        from src.utils.image_processor import ImageProcessor
+
+        return ImageProcessor()
+
+    @cached_property
+    def lego_identifier(self):
+        from src.core.lego_identifier import LegoIdentifier
+
+        return LegoIdentifier()
+
+    @cached_property
+    def enhanced_identifier(self):
+        from src.core.database_identifier import DatabaseDrivenIdentifier
+
+        return DatabaseDrivenIdentifier()
+
+    @cached_property
+    def minifigure_database(self):
+        from src.core.real_data_database_builder import RealDataDatabaseBuilder
+
+        return RealDataDatabaseBuilder()
+
+    @cached_property
+    def valuation_engine(self):
+        from src.core.valuation_engine import ValuationEngine
+
+        return ValuationEngine()
+
+    @cached_property
+    def report_generator(self):
+        from src.core.report_generator import ReportGenerator
+
+        return ReportGenerator()
         
     def initialize_system(self):
         """Initialize the enhanced system with database-driven identification"""
@@ -50,7 +82,7 @@ class EnhancedLegoValuationCLI:
         print("✓ Database initialized")
         
         # Check minifigure database
-        stats = self.enhanced_identifier.get_database_stats()
+        stats = self.minifigure_database.get_stats()
         if stats['total_minifigures'] == 0:
             print("⚠️  Minifigure database is empty!")
             print("   Run: python setup_production_database.py build --count 1000")
@@ -67,24 +99,33 @@ class EnhancedLegoValuationCLI:
     
     async def process_image(self, image_path: str, notes: str = "", use_enhanced: bool = True):
         """Process an image with enhanced database-driven identification"""
+        from src.models.schemas import ValuationReport
+
         print(f"Processing image: {image_path}")
         
         try:
-            # Process and optimize image
-            file_path, image_upload = self.image_processor.save_image(
-                open(image_path, "rb").read(), Path(image_path).name
-            )
-            optimized_path = self.image_processor.optimize_image_for_ai(file_path)
+            # Process and optimize image; it is decoded once here and the
+            # identifiers reuse the decoded pixels
+            with open(image_path, "rb") as image_file:
+                file_path, image_upload = self.image_processor.save_image_stream(
+                    image_file, Path(image_path).name
+                )
+            image = self.image_processor.preprocess(file_path)
+            optimized_path = image.path
             print("✓ Image processed and optimized")
             
             # Choose identification method
             if use_enhanced:
                 print("🔍 Identifying LEGO items with enhanced database matching...")
-                identification = await self.enhanced_identifier.identify_lego_items(optimized_path)
-                print(f"✓ Enhanced identification complete (confidence: {identification.confidence_score:.2f})")
+                identification = await self.enhanced_identifier.identify_lego_items(
+                    image
+                )
+                print(
+                    f"✓ Enhanced identification complete (confidence: {identification.confidence_score:.2f})"
+                )
             else:
                 print("🔍 Identifying LEGO items with standard AI...")
-                identification = await self.lego_identifier.identify_lego_items(optimized_path)
+                identification = await self.lego_identifier.identify_lego_items(image)
                 print(f"✓ Standard identification complete (confidence: {identification.confidence_score:.2f})")
             
             # Perform valuation
@@ -117,8 +158,14 @@ class EnhancedLegoValuationCLI:
             print(f"❌ Error processing image: {e}")
             import traceback
             traceback.print_exc()
-    
-    def _display_results(self, report: ValuationReport, pdf_path: str, html_path: str, enhanced: bool = True):
+
+    def _display_results(
+        self,
+        report: "ValuationReport",
+        pdf_path: str,
+        html_path: str,
+        enhanced: bool = True,
+    ):
         """Display valuation results"""
         method = "ENHANCED DATABASE-DRIVEN" if enhanced else "STANDARD AI"
         
@@ -158,7 +205,7 @@ class EnhancedLegoValuationCLI:
     
     def list_valuations(self, limit: int = 10):
         """List recent valuations"""
-        valuations = self.repository.get_recent_valuations(limit)
+        valuations, _ = self.repository.list_valuation_page(limit)
         
         if not valuations:
             print("No valuations found")
@@ -168,27 +215,34 @@ class EnhancedLegoValuationCLI:
         print("-" * 80)
         
         for val in valuations:
-            print(f"ID: {val.id:3d} | ${val.estimated_value:8.2f} | {val.recommendation_category:12s} | "
-                  f"{val.upload_timestamp.strftime('%Y-%m-%d %H:%M')} | {val.image_filename}")
-    
+            print(
+                f"ID: {val['id']:3d} | ${val['estimated_value'] or 0:8.2f} | "
+                f"{val['recommendation_category'] or '-':12s} | "
+                f"{val['created_at'].strftime('%Y-%m-%d %H:%M')} | {val['image_filename']}"
+            )
+
     def show_inventory_summary(self):
         """Show inventory summary"""
-        summary = self.repository.get_inventory_summary()
+        from src.database.repository import InventoryRepository
+
+        summary = InventoryRepository(self.db_manager).get_inventory_summary()
+        stats = self.repository.get_statistics()
         
         print("Inventory Summary:")
         print("-" * 40)
         print(f"Total Items: {summary['total_items']}")
+        print(f"Available Items: {summary['available_items']}")
         print(f"Total Value: ${summary['total_value']:.2f}")
         print(f"Average Value: ${summary['average_value']:.2f}")
         print(f"Highest Value: ${summary['highest_value']:.2f}")
-        print(f"Recommendations:")
-        print(f"  Museum: {summary['museum_count']}")
-        print(f"  Resale: {summary['resale_count']}")
-        print(f"  Collection: {summary['collection_count']}")
+        print(f"Recommendations ({stats['total_valuations']} valuations):")
+        print(f"  Museum: {stats['museum_count']}")
+        print(f"  Resale: {stats['resale_count']}")
+        print(f"  Collection: {stats['collection_count']}")
     
     def search_database(self, query: str, limit: int = 10):
         """Search the minifigure database"""
-        results = self.enhanced_identifier.search_database(query, limit)
+        results = self.minifigure_database.search_minifigures(query, limit)
         
         if not results:
             print(f"No minifigures found matching '{query}'")
@@ -206,14 +260,11 @@ class EnhancedLegoValuationCLI:
     
     def show_database_stats(self):
         """Show database statistics"""
-        stats = self.enhanced_identifier.get_database_stats()
+        stats = self.minifigure_database.get_stats()
         
         print("Enhanced Database Statistics:")
         print("-" * 40)
         print(f"Total Minifigures: {stats['total_minifigures']}")
-        if 'real_database_count' in stats:
-            print(f"Real BrickLink Data: {stats.get('real_database_count', 0)}")
-            print(f"Mock Data: {stats.get('mock_database_count', 0)}")
         print(f"Database Path: {stats['database_path']}")
         print(f"Images Directory: {stats['images_directory']}")
         
@@ -224,12 +275,140 @@ class EnhancedLegoValuationCLI:
             print(f"Image Files: {len(image_files)}")
         else:
             print("Image Files: 0 (directory not found)")
-    
+
+    def refresh_prices(
+        self, limit: int = None, watch: bool = False, interval: int = None
+    ):
+        """Re-price stale inventory items from BrickLink"""
+        import asyncio
+        from src.core.price_refresher import InventoryPriceRefresher
+
+        self.db_manager.initialize_database()
+        refresher = InventoryPriceRefresher(self.db_manager)
+
+        if watch:
+            print("🔄 Starting inventory price refresh worker (Ctrl+C to stop)...")
+            try:
+                asyncio.run(refresher.run_forever(interval))
+            except KeyboardInterrupt:
+                print("Price refresh worker stopped")
+            return
+
+        print("🔄 Refreshing stale inventory prices...")
+        stats = asyncio.run(refresher.refresh_once(limit))
+        print(f"✓ Checked {stats.selected} items in {stats.batches} batches")
+        print(f"  Priced: {stats.priced}")
+        print(f"  No market data: {stats.no_data}")
+        print(f"  Failed: {stats.failed}")
+
+    def run_job_worker(self, workers: int = None, drain: bool = False):
+        """Process queued /upload valuations from the job table"""
+        import asyncio
+        from src.core.job_worker import JobWorkerPool, ValuationPipeline
+        from src.database.repository import JobRepository
+
+        self.db_manager.initialize_database()
+        pipeline = ValuationPipeline(
+            self.enhanced_identifier,
+            self.valuation_engine,
+            self.report_generator,
+            self.db_manager,
+        )
+        pool = JobWorkerPool(self.db_manager, pipeline, workers=workers)
+        loaded = pipeline.preload()
+        if "matcher_images" in loaded:
+            print(f"✓ Indexed {loaded['matcher_images']} reference images")
+
+        if drain:
+            print("⚙️  Processing queued valuation jobs...")
+            processed = asyncio.run(pool.run_until_empty())
+            print(f"✓ Processed {processed} jobs")
+            print(f"  Queue: {JobRepository(self.db_manager).count_by_status()}")
+            for stage in pipeline.stats():
+                print(
+                    f"  {stage['name']:<9} {stage['processed']:>4} done, {stage['failed']} failed, "
+                    f"mean {stage['mean_seconds']:.2f}s, waited {stage['mean_wait_seconds']:.2f}s"
+                )
+            return
+
+        async def run_forever():
+            await pool.start()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await pool.stop()
+
+        print(f"⚙️  Starting {pool.workers} valuation job workers (Ctrl+C to stop)...")
+        try:
+            asyncio.run(run_forever())
+        except KeyboardInterrupt:
+            print("Valuation job workers stopped")
+
+    def process_directory(
+        self,
+        directory: str,
+        notes: str = None,
+        recursive: bool = False,
+        wait: bool = True,
+        workers: int = None,
+    ):
+        """Queue every image (and ZIP/tar archive of images) in a directory as one batch"""
+        from src.core.batch_intake import BatchIntake, ENTRY_REJECTED
+        from src.database.repository import JobRepository
+
+        path = Path(directory)
+        if not path.is_dir():
+            print(f"Error: Directory not found: {directory}")
+            return
+
+        self.db_manager.initialize_database()
+        repository = JobRepository(self.db_manager)
+        intake = BatchIntake(self.image_processor, repository)
+        batch = intake.start(str(path.resolve()), notes)
+        print(f"📂 Registering batch {batch.batch_id} from {path}...")
+        intake.add_directory(batch, path, recursive=recursive)
+        intake.finish(batch)
+
+        summary = batch.to_dict()
+        print(
+            f"✓ Queued {summary['queued']} images "
+            f"({summary['duplicates']} duplicates, {summary['rejected']} rejected)"
+        )
+        for entry in batch.entries:
+            if entry.status == ENTRY_REJECTED:
+                print(f"  ✗ {entry.filename}: {entry.error}")
+
+        if wait and summary["queued"]:
+            self.run_job_worker(workers, drain=True)
+            progress = repository.get_batch_progress(batch.batch_id)
+            print(
+                f"📊 Batch {batch.batch_id}: {progress['finished']}/{progress['queued_files']} finished, "
+                f"{progress['jobs']}, estimated value ${progress['estimated_value']:.2f}"
+            )
+
+    def import_prices(self, path: str, condition: str = None):
+        """Bulk-import a BrickLink price-guide export into the local price table"""
+        if not Path(path).exists():
+            print(f"Error: File not found: {path}")
+            return
+
+        print(f"📥 Importing price guide from {path}...")
+        price_table = self.valuation_engine.price_table
+        try:
+            stats = price_table.import_file(path, default_condition=condition)
+        except ValueError as e:
+            print(f"Error: {e}")
+            return
+        print(f"✓ Imported {stats.imported} price rows ({stats.skipped} skipped)")
+        print(f"  Price table now holds {price_table.count()} rows")
+
     def setup_database(self, count: int = 1000):
         """Setup the minifigure database with real BrickLink data only"""
         print(f"🚀 Setting up minifigure database with {count} real minifigures from BrickLink...")
         print("This may take several minutes...")
         
+        import asyncio
+
         try:
             from src.core.real_data_database_builder import RealDataDatabaseBuilder
             builder = RealDataDatabaseBuilder()
@@ -245,6 +424,72 @@ class EnhancedLegoValuationCLI:
             print("Please check your BrickLink API credentials in .env file")
 
 
+def serve(host: str = None, port: int = None, workers: int = None):
+    """Run the web server in `workers` processes.
+
+    Migrations run once here, before the worker processes start; each process
+    then preloads its own state in the app's lifespan (uvicorn starts workers
+    with spawn, so nothing loaded here would be shared). On Ctrl+C/SIGTERM each
+    process stops accepting connections, lets in-flight requests finish and
+    drains its job workers, for up to SERVER_DRAIN_SECONDS each.
+    """
+    import uvicorn
+    from config.settings import settings
+    from src.database.database import create_tables
+
+    host = host or settings.server_host
+    port = port or settings.server_port
+    workers = workers or settings.server_workers
+
+    create_tables()
+    print(f"Starting web server on {host}:{port} with {workers} worker process(es)...")
+    uvicorn.run(
+        "src.api.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        app_dir=str(Path(__file__).parent),
+        timeout_graceful_shutdown=settings.server_drain_seconds,
+    )
+
+
+def record_run_metrics(command: str, started: float):
+    """Add this run's metrics to the totals kept across CLI runs, and flag slow spots.
+
+    Only runs that reached instrumented code (identification, pricing,
+    database writes, reports) are recorded; quick commands such as `list`
+    and `stats` leave the totals alone.
+    """
+    metrics = sys.modules.get("src.utils.metrics")
+    if metrics is None or not metrics.REGISTRY.has_samples():
+        return
+    from config.settings import settings
+
+    if not settings.cli_metrics_path:
+        return
+
+    metrics.CLI_RUN_SECONDS.observe(time.perf_counter() - started, command=command)
+    previous = metrics.accumulate(settings.cli_metrics_path)
+    for name, labels, mean, usual in metrics.slower_than_usual(previous):
+        where = ", ".join(f"{key}={value}" for key, value in labels.items())
+        print(
+            f"⚠️  Slower than usual: {name}{f' ({where})' if where else ''} "
+            f"averaged {mean:.2f}s this run, {usual:.2f}s before"
+        )
+
+
+def show_metrics():
+    """Print the metrics totals kept across CLI runs, in the Prometheus text format"""
+    from config.settings import settings
+    from src.utils import metrics
+
+    totals = metrics.load(settings.cli_metrics_path)
+    if not totals.has_samples():
+        print("No metrics recorded yet")
+        return
+    print(totals.render(), end="")
+
+
 def main():
     """Main CLI interface"""
     parser = argparse.ArgumentParser(description="Enhanced LEGO Valuation System")
@@ -259,6 +504,31 @@ def main():
     process_parser.add_argument('--notes', default='', help='Notes about the image')
     process_parser.add_argument('--standard', action='store_true', help='Use standard AI instead of enhanced database')
     
+    # Batch directory command
+    process_dir_parser = subparsers.add_parser(
+        "process-dir", help="Process every image in a directory as a batch"
+    )
+    process_dir_parser.add_argument(
+        "directory", help="Directory of images and/or ZIP/tar archives"
+    )
+    process_dir_parser.add_argument(
+        "--notes", default=None, help="Notes for every image in the batch"
+    )
+    process_dir_parser.add_argument(
+        "--recursive", action="store_true", help="Include subdirectories"
+    )
+    process_dir_parser.add_argument(
+        "--no-wait",
+        action="store_true",
+        help="Only queue the batch; leave processing to `worker`",
+    )
+    process_dir_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent jobs (default JOB_WORKERS)",
+    )
+
     # List command
     list_parser = subparsers.add_parser('list', help='List recent valuations')
     list_parser.add_argument('--limit', type=int, default=10, help='Number of valuations to show')
@@ -278,23 +548,107 @@ def main():
     setup_parser = subparsers.add_parser('setup', help='Setup minifigure database')
     setup_parser.add_argument('--count', type=int, default=1000, help='Number of minifigures to download')
     
-    # Web server command
-    subparsers.add_parser('web', help='Start web server')
-    
+    # Price refresh command
+    refresh_parser = subparsers.add_parser(
+        "refresh-prices", help="Refresh stale inventory market prices"
+    )
+    refresh_parser.add_argument(
+        "--limit", type=int, default=None, help="Maximum number of items to refresh"
+    )
+    refresh_parser.add_argument(
+        "--watch", action="store_true", help="Run as a long-lived refresh worker"
+    )
+    refresh_parser.add_argument(
+        "--interval", type=int, default=None, help="Minutes between runs in watch mode"
+    )
+
+    # Valuation job worker command
+    worker_parser = subparsers.add_parser(
+        "worker", help="Process queued upload valuations"
+    )
+    worker_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Concurrent jobs (default JOB_WORKERS)",
+    )
+    worker_parser.add_argument(
+        "--drain", action="store_true", help="Process due jobs, then exit"
+    )
+
+    # Price guide import command
+    import_parser = subparsers.add_parser(
+        "import-prices", help="Import a BrickLink price guide export (CSV/XML)"
+    )
+    import_parser.add_argument("file", help="Path to CSV or XML export")
+    import_parser.add_argument(
+        "--condition",
+        choices=["N", "U"],
+        default=None,
+        help="Condition for rows that do not specify one",
+    )
+
+    # Web server commands
+    serve_parser = subparsers.add_parser(
+        "serve", help="Start web server with worker processes"
+    )
+    serve_parser.add_argument(
+        "--host", default=None, help="Bind address (default SERVER_HOST)"
+    )
+    serve_parser.add_argument(
+        "--port", type=int, default=None, help="Port (default SERVER_PORT)"
+    )
+    serve_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Server processes (default SERVER_WORKERS)",
+    )
+    subparsers.add_parser("web", help="Start web server (single process)")
+
+    # Metrics command
+    subparsers.add_parser(
+        "metrics", help="Show timings and counters totalled across CLI runs"
+    )
+
     args = parser.parse_args()
     
     if not args.command:
         parser.print_help()
         return
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.workers)
+        return
+    if args.command == "web":
+        serve(workers=1)
+        return
+    if args.command == "metrics":
+        show_metrics()
+        return
     
     cli = EnhancedLegoValuationCLI()
-    
+    started = time.perf_counter()
+    try:
+        run_command(cli, args)
+    finally:
+        record_run_metrics(args.command, started)
+
+
+def run_command(cli: EnhancedLegoValuationCLI, args):
+    """Dispatch a CLI command (everything but the server and metrics commands)"""
     if args.command == 'init':
         cli.initialize_system()
     elif args.command == 'process':
+        import asyncio
+
         use_enhanced = not args.standard
         asyncio.run(cli.process_image(args.image, args.notes, use_enhanced))
-    elif args.command == 'list':
+    elif args.command == "process-dir":
+        cli.process_directory(
+            args.directory, args.notes, args.recursive, not args.no_wait, args.workers
+        )
+    elif args.command == "list":
         cli.list_valuations(args.limit)
     elif args.command == 'inventory':
         cli.show_inventory_summary()
@@ -304,13 +658,12 @@ def main():
         cli.show_database_stats()
     elif args.command == 'setup':
         cli.setup_database(args.count)
-    elif args.command == 'web':
-        print("Starting web server...")
-        import uvicorn
-        from src.api.main import app
-        uvicorn.run(app, host="0.0.0.0", port=8000)
-    else:
-        parser.print_help()
+    elif args.command == "refresh-prices":
+        cli.refresh_prices(args.limit, args.watch, args.interval)
+    elif args.command == "worker":
+        cli.run_job_worker(args.workers, args.drain)
+    elif args.command == "import-prices":
+        cli.import_prices(args.file, args.condition)
 
 
 if __name__ == "__main__":
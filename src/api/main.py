@@ -1,27 +1,110 @@
-from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, Depends, HTTPException, Query, Request
+from fastapi.responses import (
+    HTMLResponse,
+    FileResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional
 from pathlib import Path
+from contextlib import asynccontextmanager
 import asyncio
-from datetime import datetime
+import gzip
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
 from config.settings import settings
-from src.database.database import get_db, create_tables
-from src.database.repository import ValuationRepository, InventoryRepository
+from src.database.database import (
+    get_db,
+    get_async_db,
+    create_tables,
+    dispose_async_engine,
+    DatabaseManager,
+)
+from src.database.repository import (
+    ValuationRepository,
+    InventoryRepository,
+    AsyncValuationRepository,
+    AsyncInventoryRepository,
+    AsyncJobRepository,
+    JobRepository,
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+)
+from src.database import report_store
 from src.utils.image_processor import ImageProcessor
 from src.core.lego_identifier import LegoIdentifier
 from src.core.valuation_engine import ValuationEngine
 from src.core.report_generator import ReportGenerator
-from src.models.schemas import ValuationReport, IdentificationResult, ValuationResult
+from src.core.job_worker import JobWorkerPool, ValuationPipeline
+from src.core.batch_intake import BatchIntake
+from src.utils import json_utils, metrics
+
+logger = logging.getLogger(__name__)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson when installed.
+
+    Endpoints that return one directly also skip FastAPI's jsonable_encoder
+    pass, which dominates serialisation time on large valuation payloads.
+    """
+
+    def render(self, content) -> bytes:
+        return json_utils.dumpb(content)
+
+
+def preload_state() -> Dict[str, Any]:
+    """Load the state every request shares before serving the first one.
+
+    Applies pending migrations and loads what the valuation pipeline would
+    otherwise load on its first job (the match pool and the matcher's reference
+    index in each of its processes). Runs in
+    each server process's lifespan; `main.py serve` runs the migrations once
+    before starting the worker processes.
+    """
+    started = time.perf_counter()
+    create_tables()
+    loaded = valuation_pipeline.preload()
+    logger.info(
+        f"Preloaded {loaded or 'database'} in {time.perf_counter() - started:.2f}s"
+    )
+    return loaded
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Preload shared state and start the job workers; on shutdown, drain them.
+
+    Jobs still running after SERVER_DRAIN_SECONDS are handed back to the
+    queue for another process to finish.
+    """
+    await asyncio.to_thread(preload_state)
+    await job_pool.start()
+    try:
+        yield
+    finally:
+        await job_pool.stop(drain_timeout=settings.server_drain_seconds)
+        await dispose_async_engine()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="LEGO Valuation System",
     description="AI-powered LEGO minifigure and set valuation system for Redmond's Forge",
     version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -33,17 +116,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+class RequestMetricsMiddleware:
+    """Times every request until its response is sent, by route template.
+
+    Labelled with the matched route's path ("/valuations/{valuation_id}"),
+    not the raw URL, so IDs do not each become a time series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_paths: Optional[Dict[Any, str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=self._route(scope),
+                status=status,
+            )
+
+    def _route(self, scope) -> str:
+        if self._route_paths is None:
+            self._route_paths = {
+                getattr(route, "endpoint", None)
+                or getattr(route, "app", None): route.path
+                for route in scope["app"].routes
+            }
+        return self._route_paths.get(scope.get("endpoint"), "unmatched")
+
+
+app.add_middleware(RequestMetricsMiddleware)
+
 # Initialize components
 image_processor = ImageProcessor()
 lego_identifier = LegoIdentifier()
 valuation_engine = ValuationEngine()
 report_generator = ReportGenerator()
+valuation_pipeline = ValuationPipeline(
+    lego_identifier, valuation_engine, report_generator, DatabaseManager()
+)
+job_pool = JobWorkerPool(DatabaseManager(), valuation_pipeline)
 
 
-# Create database tables on startup
-@app.on_event("startup")
-async def startup_event():
-    create_tables()
+def _collect_pipeline_metrics():
+    for stage in valuation_pipeline.stats():
+        metrics.PIPELINE_QUEUE_DEPTH.set(stage["queue_depth"], stage=stage["name"])
+        metrics.PIPELINE_IN_FLIGHT.set(stage["in_flight"], stage=stage["name"])
+
+
+metrics.REGISTRY.add_collector(_collect_pipeline_metrics)
 
 
 # Serve static files (conditional mounting)
@@ -218,31 +356,45 @@ async def root():
 
 @app.post("/upload")
 async def upload_image(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     notes: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    """Upload and process an image for valuation"""
-    try:
-        # Read file content
-        file_content = await file.read()
+    """Upload an image and queue it for valuation"""
 
-        # Process image
-        file_path, image_upload = image_processor.save_image(
-            file_content, file.filename
+    def register():
+        # Stream the spooled upload to disk in chunks rather than reading it
+        # into memory
+        file_path, image_upload = image_processor.save_image_stream(
+            file.file, file.filename
         )
         optimized_path = image_processor.optimize_image_for_ai(file_path)
 
-        # Start processing in background
-        background_tasks.add_task(
-            process_image_valuation, optimized_path, image_upload.filename, notes, db
+        # Queue the valuation; it is committed before the response so it
+        # survives a restart, and a job worker picks it up
+        job_id = JobRepository(db).enqueue(
+            optimized_path,
+            image_upload.filename,
+            notes,
+            max_attempts=settings.job_max_attempts,
+            content_hash=image_upload.content_hash,
         )
+        db.commit()
+        return job_id, image_upload
+
+    try:
+        # Saving, resizing and the database write all block, so run them off
+        # the event loop together
+        job_id, image_upload = await asyncio.to_thread(register)
+        job_pool.notify()
 
         return {
             "message": "Image uploaded successfully. Processing valuation...",
             "filename": image_upload.filename,
+            "job_id": job_id,
             "status": "processing",
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events",
         }
 
     except ValueError as e:
@@ -251,73 +403,381 @@ async def upload_image(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 
-async def process_image_valuation(
-    image_path: str, filename: str, notes: Optional[str], db: Session
+@app.post("/upload/batch")
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    notes: Optional[str] = None,
+    db: Session = Depends(get_db),
 ):
-    """Background task to process image valuation"""
+    """Upload many images, or ZIP/tar archives of images, as one batch.
+
+    Images already queued or valued (same bytes) are not queued again.
+    Archives are unpacked one member at a time from the spooled upload.
+    """
+    loop = asyncio.get_running_loop()
+
+    def queued(job_id: int):
+        # Commit each job as it is queued so workers start on the batch while
+        # the rest is still being unpacked
+        db.commit()
+        loop.call_soon_threadsafe(job_pool.notify)
+
+    def register():
+        intake = BatchIntake(image_processor, JobRepository(db), on_queued=queued)
+        batch = intake.start(
+            ", ".join(file.filename or "upload" for file in files), notes
+        )
+        for file in files:
+            intake.add_file(batch, file.filename or "upload", file.file)
+        intake.finish(batch)
+        db.commit()
+        return batch
+
     try:
-        # Identify LEGO items
-        identification = await lego_identifier.identify_lego_items(image_path)
-
-        # Perform valuation
-        valuation = await valuation_engine.evaluate_item(identification)
-
-        # Create report
-        report = ValuationReport(
-            image_filename=filename,
-            upload_timestamp=datetime.now(),
-            identification=identification,
-            valuation=valuation,
-            notes=notes,
+        batch = await asyncio.to_thread(register)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
+
+    return {
+        **batch.to_dict(),
+        "status": "processing",
+        "status_url": f"/batches/{batch.batch_id}",
+    }
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch_status(batch_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Aggregate progress of a batch upload"""
+    progress = await AsyncJobRepository(db).get_batch_progress(batch_id)
+    if not progress:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return {
+        "batch_id": progress["id"],
+        "source": progress["source"],
+        "status": "completed" if progress["completed"] else "processing",
+        "total_files": progress["total_files"],
+        "queued_files": progress["queued_files"],
+        "duplicate_files": progress["duplicate_files"],
+        "rejected_files": progress["rejected_files"],
+        "jobs": progress["jobs"],
+        "finished": progress["finished"],
+        "progress": progress["progress"],
+        "estimated_value": progress["estimated_value"],
+        "created_at": progress["created_at"],
+    }
+
+
+JOB_TERMINAL_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+JOB_STREAM_KEEPALIVE_SECONDS = 15.0
+
+
+def _job_status(job: dict) -> dict:
+    """Status payload for a job row"""
+    valuation_id = job["valuation_record_id"]
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "filename": job["image_filename"],
+        "batch_id": job["batch_id"],
+        "valuation_id": valuation_id,
+        "valuation_url": f"/valuations/{valuation_id}" if valuation_id else None,
+        "report_url": (
+            f"/reports/generate/{valuation_id}"
+            if valuation_id and job["status"] == JOB_SUCCEEDED
+            else None
+        ),
+        "error": job["last_error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def _sse(kind: str, data: dict) -> bytes:
+    return f"event: {kind}\ndata: {json_utils.dumps(data)}\n\n".encode()
+
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get the status of a queued valuation"""
+    job = await AsyncJobRepository(db).get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(_job_status(job))
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """Server-sent events for a job until it succeeds or fails.
+
+    Opens with a "snapshot" event carrying the current status, then sends a
+    "stage" event per pipeline stage (with partial results when the job runs
+    in this process) and "status" events for status changes. Jobs run by
+    other processes are followed by polling the job table.
+    """
+    repo = AsyncJobRepository(db)
+    job = await repo.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        with job_pool.events.subscribe(job_id) as queue:
+            current = await repo.get_job(job_id)
+            yield _sse("snapshot", _job_status(current))
+            last_seen = (current["status"], current["stage"])
+            last_sent = time.monotonic()
+
+            while last_seen[0] not in JOB_TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(
+                        queue.get(), timeout=settings.job_poll_interval_seconds
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    current = await repo.get_job(job_id)
+                    if current is None:
+                        return
+                    if (current["status"], current["stage"]) != last_seen:
+                        event = {"event": "snapshot", **_job_status(current)}
+                    elif time.monotonic() - last_sent >= JOB_STREAM_KEEPALIVE_SECONDS:
+                        last_sent = time.monotonic()
+                        yield b": keepalive\n\n"
+                        continue
+                    else:
+                        continue
+
+                kind = event.pop("event")
+                last_seen = (event["status"], event["stage"])
+                last_sent = time.monotonic()
+                yield _sse(kind, event)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/pipeline/stats")
+async def pipeline_stats(db: AsyncSession = Depends(get_async_db)):
+    """Job counts and per-stage queue depth and latency for this process's pipeline"""
+    return FastJSONResponse(
+        {
+            "jobs": await AsyncJobRepository(db).count_by_status(),
+            "workers": job_pool.workers,
+            "stages": valuation_pipeline.stats(),
+        }
+    )
+
+
+@app.get("/metrics")
+async def prometheus_metrics(db: AsyncSession = Depends(get_async_db)):
+    """This process's metrics in the Prometheus text exposition format.
+
+    Stage timings, Claude and BrickLink call latency, database writes,
+    report rendering, cache hit rates, rate limiter waits and queue depths.
+    """
+    counts = await AsyncJobRepository(db).count_by_status()
+    for status in (JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED, JOB_FAILED):
+        metrics.JOBS.set(counts.get(status, 0), status=status)
+    return Response(
+        metrics.REGISTRY.render(), headers={"Content-Type": metrics.CONTENT_TYPE}
+    )
+
+
+# Responses that change with the data are cached by clients but revalidated
+# on every request, which costs a 304 while nothing has changed
+CACHE_CONTROL = "private, no-cache"
+
+
+def _http_date(value: datetime) -> str:
+    """HTTP-date for a naive UTC datetime"""
+    return format_datetime(
+        value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True
+    )
+
+
+def _valuation_etag(valuation_id: int, version, variant: str = "") -> Optional[str]:
+    """Strong ETag for a valuation's representations from its row version.
+
+    Covers when the row last changed, the schema of its stored report and
+    the schema responses are written in; variant tells apart encodings and
+    formats of the same valuation.
+    """
+    updated_at, row_schema = version
+    if updated_at is None:
+        return None
+    stamp = int(updated_at.replace(tzinfo=timezone.utc).timestamp() * 1_000_000)
+    return f'"{valuation_id}.{stamp}.{row_schema or 0}.{report_store.REPORT_SCHEMA_VERSION}{variant}"'
+
+
+def _cache_headers(
+    etag: Optional[str], last_modified: Optional[datetime] = None
+) -> dict:
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def _is_fresh(
+    request: Request, etag: Optional[str], last_modified: Optional[datetime] = None
+) -> bool:
+    """Whether the client's cached copy is current (RFC 9110 conditional GET).
+
+    If-None-Match is compared weakly and, when present, If-Modified-Since is
+    ignored; Last-Modified only has one-second resolution.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        opaque = etag.removeprefix("W/")
+        return any(
+            tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
         )
 
-        # Save to database
-        repo = ValuationRepository(db)
-        repo.create_valuation_record(report)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return last_modified.replace(microsecond=0) <= since
+
 
-        # Generate PDF report
-        report_generator.generate_pdf_report(report)
+def _not_modified(
+    etag: Optional[str], last_modified: Optional[datetime] = None
+) -> Response:
+    return Response(status_code=304, headers=_cache_headers(etag, last_modified))
 
-        print(f"Valuation completed for {filename}: ${valuation.estimated_value:.2f}")
 
-    except Exception as e:
-        print(f"Error processing valuation for {filename}: {e}")
+def _valuation_summary(row: dict) -> dict:
+    """Listing/search shape for a VALUATION_LIST_COLUMNS row"""
+    return {
+        "id": row["id"],
+        "image_filename": row["image_filename"],
+        "estimated_value": row["estimated_value"],
+        "recommendation": row["recommendation_category"],
+        "confidence_score": row["confidence_score"],
+        "created_at": row["created_at"],
+    }
 
 
 @app.get("/valuations")
 async def list_valuations(
-    skip: int = 0, limit: int = 20, db: Session = Depends(get_db)
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """List all valuation records"""
-    repo = ValuationRepository(db)
-    records = repo.list_valuation_records(skip=skip, limit=limit)
-
-    # Convert to JSON-serializable format
-    results = []
-    for record in records:
-        results.append(
-            {
-                "id": record.id,
-                "image_filename": record.image_filename,
-                "estimated_value": record.estimated_value,
-                "recommendation": record.recommendation_category,
-                "confidence_score": record.confidence_score,
-                "created_at": record.created_at,
-            }
+    """List valuation records, newest first.
+
+    Pass the returned next_cursor to fetch the following page; it is null on
+    the last page.
+    """
+    repo = AsyncValuationRepository(db)
+    try:
+        rows, next_cursor = await repo.list_valuation_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results = [_valuation_summary(row) for row in rows]
+
+    total = None
+    if include_total:
+        total = await repo.count_valuations(
+            max_age=settings.valuation_count_cache_seconds
         )
 
-    return {"valuations": results, "total": len(results)}
+    return FastJSONResponse(
+        {"valuations": results, "total": total, "next_cursor": next_cursor}
+    )
+
+
+@app.get("/valuations/search")
+async def search_valuations(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Full-text search over item names, numbers, themes, reasoning and notes"""
+    repo = AsyncValuationRepository(db)
+    rows = await repo.search_valuation_page(q, limit=limit, offset=offset)
+
+    return FastJSONResponse(
+        {
+            "query": q,
+            "valuations": [_valuation_summary(row) for row in rows],
+            "limit": limit,
+            "offset": offset,
+        }
+    )
 
 
 @app.get("/valuations/{valuation_id}")
-async def get_valuation_detail(valuation_id: int, db: Session = Depends(get_db)):
-    """Get detailed valuation information"""
-    repo = ValuationRepository(db)
-    record = repo.get_valuation_record(valuation_id)
+async def get_valuation_detail(
+    valuation_id: int, request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    """Get detailed valuation information.
+
+    Served from the report blob rendered when the valuation was saved; the
+    gzip bytes go out as-is to clients that accept gzip. Conditional requests
+    for an unchanged valuation get a 304 without the blob being read.
+    """
+    repo = AsyncValuationRepository(db)
+    version = await repo.get_valuation_version(valuation_id)
+
+    if version is None:
+        raise HTTPException(status_code=404, detail="Valuation not found")
+
+    accepts_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    last_modified = version[0]
+    etag = _valuation_etag(
+        valuation_id, version, "-gzip" if accepts_gzip and version[1] else ""
+    )
+    if _is_fresh(request, etag, last_modified):
+        return _not_modified(etag, last_modified)
 
-    if not record:
+    stored = await repo.get_report_blob(valuation_id)
+    if stored is None:
         raise HTTPException(status_code=404, detail="Valuation not found")
 
+    headers = _cache_headers(etag, last_modified)
+    blob, schema_version = stored
+    if blob is None:
+        # Saved before report blobs existed
+        record = await repo.get_valuation_record(valuation_id)
+        return FastJSONResponse(_valuation_detail(record), headers=headers)
+
+    if schema_version != report_store.REPORT_SCHEMA_VERSION:
+        blob = report_store.encode_document(report_store.decode_document(blob))
+
+    headers["Vary"] = "Accept-Encoding"
+    if accepts_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(blob, media_type="application/json", headers=headers)
+    return Response(
+        gzip.decompress(blob), media_type="application/json", headers=headers
+    )
+
+
+def _valuation_detail(record) -> dict:
+    """Detail response built from the row, for records without a report blob"""
     return {
         "id": record.id,
         "image_filename": record.image_filename,
@@ -335,26 +795,47 @@ async def get_valuation_detail(valuation_id: int, db: Session = Depends(get_db))
 
 
 @app.get("/inventory")
-async def inventory_summary(db: Session = Depends(get_db)):
-    """Get inventory summary"""
-    repo = InventoryRepository(db)
-    items = repo.list_inventory()
-    summary = repo.get_inventory_summary()
+async def inventory_summary(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get inventory summary.
 
-    return {
-        "summary": summary,
-        "recent_items": [
-            {
-                "id": item.id,
-                "item_name": item.item_name,
-                "item_type": item.item_type,
-                "estimated_value": item.estimated_value,
-                "status": item.status,
-                "location": item.location,
-            }
-            for item in items[:10]  # Show first 10 items
-        ],
-    }
+    Carries a weak ETag from the inventory_items change counter, so polling
+    dashboards get a 304 from one primary key lookup while nothing has
+    changed. Without a counter the ETag is a hash of the response.
+    """
+    repo = AsyncInventoryRepository(db)
+    # Read before the data: a write landing in between costs the next poll a
+    # 200, where reading it after could pin stale data to a newer version
+    version = await repo.get_version()
+    etag = f'W/"inventory-{version}"' if version is not None else None
+    if etag and _is_fresh(request, etag):
+        return _not_modified(etag)
+
+    items = await repo.list_inventory(limit=10)
+    summary = await repo.get_inventory_summary()
+
+    content = json_utils.dumpb(
+        {
+            "summary": summary,
+            "recent_items": [
+                {
+                    "id": item.id,
+                    "item_name": item.item_name,
+                    "item_type": item.item_type,
+                    "estimated_value": item.estimated_value,
+                    "status": item.status,
+                    "location": item.location,
+                }
+                for item in items  # Show first 10 items
+            ],
+        }
+    )
+    if etag is None:
+        etag = f'W/"{hashlib.sha1(content).hexdigest()}"'
+        if _is_fresh(request, etag):
+            return _not_modified(etag)
+    return Response(
+        content, media_type="application/json", headers=_cache_headers(etag)
+    )
 
 
 @app.post("/inventory/add/{valuation_id}")
@@ -378,36 +859,60 @@ async def add_to_inventory(
     }
 
 
+REPORT_FORMATS = {"pdf": "application/pdf", "html": "text/html"}
+
+
 @app.get("/reports/generate/{valuation_id}")
 async def generate_report(
-    valuation_id: int, format: str = "pdf", db: Session = Depends(get_db)
+    valuation_id: int,
+    request: Request,
+    format: str = "pdf",
+    db: Session = Depends(get_db),
 ):
-    """Generate a report for a specific valuation"""
-    repo = ValuationRepository(db)
-    record = repo.get_valuation_record(valuation_id)
+    """Generate a report for a specific valuation from its stored report.
 
-    if not record:
+    A client holding the current report gets a 304 without it being rendered again.
+    """
+    format = format.lower()
+    if format not in REPORT_FORMATS:
+        raise HTTPException(
+            status_code=400, detail=f"Unsupported report format: {format}"
+        )
+
+    repo = ValuationRepository(db)
+    version = repo.get_valuation_version(valuation_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Valuation not found")
 
-    # Reconstruct ValuationReport from database record
-    # This is a simplified reconstruction - in practice you'd want more robust serialization
+    etag = _valuation_etag(valuation_id, version, f"-{format}")
+    if _is_fresh(request, etag, version[0]):
+        return _not_modified(etag, version[0])
+
+    report = repo.get_report(valuation_id)
+    if report is None:
+        raise HTTPException(status_code=422, detail="Stored valuation is incomplete")
+
+    generate = (
+        report_generator.generate_pdf
+        if format == "pdf"
+        else report_generator.generate_html
+    )
     try:
-        if format.lower() == "pdf":
-            # For now, return a simple response - full implementation would reconstruct the report
-            return {
-                "message": "PDF generation requires full report reconstruction",
-                "status": "not_implemented",
-            }
-        else:
-            return {
-                "message": "HTML generation requires full report reconstruction",
-                "status": "not_implemented",
-            }
+        file_path = await asyncio.to_thread(generate, report)
+    except ImportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Report generation failed: {str(e)}"
         )
 
+    return FileResponse(
+        file_path,
+        media_type=REPORT_FORMATS[format],
+        filename=Path(file_path).name,
+        headers=_cache_headers(etag, version[0]),
+    )
+
 
 @app.get("/health")
 async def health_check():
@@ -4,13 +4,14 @@ Alternative image identification methods for cost reduction
 import base64
 import json
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pathlib import Path
 import requests
 from PIL import Image
 import io
 
 from src.models.schemas import IdentificationResult, LegoItem, ItemType, ItemCondition
+from src.utils.preprocessed_image import PreprocessedImage, preprocess
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +23,16 @@ class OpenAIVisionIdentifier:
         self.api_key = api_key
         self.base_url = "https://api.openai.com/v1/chat/completions"
     
-    def _encode_image(self, image_path: str) -> str:
+    def _encode_image(self, image_path: Union[str, PreprocessedImage]) -> str:
         """Encode image to base64 for OpenAI API"""
+        if isinstance(image_path, PreprocessedImage):
+            return image_path.base64()
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
-    
-    async def identify_lego_items(self, image_path: str) -> IdentificationResult:
+
+    async def identify_lego_items(
+        self, image_path: Union[str, PreprocessedImage]
+    ) -> IdentificationResult:
         """Identify LEGO items using OpenAI Vision"""
         try:
             # Encode image
@@ -156,12 +161,16 @@ class GoogleVisionIdentifier:
         self.api_key = api_key
         self.base_url = "https://vision.googleapis.com/v1/images:annotate"
     
-    def _encode_image(self, image_path: str) -> str:
+    def _encode_image(self, image_path: Union[str, PreprocessedImage]) -> str:
         """Encode image to base64 for Google Vision API"""
+        if isinstance(image_path, PreprocessedImage):
+            return image_path.base64()
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
-    
-    async def identify_lego_items(self, image_path: str) -> IdentificationResult:
+
+    async def identify_lego_items(
+        self, image_path: Union[str, PreprocessedImage]
+    ) -> IdentificationResult:
         """Identify LEGO items using Google Vision API"""
         try:
             image_base64 = self._encode_image(image_path)
@@ -259,8 +268,10 @@ class LocalImageAnalysisIdentifier:
         except ImportError:
             logger.warning("OpenCV not available for local image analysis")
             self.available = False
-    
-    async def identify_lego_items(self, image_path: str) -> IdentificationResult:
+
+    async def identify_lego_items(
+        self, image_path: Union[str, PreprocessedImage]
+    ) -> IdentificationResult:
         """Basic local image analysis for LEGO detection"""
         if not self.available:
             return IdentificationResult(
@@ -271,19 +282,23 @@ class LocalImageAnalysisIdentifier:
             )
         
         try:
-            # Load image
-            image = self.cv2.imread(image_path)
-            if image is None:
-                return IdentificationResult(
-                    confidence_score=0.0,
-                    identified_items=[],
-                    description="Could not load image",
-                    condition_assessment="Cannot assess"
-                )
-            
-            # Convert to different color spaces for analysis
-            hsv = self.cv2.cvtColor(image, self.cv2.COLOR_BGR2HSV)
-            gray = self.cv2.cvtColor(image, self.cv2.COLOR_BGR2GRAY)
+            if isinstance(image_path, PreprocessedImage):
+                # Already decoded, with its colour conversions cached
+                image, hsv, gray = image_path.pixels, image_path.hsv, image_path.gray
+            else:
+                # Load image
+                image = self.cv2.imread(image_path)
+                if image is None:
+                    return IdentificationResult(
+                        confidence_score=0.0,
+                        identified_items=[],
+                        description="Could not load image",
+                        condition_assessment="Cannot assess",
+                    )
+
+                # Convert to different color spaces for analysis
+                hsv = self.cv2.cvtColor(image, self.cv2.COLOR_BGR2HSV)
+                gray = self.cv2.cvtColor(image, self.cv2.COLOR_BGR2GRAY)
             
             # Look for LEGO-like features
             lego_features = self._detect_lego_features(image, hsv, gray)
@@ -397,11 +412,20 @@ class HybridIdentifier:
             self.identifiers.append(('google', GoogleVisionIdentifier(google_api_key)))
         
         # Always add local analysis as fallback
-        self.identifiers.append(('local', LocalImageAnalysisIdentifier()))
-    
-    async def identify_lego_items(self, image_path: str, max_cost: str = 'medium') -> IdentificationResult:
+        self.identifiers.append(("local", LocalImageAnalysisIdentifier()))
+
+    async def identify_lego_items(
+        self, image_path: Union[str, PreprocessedImage], max_cost: str = "medium"
+    ) -> IdentificationResult:
         """Identify LEGO items using the most cost-effective method that meets requirements"""
         
+        # Decode once for every identifier tried; each reports its own error
+        # if the file cannot be read
+        try:
+            image = preprocess(image_path)
+        except (OSError, ValueError):
+            image = image_path
+
         # Define cost tiers
         cost_tiers = {
             'low': ['local', 'google'],
@@ -417,7 +441,7 @@ class HybridIdentifier:
             
             try:
                 logger.info(f"Trying {method_name} identifier")
-                result = await identifier.identify_lego_items(image_path)
+                result = await identifier.identify_lego_items(image)
                 
                 # If we get a good result, use it
                 if result.confidence_score > 0.5 or (result.identified_items and result.confidence_score > 0.3):
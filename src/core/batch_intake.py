@@ -0,0 +1,221 @@
+"""
+Batch Intake
+Registers a batch of images (uploaded files, ZIP/tar archives or a directory),
+skips images already queued by content hash and enqueues the rest as
+valuation jobs
+"""
+
+import io
+import logging
+import tarfile
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (
+    ".zip",
+    ".tar",
+    ".tar.gz",
+    ".tgz",
+    ".tar.bz2",
+    ".tbz2",
+    ".tar.xz",
+    ".txz",
+)
+
+# Outcome of one file in a batch
+ENTRY_QUEUED = "queued"
+ENTRY_DUPLICATE = (
+    "duplicate"  # Same image already queued or valued; job_id is the existing job
+)
+ENTRY_REJECTED = "rejected"
+
+
+@dataclass
+class BatchEntry:
+    filename: str
+    status: str
+    job_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    batch_id: int
+    notes: Optional[str] = None
+    entries: List[BatchEntry] = field(default_factory=list)
+
+    def count(self, status: str) -> int:
+        return sum(1 for entry in self.entries if entry.status == status)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "total_files": len(self.entries),
+            "queued": self.count(ENTRY_QUEUED),
+            "duplicates": self.count(ENTRY_DUPLICATE),
+            "rejected": self.count(ENTRY_REJECTED),
+            "files": [entry.__dict__ for entry in self.entries],
+        }
+
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _is_junk(name: str) -> bool:
+    """Directory metadata that archivers and file managers leave behind"""
+    path = PurePosixPath(name)
+    return (
+        "__MACOSX" in path.parts
+        or path.name.startswith(".")
+        or path.name in ("Thumbs.db", "desktop.ini")
+    )
+
+
+def iter_archive(fileobj: BinaryIO, filename: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """Yield (member name, stream) for each file in a ZIP or tar archive.
+
+    Each stream is only valid until the next member is requested. Tar
+    archives are read as a forward-only stream; ZIP needs a seekable file for
+    its central directory.
+    """
+    if filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(fileobj) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as member:
+                        yield info.filename, member
+    else:
+        with tarfile.open(fileobj=fileobj, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile():
+                    yield member.name, archive.extractfile(member)
+
+
+class BatchIntake:
+    """Turns a batch of files into valuation jobs.
+
+    on_queued(job_id) is called after each job is enqueued, so callers
+    holding a session can commit and wake the workers while the rest of the
+    batch is still being unpacked.
+    """
+
+    def __init__(
+        self,
+        image_processor,
+        repository,
+        max_attempts: int = None,
+        max_files: int = None,
+        on_queued: Optional[Callable[[int], None]] = None,
+    ):
+        self.image_processor = image_processor
+        self.repository = repository
+        self.max_attempts = max_attempts or settings.job_max_attempts
+        self.max_files = max_files or settings.batch_max_files
+        self.on_queued = on_queued
+
+    def start(self, source: str, notes: Optional[str] = None) -> BatchResult:
+        """Register a new batch"""
+        return BatchResult(self.repository.create_batch(source, notes), notes)
+
+    def add_file(self, batch: BatchResult, filename: str, fileobj: BinaryIO):
+        """Add one image, or every image in a ZIP/tar archive"""
+        if not is_archive(filename):
+            self.add_stream(batch, filename, fileobj)
+            return
+
+        try:
+            for name, member in iter_archive(fileobj, filename):
+                if not _is_junk(name):
+                    self.add_stream(batch, PurePosixPath(name).name, member)
+        except (zipfile.BadZipFile, tarfile.TarError, EOFError) as e:
+            self._reject(batch, filename, f"Unreadable archive: {e}")
+
+    def add_directory(
+        self, batch: BatchResult, directory: Path, recursive: bool = False
+    ):
+        """Add every image and archive in a directory, in name order"""
+        paths = Path(directory).rglob("*") if recursive else Path(directory).iterdir()
+        for path in sorted(paths):
+            if path.is_file() and not _is_junk(path.name):
+                with open(path, "rb") as f:
+                    self.add_file(batch, path.name, f)
+
+    def add_image(self, batch: BatchResult, filename: str, data: bytes) -> BatchEntry:
+        """Queue one image held in memory"""
+        return self.add_stream(batch, filename, io.BytesIO(data))
+
+    def add_stream(
+        self, batch: BatchResult, filename: str, stream: BinaryIO
+    ) -> BatchEntry:
+        """Queue one image unless the same bytes are already queued or valued.
+
+        The image is streamed to disk and hashed on the way, so the hash is
+        only known once it is saved; a duplicate's file is removed again.
+        """
+        if len(batch.entries) >= self.max_files:
+            return self._reject(
+                batch, filename, f"Batch is limited to {self.max_files} files"
+            )
+
+        try:
+            file_path, image_upload = self.image_processor.save_image_stream(
+                stream, filename
+            )
+        except (ValueError, OSError) as e:
+            return self._reject(batch, filename, str(e))
+
+        duplicate_of = self.repository.find_by_content_hash(image_upload.content_hash)
+        if duplicate_of is not None:
+            Path(file_path).unlink(missing_ok=True)
+            return self._add(
+                batch, BatchEntry(filename, ENTRY_DUPLICATE, job_id=duplicate_of)
+            )
+
+        try:
+            optimized_path = self.image_processor.optimize_image_for_ai(file_path)
+        except (ValueError, OSError) as e:
+            return self._reject(batch, filename, str(e))
+
+        job_id = self.repository.enqueue(
+            optimized_path,
+            image_upload.filename,
+            batch.notes,
+            max_attempts=self.max_attempts,
+            batch_id=batch.batch_id,
+            content_hash=image_upload.content_hash,
+        )
+        if self.on_queued:
+            self.on_queued(job_id)
+        return self._add(
+            batch, BatchEntry(image_upload.filename, ENTRY_QUEUED, job_id=job_id)
+        )
+
+    def finish(self, batch: BatchResult) -> BatchResult:
+        """Record the batch's intake counts"""
+        self.repository.update_batch_counts(
+            batch.batch_id,
+            len(batch.entries),
+            batch.count(ENTRY_QUEUED),
+            batch.count(ENTRY_DUPLICATE),
+            batch.count(ENTRY_REJECTED),
+        )
+        logger.info(
+            f"Batch {batch.batch_id}: {batch.count(ENTRY_QUEUED)} queued, "
+            f"{batch.count(ENTRY_DUPLICATE)} duplicates, {batch.count(ENTRY_REJECTED)} rejected"
+        )
+        return batch
+
+    def _reject(self, batch: BatchResult, filename: str, error: str) -> BatchEntry:
+        return self._add(batch, BatchEntry(filename, ENTRY_REJECTED, error=error))
+
+    @staticmethod
+    def _add(batch: BatchResult, entry: BatchEntry) -> BatchEntry:
+        batch.entries.append(entry)
+        return entry
@@ -12,6 +12,7 @@ from contextlib import contextmanager
 
 from src.models.schemas import ValuationReport, IdentificationResult, ValuationResult
 from src.database.repository import ValuationRepository
+from src.utils import json_utils
 
 logger = logging.getLogger(__name__)
 
@@ -73,16 +74,18 @@ class DataPersistenceManager:
         """Create database backup of valuation"""
         try:
             backup_data = {
-                'id': valuation_id,
-                'report': report.model_dump(),
-                'timestamp': datetime.now().isoformat()
+                "id": valuation_id,
+                "report": report.model_dump(),
+                "timestamp": datetime.now().isoformat(),
             }
             
             with sqlite3.connect(self.backup_db_path) as conn:
                 conn.execute("""
                     INSERT INTO valuation_backups (original_id, data, status)
                     VALUES (?, ?, 'active')
-                """, (valuation_id, json.dumps(backup_data)))
+                """,
+                    (valuation_id, json_utils.dumps(backup_data)),
+                )
                 conn.commit()
                 
         except Exception as e:
@@ -111,16 +114,18 @@ class DataPersistenceManager:
         """Emergency save to backup database when main database fails"""
         try:
             backup_data = {
-                'report': report.model_dump(),
-                'emergency_save': True,
-                'timestamp': datetime.now().isoformat()
+                "report": report.model_dump(),
+                "emergency_save": True,
+                "timestamp": datetime.now().isoformat(),
             }
             
             with sqlite3.connect(self.backup_db_path) as conn:
                 cursor = conn.execute("""
                     INSERT INTO valuation_backups (original_id, data, status)
                     VALUES (?, ?, 'emergency')
-                """, (0, json.dumps(backup_data)))
+                """,
+                    (0, json_utils.dumps(backup_data)),
+                )
                 conn.commit()
                 
                 emergency_id = cursor.lastrowid
@@ -166,32 +171,77 @@ class DataPersistenceManager:
     
     def restore_from_backup(self, backup_id: int) -> bool:
         """Restore specific backup to main database"""
+        return len(self.restore_backups([backup_id])) == 1
+
+    def restore_backups(
+        self, backup_ids: Optional[List[int]] = None, chunk_size: int = 500
+    ) -> List[int]:
+        """Restore backups to the main database in bulk; returns the new valuation IDs.
+
+        Only emergency saves are restored: active backups mirror valuations
+        already in the main database. Without backup_ids every emergency save
+        is restored. Each chunk's backups are marked 'restored' with their new
+        valuation IDs as soon as the chunk commits, so a later failure never
+        leaves committed valuations to be restored twice.
+        """
+        valuation_ids: List[int] = []
         try:
             with sqlite3.connect(self.backup_db_path) as conn:
-                cursor = conn.execute("""
-                    SELECT data FROM valuation_backups WHERE id = ?
-                """, (backup_id,))
-                
-                row = cursor.fetchone()
-                if not row:
-                    logger.error(f"Backup {backup_id} not found")
-                    return False
-                
-                data = json.loads(row[0])
-                report_data = data.get('report')
-                
-                if not report_data:
-                    logger.error(f"No report data in backup {backup_id}")
-                    return False
-                
-                # Reconstruct ValuationReport from backup data
-                # This is a simplified reconstruction - in practice you'd want more robust deserialization
-                logger.info(f"Restoring backup {backup_id}")
-                return True
-                
+                if backup_ids is None:
+                    rows = conn.execute(
+                        "SELECT id, data FROM valuation_backups WHERE status = 'emergency' ORDER BY id"
+                    ).fetchall()
+                else:
+                    placeholders = ", ".join("?" for _ in backup_ids)
+                    rows = conn.execute(
+                        "SELECT id, data FROM valuation_backups "
+                        f"WHERE status = 'emergency' AND id IN ({placeholders}) ORDER BY id",
+                        list(backup_ids),
+                    ).fetchall()
+
+            restored_backup_ids, reports = [], []
+            for backup_id, data_str in rows:
+                try:
+                    report_data = json.loads(data_str).get("report")
+                    if not report_data:
+                        logger.error(f"No report data in backup {backup_id}")
+                        continue
+                    reports.append(ValuationReport.model_validate(report_data))
+                    restored_backup_ids.append(backup_id)
+                except (ValueError, AttributeError) as e:
+                    logger.error(f"Failed to parse backup data {backup_id}: {e}")
+
+            missing = set(backup_ids or []) - {row[0] for row in rows}
+            for backup_id in sorted(missing):
+                logger.error(
+                    f"Emergency backup {backup_id} not found or already restored"
+                )
+
+            repo = ValuationRepository(self.db_manager)
+            for start in range(0, len(reports), chunk_size):
+                # save_valuations_bulk commits per chunk, so mark per chunk too
+                chunk_ids = repo.save_valuations_bulk(
+                    reports[start : start + chunk_size], chunk_size=chunk_size
+                )
+                with sqlite3.connect(self.backup_db_path) as conn:
+                    conn.executemany(
+                        "UPDATE valuation_backups SET status = 'restored', original_id = ? WHERE id = ?",
+                        list(
+                            zip(
+                                chunk_ids,
+                                restored_backup_ids[start : start + chunk_size],
+                            )
+                        ),
+                    )
+                    conn.commit()
+                valuation_ids.extend(chunk_ids)
+
         except Exception as e:
-            logger.error(f"Failed to restore backup {backup_id}: {e}")
-            return False
+            logger.error(f"Failed to restore backups: {e}")
+
+        if valuation_ids:
+            logger.info(f"Restored {len(valuation_ids)} backups")
+        return valuation_ids
     
     def cleanup_old_backups(self, days_to_keep: int = 30):
         """Clean up old backup files"""
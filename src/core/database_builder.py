@@ -204,7 +204,7 @@ class MinifigureDatabaseBuilder:
         """Get detailed information about a minifigure"""
         try:
             # Use BrickLink API to get item details
-            url = f"{self.bricklink_client.BASE_URL}/items/minifig/{item_number}"
+            url = f"{self.bricklink_client.base_url}/items/minifig/{item_number}"
             headers = self.bricklink_client._get_oauth_headers("GET", url)
             
             response = self.session.get(url, headers=headers, timeout=10)
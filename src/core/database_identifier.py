@@ -4,14 +4,17 @@ Combines computer vision matching with AI analysis for maximum accuracy
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
+from functools import cached_property
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Union
 from pathlib import Path
 import logging
 
 from src.models.schemas import IdentificationResult, LegoItem, ItemType, ItemCondition
-from src.core.image_matcher import ImageMatcher, MatchResult
-from src.core.lego_identifier import LegoIdentifier
 from src.core.real_data_database_builder import RealDataDatabaseBuilder
+from src.utils.preprocessed_image import PreprocessedImage, preprocess
+
+if TYPE_CHECKING:
+    from src.core.image_matcher import MatchResult
 
 logger = logging.getLogger(__name__)
 
@@ -19,17 +22,48 @@ class DatabaseDrivenIdentifier:
     """Enhanced identifier that uses database matching + AI analysis"""
     
     def __init__(self):
-        self.image_matcher = ImageMatcher()
-        self.ai_identifier = LegoIdentifier()
         self.db_builder = RealDataDatabaseBuilder()
-        
-    async def identify_lego_items(self, image_path: str) -> IdentificationResult:
+
+    # The matcher (OpenCV) and the Claude client are built on first identification
+    @cached_property
+    def image_matcher(self):
+        from src.core.image_matcher import ImageMatcher
+
+        return ImageMatcher()
+
+    @cached_property
+    def ai_identifier(self):
+        from src.core.lego_identifier import LegoIdentifier
+
+        return LegoIdentifier()
+
+    async def identify_lego_items(
+        self, image_path: Union[str, PreprocessedImage]
+    ) -> IdentificationResult:
         """Identify LEGO items using database matching + AI analysis"""
+        # Decode once for both the matcher and the AI request; a file that
+        # cannot be decoded is left to each of them to report
+        try:
+            image_path = preprocess(image_path)
+        except (OSError, ValueError):
+            pass
+
         try:
             # Step 1: Database matching
             logger.info("Starting database matching...")
             db_matches = self.image_matcher.find_matches(image_path, limit=20)
-            
+        except Exception as e:
+            logger.error(f"Error in database-driven identification: {e}")
+            # Fallback to AI-only
+            return await self.ai_identifier.identify_lego_items(image_path)
+
+        return await self.identify_from_matches(image_path, db_matches)
+
+    async def identify_from_matches(
+        self, image_path: Union[str, PreprocessedImage], db_matches: List["MatchResult"]
+    ) -> IdentificationResult:
+        """AI analysis combined with database matches computed elsewhere (e.g. a process pool)"""
+        try:
             # Step 2: AI analysis for context and validation
             logger.info("Starting AI analysis...")
             ai_result = await self.ai_identifier.identify_lego_items(image_path)
@@ -47,10 +81,13 @@ class DatabaseDrivenIdentifier:
             logger.error(f"Error in database-driven identification: {e}")
             # Fallback to AI-only
             return await self.ai_identifier.identify_lego_items(image_path)
-    
-    def _combine_results(self, db_matches: List[MatchResult], 
-                        ai_result: IdentificationResult, 
-                        image_path: str) -> IdentificationResult:
+
+    def _combine_results(
+        self,
+        db_matches: List["MatchResult"],
+        ai_result: IdentificationResult,
+        image_path: str,
+    ) -> IdentificationResult:
         """Combine database matches with AI analysis"""
         
         # Convert database matches to LegoItem objects
@@ -135,9 +172,10 @@ class DatabaseDrivenIdentifier:
                 return category
         
         return None
-    
-    def _create_enhanced_description(self, db_matches: List[MatchResult], 
-                                   ai_result: IdentificationResult) -> str:
+
+    def _create_enhanced_description(
+        self, db_matches: List["MatchResult"], ai_result: IdentificationResult
+    ) -> str:
         """Create enhanced description combining database and AI info"""
         
         if not db_matches:
@@ -174,9 +212,10 @@ class DatabaseDrivenIdentifier:
             parts.append(f"Additional context: {ai_result.description}")
         
         return ". ".join(parts) + "."
-    
-    def _create_enhanced_condition_assessment(self, db_matches: List[MatchResult], 
-                                            ai_result: IdentificationResult) -> str:
+
+    def _create_enhanced_condition_assessment(
+        self, db_matches: List["MatchResult"], ai_result: IdentificationResult
+    ) -> str:
         """Create enhanced condition assessment"""
         
         # Start with AI assessment
@@ -193,14 +232,11 @@ class DatabaseDrivenIdentifier:
     def get_database_stats(self) -> Dict[str, Any]:
         """Get database statistics - only real BrickLink data"""
         # Check only real database
-        real_count = self.db_builder.get_minifigure_count()
-        
+        stats = self.db_builder.get_stats()
         return {
-            'total_minifigures': real_count,
-            'real_database_count': real_count,
-            'mock_database_count': 0,  # No mock data
-            'database_path': self.db_builder.db_path,
-            'images_directory': str(self.db_builder.images_dir)
+            **stats,
+            "real_database_count": stats["total_minifigures"],
+            "mock_database_count": 0,  # No mock data
         }
     
     def search_database(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
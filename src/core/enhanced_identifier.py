@@ -4,15 +4,18 @@ Enhanced LEGO Identifier with multiple strategies and accuracy improvements
 import base64
 import json
 import os
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Union
 from pathlib import Path
 import anthropic
 import logging
 from PIL import Image
 import hashlib
+import numpy as np
 
 from config.settings import settings
 from src.models.schemas import IdentificationResult, LegoItem, ItemType, ItemCondition
+from src.utils.metrics import CLAUDE_REQUEST_SECONDS, record_cache
+from src.utils.preprocessed_image import PreprocessedImage, preprocess
 from src.utils.rate_limiter import AnthropicRateLimiter
 
 logger = logging.getLogger(__name__)
@@ -22,43 +25,17 @@ class ImageQualityAssessment:
     """Assess image quality before processing"""
     
     @staticmethod
-    def assess_quality(image_path: str) -> Dict[str, Any]:
-        """Assess image quality and return recommendations"""
+    def assess_quality(image: Union[str, PreprocessedImage]) -> Dict[str, Any]:
+        """Assess image quality (a path or an already decoded upload) and return recommendations"""
         try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                total_pixels = width * height
-                
-                # Check resolution
-                resolution_score = min(total_pixels / (1024 * 1024), 1.0)  # Normalize to 1MP
-                
-                # Check aspect ratio (prefer square-ish images for LEGO)
-                aspect_ratio = max(width, height) / min(width, height)
-                aspect_score = 1.0 if aspect_ratio < 2.0 else 0.7
-                
-                # Check if image is too dark or too bright
-                if img.mode == 'RGB':
-                    # Convert to grayscale for brightness analysis
-                    gray = img.convert('L')
-                    pixels = list(gray.getdata())
-                    avg_brightness = sum(pixels) / len(pixels)
-                    brightness_score = 1.0 - abs(avg_brightness - 128) / 128
-                else:
-                    brightness_score = 0.8  # Assume decent if not RGB
-                
-                # Overall quality score
-                quality_score = (resolution_score * 0.4 + aspect_score * 0.3 + brightness_score * 0.3)
-                
-                return {
-                    'quality_score': quality_score,
-                    'resolution': f"{width}x{height}",
-                    'total_pixels': total_pixels,
-                    'aspect_ratio': aspect_ratio,
-                    'brightness_score': brightness_score,
-                    'recommendations': ImageQualityAssessment._get_recommendations(
-                        quality_score, resolution_score, aspect_ratio, brightness_score
+            if not isinstance(image, PreprocessedImage):
+                with Image.open(image) as img:
+                    return ImageQualityAssessment._assess(
+                        img.width, img.height, img.mode, img
                     )
-                }
+            return ImageQualityAssessment._assess(
+                image.width, image.height, "RGB", image
+            )
         except Exception as e:
             logger.error(f"Error assessing image quality: {e}")
             return {
@@ -66,6 +43,46 @@ class ImageQualityAssessment:
                 'error': str(e),
                 'recommendations': ['Image quality assessment failed']
             }
+
+    @staticmethod
+    def _assess(width: int, height: int, mode: str, image) -> Dict[str, Any]:
+        total_pixels = width * height
+
+        # Check resolution
+        resolution_score = min(total_pixels / (1024 * 1024), 1.0)  # Normalize to 1MP
+
+        # Check aspect ratio (prefer square-ish images for LEGO)
+        aspect_ratio = max(width, height) / min(width, height)
+        aspect_score = 1.0 if aspect_ratio < 2.0 else 0.7
+
+        # Check if image is too dark or too bright
+        if mode == "RGB":
+            # Mean luma (ITU-R 601, as PIL's grayscale conversion), without a per-pixel Python loop
+            pixels = (
+                image.pixels
+                if isinstance(image, PreprocessedImage)
+                else np.asarray(image)[:, :, ::-1]
+            )
+            avg_brightness = float((pixels @ np.array([0.114, 0.587, 0.299])).mean())
+            brightness_score = 1.0 - abs(avg_brightness - 128) / 128
+        else:
+            brightness_score = 0.8  # Assume decent if not RGB
+
+        # Overall quality score
+        quality_score = (
+            resolution_score * 0.4 + aspect_score * 0.3 + brightness_score * 0.3
+        )
+
+        return {
+            "quality_score": quality_score,
+            "resolution": f"{width}x{height}",
+            "total_pixels": total_pixels,
+            "aspect_ratio": aspect_ratio,
+            "brightness_score": brightness_score,
+            "recommendations": ImageQualityAssessment._get_recommendations(
+                quality_score, resolution_score, aspect_ratio, brightness_score
+            ),
+        }
     
     @staticmethod
     def _get_recommendations(quality_score: float, resolution_score: float, 
@@ -102,14 +119,18 @@ class EnhancedLegoIdentifier:
         # Cache for repeated identifications
         self.identification_cache = {}
     
-    def _get_image_hash(self, image_path: str) -> str:
+    def _get_image_hash(self, image: Union[str, PreprocessedImage]) -> str:
         """Generate hash for image caching"""
-        with open(image_path, 'rb') as f:
+        if isinstance(image, PreprocessedImage):
+            return image.content_hash
+        with open(image, "rb") as f:
             return hashlib.md5(f.read()).hexdigest()
     
-    def _encode_image(self, image_path: str) -> str:
+    def _encode_image(self, image: Union[str, PreprocessedImage]) -> str:
         """Encode image to base64 for Claude API"""
-        with open(image_path, "rb") as image_file:
+        if isinstance(image, PreprocessedImage):
+            return image.base64()
+        with open(image, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
     
     def _get_enhanced_identification_prompt(self) -> str:
@@ -169,18 +190,24 @@ class EnhancedLegoIdentifier:
         
         Be thorough but honest about uncertainty. If you're not sure about specific details, indicate lower confidence or use null values.
         IMPORTANT: Only identify themes you can actually see evidence for - do not guess or assume popular themes!"""
-    
-    async def identify_lego_items_enhanced(self, image_path: str) -> IdentificationResult:
+
+    async def identify_lego_items_enhanced(
+        self, image_path: Union[str, PreprocessedImage]
+    ) -> IdentificationResult:
         """Enhanced identification with quality assessment and caching"""
         try:
+            # Decode once; hashing, quality checks and encoding all share it
+            image = preprocess(image_path)
+
             # Check cache first
-            image_hash = self._get_image_hash(image_path)
+            image_hash = self._get_image_hash(image)
+            record_cache("identification", image_hash in self.identification_cache)
             if image_hash in self.identification_cache:
                 logger.info("Using cached identification result")
                 return self.identification_cache[image_hash]
             
             # Assess image quality first
-            quality_assessment = self.quality_assessor.assess_quality(image_path)
+            quality_assessment = self.quality_assessor.assess_quality(image)
             logger.info(f"Image quality score: {quality_assessment['quality_score']:.2f}")
             
             # If quality is too low, return low confidence result
@@ -193,11 +220,11 @@ class EnhancedLegoIdentifier:
                 )
             
             # Encode image
-            image_base64 = self._encode_image(image_path)
-            image_media_type = "image/jpeg"
+            image_base64 = self._encode_image(image)
+            image_media_type = image.media_type
 
             # Estimate token usage for rate limiting
-            image_size = os.path.getsize(image_path)
+            image_size = len(image.jpeg_bytes)
             estimated_image_tokens = self.rate_limiter.estimate_image_tokens(image_size)
             prompt = self._get_enhanced_identification_prompt()
             estimated_prompt_tokens = self.rate_limiter.estimate_prompt_tokens(prompt)
@@ -209,30 +236,32 @@ class EnhancedLegoIdentifier:
             await self.rate_limiter.wait_for_capacity(total_estimated_tokens)
             
             # Make API call to Claude
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",  # Use latest model
-                max_tokens=3000,  # Increased for more detailed responses
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": image_media_type,
-                                    "data": image_base64,
+            model = "claude-3-5-sonnet-20241022"
+            with CLAUDE_REQUEST_SECONDS.time(model=model):
+                message = self.client.messages.create(
+                    model=model,  # Use latest model
+                    max_tokens=3000,  # Increased for more detailed responses
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "image",
+                                    "source": {
+                                        "type": "base64",
+                                        "media_type": image_media_type,
+                                        "data": image_base64,
+                                    },
                                 },
-                            },
-                            {
-                                "type": "text",
-                                "text": f"Please analyze this image and identify all LEGO items visible. Image quality assessment: {quality_assessment['quality_score']:.2f}/1.0. Follow the detailed instructions for identification and assessment.",
-                            },
-                        ],
-                    }
-                ],
-                system=self._get_enhanced_identification_prompt(),
-            )
+                                {
+                                    "type": "text",
+                                    "text": f"Please analyze this image and identify all LEGO items visible. Image quality assessment: {quality_assessment['quality_score']:.2f}/1.0. Follow the detailed instructions for identification and assessment.",
+                                },
+                            ],
+                        }
+                    ],
+                    system=self._get_enhanced_identification_prompt(),
+                )
             
             # Record actual usage
             actual_input_tokens = getattr(message.usage, 'input_tokens', total_estimated_tokens)
@@ -10,6 +10,8 @@ from dataclasses import dataclass
 
 from src.models.schemas import MarketData, DetailedPricing
 from src.external.bricklink_client import BrickLinkClient
+from src.core.price_estimator import BatchEstimate, HeuristicPriceEstimator
+from src.utils.metrics import record_cache
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +22,23 @@ class MarketDataSource:
     name: str
     reliability_score: float
     last_success: Optional[datetime] = None
+    last_failure: Optional[datetime] = None
     failure_count: int = 0
     max_failures: int = 3
+    retry_after: timedelta = timedelta(minutes=5)
+
+    def is_available(self) -> bool:
+        """Degraded sources become available again once retry_after has passed"""
+        if self.failure_count < self.max_failures:
+            return True
+        if self.last_failure and datetime.now() - self.last_failure >= self.retry_after:
+            self.failure_count = self.max_failures - 1  # Allow a single probe
+            return True
+        return False
+
+    def record_failure(self):
+        self.failure_count += 1
+        self.last_failure = datetime.now()
 
 
 class EnhancedMarketDataAggregator:
@@ -36,6 +53,7 @@ class EnhancedMarketDataAggregator:
         }
         self.cache = {}
         self.cache_duration = timedelta(hours=6)  # Cache for 6 hours
+        self.estimator = HeuristicPriceEstimator()
     
     def _get_cache_key(self, item_number: str, item_type: str, condition: str) -> str:
         """Generate cache key for market data"""
@@ -62,13 +80,25 @@ class EnhancedMarketDataAggregator:
             item.condition.value if item.condition else "used_complete"
         )
         
-        if cache_key in self.cache and self._is_cache_valid(self.cache[cache_key]):
+        fresh = cache_key in self.cache and self._is_cache_valid(self.cache[cache_key])
+        record_cache("market_data", fresh)
+        if fresh:
             logger.info(f"Using cached market data for {item.item_number}")
             return MarketData(**self.cache[cache_key]['data'])
         
+        # BrickLink is unreachable - a stale price beats a heuristic estimate
+        if cache_key in self.cache and self.bricklink_client.circuit_breaker.is_open:
+            logger.info(
+                f"BrickLink circuit open, serving stale market data for {item.item_number}"
+            )
+            return MarketData(**self.cache[cache_key]["data"])
+
         # Try multiple sources in parallel
         tasks = []
-        if self.sources['bricklink'].failure_count < self.sources['bricklink'].max_failures:
+        if (
+            self.sources["bricklink"].is_available()
+            and not self.bricklink_client.circuit_breaker.is_open
+        ):
             tasks.append(self._get_bricklink_data(item))
         
         tasks.append(self._get_ebay_estimate(item))
@@ -94,7 +124,7 @@ class EnhancedMarketDataAggregator:
             bl_item_type = "MINIFIG" if item.item_type.value == "minifigure" else "SET"
             condition_code = "N" if item.condition.value == "new" else "U"
             
-            market_data = self.bricklink_client.get_price_guide(
+            market_data = await self.bricklink_client.get_price_guide_async(
                 bl_item_type, item.item_number, condition_code
             )
             
@@ -103,12 +133,12 @@ class EnhancedMarketDataAggregator:
                 self.sources['bricklink'].failure_count = 0
                 return market_data
             else:
-                self.sources['bricklink'].failure_count += 1
+                self.sources["bricklink"].record_failure()
                 return None
                 
         except Exception as e:
             logger.error(f"BrickLink API error: {e}")
-            self.sources['bricklink'].failure_count += 1
+            self.sources["bricklink"].record_failure()
             return None
     
     async def _get_ebay_estimate(self, item: 'LegoItem') -> Optional[MarketData]:
@@ -157,54 +187,16 @@ class EnhancedMarketDataAggregator:
     
     def _estimate_price_from_characteristics(self, item: 'LegoItem') -> Optional[float]:
         """Estimate price based on item characteristics when no market data available"""
-        base_price = 0.0
-        
-        # Base price by type
-        if item.item_type and item.item_type.value == "minifigure":
-            base_price = 5.0  # Base minifigure price
-        elif item.item_type and item.item_type.value == "set":
-            base_price = 20.0  # Base set price
-        else:
-            base_price = 2.0  # Base part price
-        
-        # Adjust for theme rarity
-        theme_multipliers = {
-            "Star Wars": 2.0,
-            "Super Heroes": 1.8,
-            "Ninjago": 1.5,
-            "Friends": 1.2,
-            "City": 1.0,
-            "Creator": 0.8,
-        }
-        
-        if item.theme and item.theme in theme_multipliers:
-            base_price *= theme_multipliers[item.theme]
-        
-        # Adjust for age (older items generally more valuable)
-        if item.year_released:
-            current_year = datetime.now().year
-            age = current_year - item.year_released
-            if age > 20:
-                base_price *= 2.0  # Vintage bonus
-            elif age > 10:
-                base_price *= 1.5  # Classic bonus
-            elif age > 5:
-                base_price *= 1.2  # Recent bonus
-        
-        # Adjust for condition
-        condition_multipliers = {
-            "new": 1.0,
-            "used_complete": 0.8,
-            "used_incomplete": 0.4,
-            "damaged": 0.2,
-        }
-        
-        if item.condition and item.condition.value in condition_multipliers:
-            base_price *= condition_multipliers[item.condition.value]
-        
+        base_price = self.estimator.estimate_item(item)
         return base_price if base_price > 0 else None
-    
-    def _aggregate_market_data(self, item: 'LegoItem', results: List[Any]) -> MarketData:
+
+    def estimate_prices_batch(self, items: List["LegoItem"]) -> BatchEstimate:
+        """Characteristic, eBay and local market estimates for many items in one call"""
+        return self.estimator.estimate_items(items)
+
+    def _aggregate_market_data(
+        self, item: "LegoItem", results: List[Any]
+    ) -> MarketData:
         """Aggregate market data from multiple sources"""
         valid_results = [r for r in results if isinstance(r, MarketData) and r.current_price]
         
@@ -277,11 +269,24 @@ class EnhancedMarketDataAggregator:
         report = {}
         for name, source in self.sources.items():
             report[name] = {
-                'reliability_score': source.reliability_score,
-                'failure_count': source.failure_count,
-                'last_success': source.last_success.isoformat() if source.last_success else None,
-                'status': 'healthy' if source.failure_count < source.max_failures else 'degraded'
+                "reliability_score": source.reliability_score,
+                "failure_count": source.failure_count,
+                "last_success": source.last_success.isoformat()
+                if source.last_success
+                else None,
+                "last_failure": source.last_failure.isoformat()
+                if source.last_failure
+                else None,
+                "status": "healthy"
+                if source.failure_count < source.max_failures
+                else "degraded",
             }
+        report["bricklink"][
+            "circuit_breaker"
+        ] = self.bricklink_client.circuit_breaker.get_status()
+        report["bricklink"][
+            "rate_limiter"
+        ] = self.bricklink_client.rate_limiter.get_usage_stats()
         return report
     
     def clear_cache(self):
@@ -6,12 +6,15 @@ Uses computer vision to match uploaded images against database
 import cv2
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Union
 import sqlite3
 import logging
 from dataclasses import dataclass
 import json
 
+from src.utils.metrics import IMAGE_MATCH_SECONDS
+from src.utils.preprocessed_image import PreprocessedImage, image_location
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -40,15 +43,23 @@ class ImageMatcher:
         # Feature matching parameters
         self.match_threshold = 0.7
         self.min_matches = 10
-        
-    def extract_features(self, image_path: str) -> Dict[str, np.ndarray]:
-        """Extract features from an image for matching"""
+
+        # Reference image features, keyed by (minifigure id, image path)
+        self._index: Dict[Tuple[int, str], Dict[str, np.ndarray]] = {}
+
+    def extract_features(
+        self, image: Union[str, PreprocessedImage]
+    ) -> Dict[str, np.ndarray]:
+        """Extract features from an image (a path or an already decoded upload) for matching"""
         try:
-            image = cv2.imread(str(image_path))
-            if image is None:
-                return {}
-                
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if isinstance(image, PreprocessedImage):
+                pixels, gray, hsv = image.pixels, image.gray, image.hsv
+            else:
+                pixels = cv2.imread(str(image))
+                if pixels is None:
+                    return {}
+                gray = cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY)
+                hsv = None
             
             # Extract SIFT features
             sift_keypoints, sift_descriptors = self.sift.detectAndCompute(gray, None)
@@ -57,7 +68,7 @@ class ImageMatcher:
             orb_keypoints, orb_descriptors = self.orb.detectAndCompute(gray, None)
             
             # Extract color histogram
-            hist = self._extract_color_histogram(image)
+            hist = self._extract_color_histogram(pixels, hsv)
             
             return {
                 'sift_keypoints': sift_keypoints,
@@ -68,13 +79,16 @@ class ImageMatcher:
             }
             
         except Exception as e:
-            logger.error(f"Error extracting features from {image_path}: {e}")
+            logger.error(f"Error extracting features from {image_location(image)}: {e}")
             return {}
-    
-    def _extract_color_histogram(self, image: np.ndarray) -> np.ndarray:
+
+    def _extract_color_histogram(
+        self, image: np.ndarray, hsv: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """Extract color histogram features"""
         # Convert to HSV for better color analysis
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        if hsv is None:
+            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
         
         # Calculate histogram for each channel
         hist_h = cv2.calcHist([hsv], [0], None, [50], [0, 180])
@@ -181,27 +195,19 @@ class ImageMatcher:
             logger.error(f"Error in color histogram matching: {e}")
             return 0.0
     
-    def find_matches(self, query_image_path: str, limit: int = 10) -> List[MatchResult]:
-        """Find matches for a query image in the database"""
+    @IMAGE_MATCH_SECONDS.time()
+    def find_matches(
+        self, query_image: Union[str, PreprocessedImage], limit: int = 10
+    ) -> List[MatchResult]:
+        """Find matches for a query image (a path or an already decoded upload) in the database"""
         try:
             # Extract features from query image
-            query_features = self.extract_features(query_image_path)
+            query_features = self.extract_features(query_image)
             if not query_features:
                 return []
             
-            # Get all minifigures from database
-            minifigures = self._get_all_minifigures()
-            
             matches = []
-            for minifig in minifigures:
-                if not minifig['image_path'] or not Path(minifig['image_path']).exists():
-                    continue
-                
-                # Extract features from database image
-                db_features = self.extract_features(minifig['image_path'])
-                if not db_features:
-                    continue
-                
+            for minifig, db_features in self.load_index():
                 # Calculate similarity
                 similarity = self.match_features(query_features, db_features)
                 
@@ -226,6 +232,40 @@ class ImageMatcher:
             logger.error(f"Error finding matches: {e}")
             return []
     
+    def load_index(self) -> List[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+        """Reference features for every minifigure with an image.
+
+        Features are extracted once per reference image and kept for the life
+        of the matcher; later calls only extract images added since and drop
+        removed ones. Keypoints are not kept, as matching only compares
+        descriptors and histograms.
+        """
+        index = {}
+        entries = []
+        for minifig in self._get_all_minifigures():
+            key = (minifig["id"], minifig["image_path"])
+            features = self._index.get(key)
+            if features is None:
+                if (
+                    not minifig["image_path"]
+                    or not Path(minifig["image_path"]).exists()
+                ):
+                    continue
+                features = {
+                    name: value
+                    for name, value in self.extract_features(
+                        minifig["image_path"]
+                    ).items()
+                    if not name.endswith("_keypoints")
+                }
+                if not features:
+                    continue
+            index[key] = features
+            entries.append((minifig, features))
+
+        self._index = index
+        return entries
+
     def _determine_match_type(self, confidence: float) -> str:
         """Determine match type based on confidence score"""
         if confidence >= 0.8:
@@ -0,0 +1,539 @@
+"""
+Valuation Job Workers
+Runs queued uploads through identification, valuation, persistence and report
+generation with a bounded pool of workers leasing jobs from valuation_jobs
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Union
+
+from config.settings import settings
+from src.database.repository import (
+    JOB_FAILED,
+    JOB_SUCCEEDED,
+    JobRepository,
+    ValuationRepository,
+)
+from src.core.staged_pipeline import (
+    EXECUTOR_PROCESS,
+    EXECUTOR_THREAD,
+    Stage,
+    StagedPipeline,
+)
+from src.models.schemas import IdentificationResult, ValuationReport
+from src.utils.preprocessed_image import PreprocessedImage
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages recorded on the job as it progresses
+STAGE_IDENTIFIED = "identified"
+STAGE_PRICED = "priced"
+STAGE_SAVED = "saved"
+STAGE_REPORT_READY = "report_ready"
+
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker may have taken it over"""
+
+
+class JobEventBroker:
+    """In-process fan-out of job progress events to stream subscribers.
+
+    Only jobs run by workers in this process publish here; subscribers fall
+    back to polling valuation_jobs for jobs run elsewhere.
+    """
+
+    def __init__(self, max_queued: int = 100):
+        self.max_queued = max_queued
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    def publish(self, job_id: int, kind: str, **data):
+        """Send an event to everyone watching job_id (call from the event loop thread)"""
+        event = {"event": kind, "job_id": job_id, **data}
+        for queue in self._subscribers.get(job_id, ()):
+            if queue.full():
+                queue.get_nowait()  # Slow consumer: drop its oldest event
+            queue.put_nowait(event)
+
+    @contextmanager
+    def subscribe(self, job_id: int) -> Iterator[asyncio.Queue]:
+        """Queue receiving job_id's events while the context is open"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queued)
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[job_id]
+
+
+class JobLease:
+    """A worker's hold on one leased job"""
+
+    def __init__(
+        self,
+        repository: JobRepository,
+        job: Dict[str, Any],
+        worker_id: str,
+        visibility_timeout: float,
+        events: Optional[JobEventBroker] = None,
+    ):
+        self.repository = repository
+        self.job = job
+        self.worker_id = worker_id
+        self.visibility_timeout = visibility_timeout
+        self.events = events
+        self.lost = False
+
+    async def renew(
+        self, stage: Optional[str] = None, partial: Optional[Dict[str, Any]] = None
+    ):
+        """Extend the lease, recording the stage reached; raises LeaseLost if it expired.
+
+        partial is the stage's result so far, published to stream subscribers.
+        """
+        if self.lost or not await asyncio.to_thread(
+            self.repository.extend_lease,
+            self.job["id"],
+            self.worker_id,
+            self.visibility_timeout,
+            stage,
+        ):
+            self.lost = True
+            raise LeaseLost(f"Lost lease on job {self.job['id']}")
+        if stage is not None:
+            self.job["stage"] = stage
+            self.publish("stage", **(partial or {}))
+
+    def publish(self, kind: str, **data):
+        if self.events is not None:
+            self.events.publish(
+                self.job["id"],
+                kind,
+                status=self.job["status"],
+                stage=self.job["stage"],
+                **data,
+            )
+
+    async def save(self, report: ValuationReport) -> int:
+        """Save the valuation and link it to the job in one transaction"""
+        valuation_id = await asyncio.to_thread(
+            self.repository.save_result,
+            self.job["id"],
+            self.worker_id,
+            report,
+            STAGE_SAVED,
+        )
+        if valuation_id is None:
+            self.lost = True
+            raise LeaseLost(f"Lost lease on job {self.job['id']}")
+        self.job["valuation_record_id"] = valuation_id
+        self.job["stage"] = STAGE_SAVED
+        self.publish("stage", valuation_id=valuation_id)
+        return valuation_id
+
+
+def match_image(image: Union[str, PreprocessedImage], limit: int = 20) -> list:
+    """Feature-match an image against the minifigure database (process pool stage).
+
+    Each pool process uses its own ImageMatcher, loaded by preload_matcher
+    as the process starts. A
+    PreprocessedImage arrives with just its pixels, so the pool neither
+    decodes the upload again nor is sent its JPEG bytes.
+    """
+    return _matcher().find_matches(image, limit=limit)
+
+
+def preload_matcher() -> int:
+    """Build this process's ImageMatcher and its reference index ahead of the first job.
+
+    Runs as the match pool's process initializer, so each spawned process
+    loads the index when it starts rather than inside its first match.
+    Returns the number of reference images indexed.
+    """
+    return len(_matcher().load_index())
+
+
+def _matcher():
+    global _process_matcher
+    if _process_matcher is None:
+        from src.core.image_matcher import ImageMatcher
+
+        _process_matcher = ImageMatcher()
+    return _process_matcher
+
+
+_process_matcher = None
+
+
+@dataclass
+class JobContext:
+    """A job's state as it moves through the pipeline stages"""
+
+    lease: JobLease
+    image: Optional[
+        PreprocessedImage
+    ] = None  # Decoded upload, released after identification
+    matches: Optional[list] = None
+    identification: Optional[IdentificationResult] = None
+    report: Optional[ValuationReport] = None
+    report_path: Optional[str] = None
+
+    @property
+    def needs_valuation(self) -> bool:
+        return self.lease.job["valuation_record_id"] is None
+
+
+class ValuationPipeline:
+    """identification -> valuation -> persistence -> reports for each upload.
+
+    Jobs run through a StagedPipeline so each kind of work gets its own
+    concurrency limit: decoding the upload in a thread pool, image matching
+    in a process pool (when the identifier supports precomputed matches),
+    Claude and BrickLink calls on the event loop, the database write, and
+    report rendering in a thread pool. The upload is decoded once and the
+    PreprocessedImage is handed to the matcher and the identifier.
+    """
+
+    def __init__(self, identifier, valuation_engine, report_generator, db_manager):
+        self.identifier = identifier
+        self.valuation_engine = valuation_engine
+        self.report_generator = report_generator
+        self.db_manager = db_manager
+        # Only identifiers that can take precomputed matches get a match stage
+        self.matches_images = callable(
+            getattr(type(identifier), "identify_from_matches", None)
+        )
+        self.stages = StagedPipeline(self._build_stages())
+
+    def _build_stages(self) -> List[Stage]:
+        stages = [
+            Stage(
+                "decode",
+                PreprocessedImage.open,
+                workers=settings.pipeline_decode_workers,
+                executor=EXECUTOR_THREAD,
+                when=lambda ctx: ctx.needs_valuation,
+                select=lambda ctx: ctx.lease.job["image_path"],
+                apply=lambda ctx, image: replace(ctx, image=image),
+            ),
+        ]
+        if self.matches_images:
+            stages.append(
+                Stage(
+                    "match",
+                    match_image,
+                    workers=settings.pipeline_match_workers,
+                    executor=EXECUTOR_PROCESS,
+                    initializer=preload_matcher,
+                    when=lambda ctx: ctx.needs_valuation,
+                    select=lambda ctx: ctx.image.without_jpeg(),
+                    apply=lambda ctx, matches: replace(ctx, matches=matches),
+                )
+            )
+        stages += [
+            Stage(
+                "identify",
+                self._identify,
+                workers=settings.pipeline_identify_workers,
+                when=lambda ctx: ctx.needs_valuation,
+            ),
+            Stage(
+                "price",
+                self._price,
+                workers=settings.pipeline_price_workers,
+                when=lambda ctx: ctx.needs_valuation,
+            ),
+            Stage("save", self._save, workers=settings.pipeline_save_workers),
+            Stage(
+                "report",
+                self._render,
+                workers=settings.pipeline_report_workers,
+                executor=EXECUTOR_THREAD,
+                select=lambda ctx: ctx.report,
+                apply=lambda ctx, report_path: replace(ctx, report_path=report_path),
+            ),
+        ]
+        return stages
+
+    async def run(self, lease: JobLease) -> str:
+        """Process a leased job; returns the report path.
+
+        A retry of a job whose valuation was already saved skips straight to
+        the report, rebuilding it from the stored valuation.
+        """
+        ctx = await self.stages.submit(JobContext(lease))
+        logger.info(
+            f"Valuation completed for {lease.job['image_filename']}: ${ctx.report.valuation.estimated_value:.2f}"
+        )
+        return ctx.report_path
+
+    def preload(self) -> Dict[str, Any]:
+        """Start the match pool now so its processes load the reference index before the first job"""
+        loaded = {}
+        if self.matches_images:
+            loaded["matcher_images"] = self.stages.warm_up()["match"][0]
+        return loaded
+
+    async def stop(self):
+        await self.stages.stop()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-stage queue depth and latency"""
+        return self.stages.stats()
+
+    async def _identify(self, ctx: JobContext) -> JobContext:
+        if ctx.matches is not None:
+            ctx.identification = await self.identifier.identify_from_matches(
+                ctx.image, ctx.matches
+            )
+        else:
+            ctx.identification = await self.identifier.identify_lego_items(ctx.image)
+        # Nothing after identification needs the pixels
+        ctx.image = None
+        await ctx.lease.renew(
+            STAGE_IDENTIFIED,
+            {
+                "confidence_score": ctx.identification.confidence_score,
+                "items": [
+                    {
+                        "item_number": item.item_number,
+                        "name": item.name,
+                        "theme": item.theme,
+                    }
+                    for item in ctx.identification.identified_items
+                ],
+            },
+        )
+        return ctx
+
+    async def _price(self, ctx: JobContext) -> JobContext:
+        job = ctx.lease.job
+        valuation = await self.valuation_engine.evaluate_item(ctx.identification)
+        await ctx.lease.renew(
+            STAGE_PRICED,
+            {
+                "estimated_value": valuation.estimated_value,
+                "recommendation": valuation.recommendation.value,
+            },
+        )
+        ctx.report = ValuationReport(
+            image_filename=job["image_filename"],
+            image_path=job["image_path"],
+            upload_timestamp=datetime.now(),
+            identification=ctx.identification,
+            valuation=valuation,
+            notes=job["notes"],
+        )
+        return ctx
+
+    async def _save(self, ctx: JobContext) -> JobContext:
+        if ctx.needs_valuation:
+            valuation_id = await ctx.lease.save(ctx.report)
+        else:
+            valuation_id = ctx.lease.job["valuation_record_id"]
+            ctx.report = await asyncio.to_thread(
+                ValuationRepository(self.db_manager).get_report, valuation_id
+            )
+        ctx.report.id = str(valuation_id)
+        return ctx
+
+    def _render(self, report: ValuationReport) -> str:
+        """Write the PDF report (HTML when reportlab is not installed)"""
+        try:
+            return self.report_generator.generate_pdf(report)
+        except ImportError:
+            return self.report_generator.generate_html(report)
+
+
+class JobWorkerPool:
+    """Bounded pool of workers leasing jobs from the valuation_jobs table.
+
+    The table is the durable queue: enqueued jobs survive restarts, and a job
+    whose worker dies is re-leased once its visibility timeout passes. Workers
+    wait on an in-process wakeup event (set by notify on enqueue) and fall
+    back to polling the table every poll_interval seconds.
+    """
+
+    def __init__(
+        self,
+        db_manager,
+        pipeline: ValuationPipeline,
+        workers: Optional[int] = None,
+        visibility_timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        retry_base_delay: Optional[float] = None,
+    ):
+        self.repository = JobRepository(db_manager)
+        self.pipeline = pipeline
+        self.events = JobEventBroker()
+        self.workers = workers if workers is not None else settings.job_workers
+        self.visibility_timeout = (
+            visibility_timeout or settings.job_visibility_timeout_seconds
+        )
+        self.poll_interval = poll_interval or settings.job_poll_interval_seconds
+        self.retry_base_delay = (
+            retry_base_delay
+            if retry_base_delay is not None
+            else settings.job_retry_base_delay_seconds
+        )
+        self.worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self.running or self.workers <= 0:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self.worker_prefix}:{n}"))
+            for n in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} valuation job workers")
+
+    def notify(self):
+        """Wake idle workers after enqueueing a job"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def stop(self, drain_timeout: float = 30.0):
+        """Stop taking jobs and let running ones finish for up to drain_timeout seconds.
+
+        Jobs still running after that are cancelled and handed back to the
+        queue without using up an attempt, so another process (or the next
+        start) picks them up straight away.
+        """
+        self._stopping = True
+        self.notify()
+        if not self._tasks:
+            return
+        _, pending = await asyncio.wait(self._tasks, timeout=drain_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+        await self.pipeline.stop()
+        logger.info("Valuation job workers stopped")
+
+    async def run_until_empty(self) -> int:
+        """Process due jobs with up to `workers` in flight until none are left (CLI and tests).
+
+        Returns the number of jobs processed.
+        """
+
+        async def drain(worker_id: str) -> int:
+            processed = 0
+            while True:
+                job = await asyncio.to_thread(
+                    self.repository.lease, worker_id, self.visibility_timeout
+                )
+                if job is None:
+                    return processed
+                await self.process(job, worker_id)
+                processed += 1
+
+        try:
+            counts = await asyncio.gather(
+                *(
+                    drain(f"{self.worker_prefix}:drain{n}")
+                    for n in range(max(self.workers, 1))
+                )
+            )
+        finally:
+            await self.pipeline.stop()
+        return sum(counts)
+
+    async def _worker(self, worker_id: str):
+        while not self._stopping:
+            try:
+                job = await asyncio.to_thread(
+                    self.repository.lease, worker_id, self.visibility_timeout
+                )
+            except Exception as e:
+                logger.error(f"Worker {worker_id} could not lease a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self.process(job, worker_id)
+
+    async def process(self, job: Dict[str, Any], worker_id: str):
+        """Run one leased job, keeping its lease alive, and record the outcome"""
+        lease = JobLease(
+            self.repository, job, worker_id, self.visibility_timeout, self.events
+        )
+        lease.publish("status", attempts=job["attempts"])
+        heartbeat = asyncio.create_task(self._heartbeat(lease))
+        try:
+            report_path = await self.pipeline.run(lease)
+            if not await asyncio.to_thread(
+                self.repository.complete,
+                job["id"],
+                worker_id,
+                STAGE_REPORT_READY,
+                report_path,
+            ):
+                raise LeaseLost(f"Lost lease on job {job['id']}")
+            job.update(status=JOB_SUCCEEDED, stage=STAGE_REPORT_READY)
+            lease.publish("status", valuation_id=job["valuation_record_id"])
+        except LeaseLost as e:
+            logger.warning(str(e))
+        except Exception as e:
+            delay = self.retry_base_delay * 2 ** max(job["attempts"] - 1, 0)
+            status = await asyncio.to_thread(
+                self.repository.fail, job["id"], worker_id, str(e), delay
+            )
+            if status == JOB_FAILED:
+                logger.error(
+                    f"Job {job['id']} failed after {job['attempts']} attempts: {e}"
+                )
+            else:
+                logger.warning(
+                    f"Job {job['id']} attempt {job['attempts']} failed, retrying in {delay:.0f}s: {e}"
+                )
+            if status is not None:
+                job["status"] = status
+                lease.publish("status", error=str(e))
+        except asyncio.CancelledError:
+            # Shutting down mid-job: requeue it rather than leave it leased until the timeout
+            await asyncio.shield(
+                asyncio.to_thread(self.repository.release, job["id"], worker_id)
+            )
+            logger.info(f"Job {job['id']} released back to the queue")
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, lease: JobLease):
+        """Renew the lease at a third of the visibility timeout while the job runs"""
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            try:
+                await lease.renew()
+            except LeaseLost:
+                return
+            except Exception as e:
+                logger.error(f"Lease renewal failed for job {lease.job['id']}: {e}")
@@ -1,13 +1,15 @@
 import base64
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
 from pathlib import Path
 import anthropic
 import logging
 
 from config.settings import settings
 from src.models.schemas import IdentificationResult, LegoItem, ItemType, ItemCondition
+from src.utils.metrics import CLAUDE_REQUEST_SECONDS
+from src.utils.preprocessed_image import PreprocessedImage
 from src.utils.rate_limiter import AnthropicRateLimiter
 
 logger = logging.getLogger(__name__)
@@ -19,9 +21,11 @@ class LegoIdentifier:
         # Initialize rate limiter
         self.rate_limiter = AnthropicRateLimiter()
 
-    def _encode_image(self, image_path: str) -> str:
+    def _encode_image(self, image: Union[str, PreprocessedImage]) -> str:
         """Encode image to base64 for Claude API"""
-        with open(image_path, "rb") as image_file:
+        if isinstance(image, PreprocessedImage):
+            return image.base64()
+        with open(image, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
 
     def _get_identification_prompt(self) -> str:
@@ -86,15 +90,22 @@ class LegoIdentifier:
         Be thorough but honest about uncertainty. If you're not sure about specific details, indicate lower confidence or use null values.
         IMPORTANT: Only identify themes you can actually see evidence for - do not guess or assume popular themes!"""
 
-    async def identify_lego_items(self, image_path: str) -> IdentificationResult:
-        """Identify LEGO items in the provided image using Claude Vision with rate limiting"""
+    async def identify_lego_items(
+        self, image_path: Union[str, PreprocessedImage]
+    ) -> IdentificationResult:
+        """Identify LEGO items in the provided image (a path or an already
+        decoded upload) using Claude Vision with rate limiting"""
         try:
             # Encode image
             image_base64 = self._encode_image(image_path)
             image_media_type = "image/jpeg"  # Assuming optimized images are JPEG
 
             # Estimate token usage for rate limiting
-            image_size = os.path.getsize(image_path)
+            image_size = (
+                len(image_path.jpeg_bytes)
+                if isinstance(image_path, PreprocessedImage)
+                else os.path.getsize(image_path)
+            )
             estimated_image_tokens = self.rate_limiter.estimate_image_tokens(image_size)
             prompt = self._get_identification_prompt()
             estimated_prompt_tokens = self.rate_limiter.estimate_prompt_tokens(prompt)
@@ -111,30 +122,32 @@ class LegoIdentifier:
 
             # Make API call to Claude (using Claude 4 Sonnet for superior accuracy)
             # Note: The client.messages.create is not async in the anthropic package
-            message = self.client.messages.create(
-                model="claude-4-sonnet-20250514",
-                max_tokens=2000,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": image_media_type,
-                                    "data": image_base64,
+            model = "claude-4-sonnet-20250514"
+            with CLAUDE_REQUEST_SECONDS.time(model=model):
+                message = self.client.messages.create(
+                    model=model,
+                    max_tokens=2000,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "image",
+                                    "source": {
+                                        "type": "base64",
+                                        "media_type": image_media_type,
+                                        "data": image_base64,
+                                    },
                                 },
-                            },
-                            {
-                                "type": "text",
-                                "text": "Please analyze this image and identify all LEGO items visible. Follow the detailed instructions for identification and assessment.",
-                            },
-                        ],
-                    }
-                ],
-                system=self._get_identification_prompt(),
-            )
+                                {
+                                    "type": "text",
+                                    "text": "Please analyze this image and identify all LEGO items visible. Follow the detailed instructions for identification and assessment.",
+                                },
+                            ],
+                        }
+                    ],
+                    system=self._get_identification_prompt(),
+                )
             
             # Record actual usage (estimate input tokens, get actual output tokens if available)
             actual_input_tokens = getattr(message.usage, 'input_tokens', total_estimated_tokens)
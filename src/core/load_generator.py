@@ -0,0 +1,224 @@
+"""
+Valuation Load Generator
+Drives ValuationEngine or the market-data aggregator concurrently against a
+(fake) BrickLink endpoint and reports throughput and latency percentiles
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from config.settings import settings
+from src.core.enhanced_market_data import EnhancedMarketDataAggregator
+from src.core.valuation_engine import ValuationEngine
+from src.models.schemas import IdentificationResult, ItemCondition, ItemType, LegoItem
+
+SCENARIOS = ("valuation", "market-data")
+
+
+@dataclass
+class LoadTestResult:
+    """Outcome of a load test run"""
+
+    scenario: str
+    requests: int
+    errors: int
+    duration: float
+    latencies: List[float] = field(default_factory=list)
+    server_stats: Dict[str, Any] = field(default_factory=dict)
+    client_stats: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, pct: float) -> float:
+        """Nearest-rank latency percentile in seconds"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = max(
+            0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1)
+        )
+        return ordered[index]
+
+
+def build_item_pool(unique_items: int, seed: Optional[int] = None) -> List[LegoItem]:
+    """Synthetic minifigures and sets; a small pool exercises the caches"""
+    rng = random.Random(seed)
+    conditions = [ItemCondition.NEW, ItemCondition.USED_COMPLETE]
+    items = []
+    for i in range(unique_items):
+        if rng.random() < 0.8:
+            items.append(
+                LegoItem(
+                    item_number=f"sw{i:04d}",
+                    name=f"Load Test Figure {i}",
+                    item_type=ItemType.MINIFIGURE,
+                    condition=rng.choice(conditions),
+                )
+            )
+        else:
+            items.append(
+                LegoItem(
+                    item_number=f"{10000 + i}",
+                    name=f"Load Test Set {i}",
+                    item_type=ItemType.SET,
+                    condition=rng.choice(conditions),
+                )
+            )
+    return items
+
+
+def point_at(base_url: str):
+    """Route every BrickLinkClient in this process to base_url"""
+    settings.bricklink_base_url = base_url
+    # The client skips requests without credentials; the fake server ignores them
+    for key in (
+        "bricklink_consumer_key",
+        "bricklink_consumer_secret",
+        "bricklink_token_value",
+        "bricklink_token_secret",
+    ):
+        if not getattr(settings, key):
+            setattr(settings, key, "load-test")
+
+
+def _fake_server_call(base_url: str, method: str, path: str) -> Dict[str, Any]:
+    try:
+        response = requests.request(
+            method, f"{base_url.rstrip('/')}/_fake/{path}", timeout=5
+        )
+        return response.json() if response.status_code == 200 else {}
+    except Exception:
+        return {}  # Not the fake server
+
+
+def run_load_test(
+    scenario: str = "valuation",
+    total_requests: int = 200,
+    concurrency: int = 10,
+    unique_items: int = 50,
+    items_per_request: int = 3,
+    base_url: Optional[str] = None,
+    exchange_rate: Optional[float] = 0.92,
+    seed: Optional[int] = None,
+) -> LoadTestResult:
+    """Run total_requests operations across concurrency worker threads"""
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{scenario}', expected one of {SCENARIOS}")
+    if base_url:
+        point_at(base_url)
+    base_url = base_url or settings.bricklink_base_url
+
+    rng = random.Random(seed)
+    pool = build_item_pool(unique_items, seed)
+
+    if scenario == "valuation":
+        target = ValuationEngine()
+        if exchange_rate is not None:
+            # Keep the third-party FX API out of the measurement
+            target.bricklink_client.get_current_exchange_rate = lambda: exchange_rate
+
+        def make_call():
+            items = rng.sample(pool, min(items_per_request, len(pool)))
+            identification = IdentificationResult(
+                confidence_score=0.8,
+                identified_items=items,
+                description="Load test",
+                condition_assessment="Good",
+            )
+            return target.evaluate_item(identification)
+
+    else:
+        target = EnhancedMarketDataAggregator()
+
+        def make_call():
+            return target.get_enhanced_market_data(rng.choice(pool))
+
+    def worker(_):
+        start = time.perf_counter()
+        try:
+            asyncio.run(make_call())
+            return time.perf_counter() - start, False
+        except Exception:
+            return time.perf_counter() - start, True
+
+    _fake_server_call(base_url, "POST", "reset")
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(worker, range(total_requests)))
+    duration = time.perf_counter() - started
+
+    client_stats = target.bricklink_client.get_guard_status()
+    if scenario == "market-data":
+        client_stats["cache_entries"] = len(target.cache)
+
+    return LoadTestResult(
+        scenario=scenario,
+        requests=total_requests,
+        errors=sum(1 for _, failed in outcomes if failed),
+        duration=duration,
+        latencies=[latency for latency, _ in outcomes],
+        server_stats=_fake_server_call(base_url, "GET", "stats"),
+        client_stats=client_stats,
+    )
+
+
+def print_report(result: LoadTestResult):
+    print(f"📊 Load test: {result.scenario}")
+    print(
+        f"   Requests: {result.requests} ({result.errors} errors) in {result.duration:.2f}s"
+    )
+    print(f"   Throughput: {result.throughput:.1f} req/s")
+    print(
+        f"   Latency p50/p95/p99: {result.percentile(50) * 1000:.0f}ms / "
+        f"{result.percentile(95) * 1000:.0f}ms / {result.percentile(99) * 1000:.0f}ms"
+    )
+    if result.server_stats:
+        print(f"   Server: {result.server_stats}")
+    limiter = result.client_stats.get("rate_limiter", {})
+    breaker = result.client_stats.get("circuit_breaker", {})
+    print(f"   Client limiter: {limiter}")
+    print(f"   Client breaker: {breaker}")
+    if "cache_entries" in result.client_stats:
+        print(f"   Market data cache entries: {result.client_stats['cache_entries']}")
+
+
+def main():
+    """Run a load test from the command line"""
+    parser = argparse.ArgumentParser(description="Valuation load generator")
+    parser.add_argument(
+        "--base-url",
+        default="http://127.0.0.1:8081",
+        help="BrickLink API root, normally the fake server",
+    )
+    parser.add_argument("--scenario", choices=SCENARIOS, default="valuation")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--unique-items", type=int, default=50)
+    parser.add_argument("--items-per-request", type=int, default=3)
+    parser.add_argument("--seed", type=int)
+
+    args = parser.parse_args()
+
+    result = run_load_test(
+        scenario=args.scenario,
+        total_requests=args.requests,
+        concurrency=args.concurrency,
+        unique_items=args.unique_items,
+        items_per_request=args.items_per_request,
+        base_url=args.base_url,
+        seed=args.seed,
+    )
+    print_report(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Vectorised Heuristic Price Estimator
+Rule-based price estimates for whole batches of items using precomputed
+type, theme, age and condition lookup tables applied with NumPy
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Sequence
+
+import numpy as np
+
+from src.models.schemas import LegoItem
+
+# Base price by item type; anything else is priced as a part
+TYPE_CODES = {"minifigure": 0, "set": 1, "part": 2}
+TYPE_BASE_PRICES = np.array([5.0, 20.0, 2.0])
+
+THEME_MULTIPLIERS = {
+    "Star Wars": 2.0,
+    "Super Heroes": 1.8,
+    "Ninjago": 1.5,
+    "Friends": 1.2,
+    "City": 1.0,
+    "Creator": 0.8,
+}
+THEME_CODES = {theme: i + 1 for i, theme in enumerate(THEME_MULTIPLIERS)}
+THEME_TABLE = np.array([1.0, *THEME_MULTIPLIERS.values()])  # Code 0 = unknown theme
+
+CONDITION_MULTIPLIERS = {
+    "new": 1.0,
+    "used_complete": 0.8,
+    "used_incomplete": 0.4,
+    "damaged": 0.2,
+}
+CONDITION_CODES = {
+    condition: i + 1 for i, condition in enumerate(CONDITION_MULTIPLIERS)
+}
+CONDITION_TABLE = np.array(
+    [1.0, *CONDITION_MULTIPLIERS.values()]
+)  # Code 0 = unknown condition
+
+# Age in years -> multiplier; ages past the end use the last entry (vintage)
+AGE_TABLE = np.array([1.0] * 6 + [1.2] * 5 + [1.5] * 10 + [2.0])
+
+EBAY_6M_FACTOR = 0.95  # Slightly lower 6-month average
+LOCAL_MARKET_FACTOR = 0.85  # Local market typically 10-20% lower than online
+
+
+def _value(field: Any) -> Any:
+    return getattr(field, "value", field)
+
+
+@dataclass
+class BatchEstimate:
+    """Per-item estimate arrays, aligned with the input order"""
+
+    characteristic: np.ndarray
+    ebay: np.ndarray
+    ebay_6m: np.ndarray
+    local_market: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.characteristic)
+
+
+class HeuristicPriceEstimator:
+    """Applies the characteristic pricing rules to many items in one call"""
+
+    def __init__(self, current_year: Optional[int] = None):
+        self.current_year = current_year or datetime.now().year
+
+    def estimate_columns(
+        self,
+        item_types: Sequence[Any],
+        themes: Sequence[Optional[str]],
+        years: Sequence[Optional[int]],
+        conditions: Sequence[Any],
+    ) -> BatchEstimate:
+        """Estimate from column sequences, e.g. straight from an inventory query"""
+        type_codes = np.fromiter(
+            (TYPE_CODES.get(_value(t), 2) for t in item_types),
+            dtype=np.intp,
+            count=len(item_types),
+        )
+        theme_codes = np.fromiter(
+            (THEME_CODES.get(t, 0) for t in themes), dtype=np.intp, count=len(themes)
+        )
+        condition_codes = np.fromiter(
+            (CONDITION_CODES.get(_value(c), 0) for c in conditions),
+            dtype=np.intp,
+            count=len(conditions),
+        )
+        year_values = np.fromiter(
+            (y if y else 0 for y in years), dtype=np.int64, count=len(years)
+        )
+
+        ages = np.clip(self.current_year - year_values, 0, len(AGE_TABLE) - 1)
+        age_multipliers = np.where(year_values > 0, AGE_TABLE[ages], 1.0)
+
+        characteristic = (
+            TYPE_BASE_PRICES[type_codes]
+            * THEME_TABLE[theme_codes]
+            * age_multipliers
+            * CONDITION_TABLE[condition_codes]
+        )
+        return BatchEstimate(
+            characteristic=characteristic,
+            ebay=characteristic,
+            ebay_6m=characteristic * EBAY_6M_FACTOR,
+            local_market=characteristic * LOCAL_MARKET_FACTOR,
+        )
+
+    def estimate_items(self, items: Sequence[LegoItem]) -> BatchEstimate:
+        """Estimate a list of LegoItems"""
+        return self.estimate_columns(
+            [item.item_type for item in items],
+            [item.theme for item in items],
+            [item.year_released for item in items],
+            [item.condition for item in items],
+        )
+
+    def estimate_item(self, item: LegoItem) -> float:
+        """Single-item estimate from the same tables, without array overhead"""
+        price = float(TYPE_BASE_PRICES[TYPE_CODES.get(_value(item.item_type), 2)])
+        price *= THEME_MULTIPLIERS.get(item.theme, 1.0)
+        if item.year_released:
+            age = min(
+                max(self.current_year - item.year_released, 0), len(AGE_TABLE) - 1
+            )
+            price *= float(AGE_TABLE[age])
+        price *= CONDITION_MULTIPLIERS.get(_value(item.condition), 1.0)
+        return price
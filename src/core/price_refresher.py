@@ -0,0 +1,145 @@
+"""
+Background Price Refresher for Inventory Items
+Keeps InventoryItem.current_market_price fresh without price calls on the interactive path
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from src.database.repository import InventoryRepository
+from src.external.bricklink_client import BrickLinkClient
+
+logger = logging.getLogger(__name__)
+
+# InventoryItem.item_type -> BrickLink item type
+BRICKLINK_ITEM_TYPES = {
+    "minifigure": "MINIFIG",
+    "set": "SET",
+    "part": "PART",
+}
+
+
+@dataclass
+class RefreshStats:
+    """Outcome of a single refresh run"""
+
+    selected: int = 0
+    priced: int = 0
+    no_data: int = 0
+    failed: int = 0
+    batches: int = 0
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class InventoryPriceRefresher:
+    """Re-prices stale inventory rows in rate-limited batches"""
+
+    def __init__(
+        self,
+        db_manager,
+        bricklink_client: Optional[BrickLinkClient] = None,
+        max_age_hours: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        batch_interval: Optional[float] = None,
+    ):
+        self.repository = InventoryRepository(db_manager)
+        self.bricklink_client = bricklink_client or BrickLinkClient()
+        self.max_age = timedelta(
+            hours=max_age_hours or settings.price_refresh_max_age_hours
+        )
+        self.batch_size = batch_size or settings.price_refresh_batch_size
+        self.concurrency = concurrency or settings.price_refresh_concurrency
+        self.batch_interval = (
+            batch_interval
+            if batch_interval is not None
+            else settings.price_refresh_batch_interval
+        )
+
+    def select_stale_items(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Select stale inventory rows in refresh priority order"""
+        stale_before = datetime.utcnow() - self.max_age
+        return self.repository.get_stale_items(stale_before, limit=limit)
+
+    async def refresh_once(self, limit: Optional[int] = None) -> RefreshStats:
+        """Refresh every stale item (up to limit) and write results in bulk"""
+        stats = RefreshStats()
+        items = self.select_stale_items(limit)
+        stats.selected = len(items)
+
+        if not items:
+            stats.finished_at = datetime.utcnow()
+            return stats
+
+        logger.info(f"Refreshing market prices for {len(items)} inventory items")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        for start in range(0, len(items), self.batch_size):
+            if start and self.batch_interval > 0:
+                await asyncio.sleep(self.batch_interval)
+
+            batch = items[start : start + self.batch_size]
+            results = await asyncio.gather(
+                *(self._price_item(item, semaphore) for item in batch)
+            )
+
+            updates = []
+            for update in results:
+                if update is None:
+                    stats.failed += 1
+                    continue
+                if "current_market_price" in update:
+                    stats.priced += 1
+                else:
+                    stats.no_data += 1
+                updates.append(update)
+
+            self.repository.bulk_update_prices(updates)
+            stats.batches += 1
+
+        stats.finished_at = datetime.utcnow()
+        logger.info(
+            f"Price refresh complete: {stats.priced} priced, {stats.no_data} without data, "
+            f"{stats.failed} failed"
+        )
+        return stats
+
+    async def run_forever(self, interval_minutes: Optional[int] = None):
+        """Long-lived worker loop: refresh, then sleep until the next run"""
+        interval = interval_minutes or settings.price_refresh_interval_minutes
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                logger.error(f"Price refresh run failed: {e}")
+            await asyncio.sleep(interval * 60)
+
+    async def _price_item(
+        self, item: Dict[str, Any], semaphore: asyncio.Semaphore
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch the price guide for one row and build its UPDATE parameters"""
+        bl_item_type = BRICKLINK_ITEM_TYPES.get(item["item_type"], "MINIFIG")
+        condition_code = "N" if item["condition"] == "new" else "U"
+
+        async with semaphore:
+            try:
+                market_data = await self.bricklink_client.get_price_guide_async(
+                    bl_item_type, item["item_number"], condition_code
+                )
+            except Exception as e:
+                logger.error(f"Price refresh failed for {item['item_number']}: {e}")
+                return None
+
+        # None means the request itself failed - leave the row for the next run
+        if market_data is None:
+            return None
+
+        update = {"id": item["id"], "last_price_update": datetime.utcnow()}
+        if market_data.current_price is not None:
+            update["current_market_price"] = market_data.current_price
+        return update
@@ -0,0 +1,417 @@
+"""
+Offline Price Table for BrickLink Price Guides
+Bulk-imports price-guide exports (CSV/XML) into an indexed local table so
+valuations only call the BrickLink API for missing or stale items
+"""
+
+import csv
+import logging
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from config.settings import settings
+from src.external.bricklink_client import estimate_other_conditions
+from src.models.schemas import DetailedPricing, MarketData
+from src.utils.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# BrickLink XML single-letter item types
+ITEM_TYPE_CODES = {
+    "M": "MINIFIG",
+    "S": "SET",
+    "P": "PART",
+    "B": "BOOK",
+    "G": "GEAR",
+    "C": "CATALOG",
+    "I": "INSTRUCTION",
+    "O": "ORIGINAL_BOX",
+}
+
+# Normalised export column/tag name -> price_guide column
+COLUMN_ALIASES = {
+    "item_type": "item_type",
+    "type": "item_type",
+    "itemtype": "item_type",
+    "item_no": "item_number",
+    "item_number": "item_number",
+    "no": "item_number",
+    "itemid": "item_number",
+    "item_id": "item_number",
+    "condition": "condition",
+    "new_or_used": "condition",
+    "currency": "currency",
+    "currency_code": "currency",
+    "avg_price": "avg_price",
+    "avgprice": "avg_price",
+    "min_price": "min_price",
+    "minprice": "min_price",
+    "max_price": "max_price",
+    "maxprice": "max_price",
+    "qty_avg_price": "qty_avg_price",
+    "qtyavgprice": "qty_avg_price",
+    "times_sold": "times_sold",
+    "timessold": "times_sold",
+    "unit_quantity": "times_sold",
+    "unitquantity": "times_sold",
+    "total_quantity": "total_quantity",
+    "totalquantity": "total_quantity",
+}
+
+PRICE_COLUMNS = ("avg_price", "min_price", "max_price", "qty_avg_price")
+COUNT_COLUMNS = ("times_sold", "total_quantity")
+
+UPSERT_SQL = """
+    INSERT INTO price_guide (
+        item_type, item_number, condition, currency, avg_price, min_price,
+        max_price, qty_avg_price, times_sold, total_quantity, updated_at
+    ) VALUES (
+        :item_type, :item_number, :condition, :currency, :avg_price, :min_price,
+        :max_price, :qty_avg_price, :times_sold, :total_quantity, :updated_at
+    )
+    ON CONFLICT (item_type, item_number, condition, currency) DO UPDATE SET
+        avg_price = excluded.avg_price,
+        min_price = excluded.min_price,
+        max_price = excluded.max_price,
+        qty_avg_price = excluded.qty_avg_price,
+        times_sold = excluded.times_sold,
+        total_quantity = excluded.total_quantity,
+        updated_at = excluded.updated_at
+"""
+
+# Write-through from a valuation only knows some of the columns; keep the
+# imported values for the rest instead of nulling them
+MERGE_SQL = """
+    INSERT INTO price_guide (
+        item_type, item_number, condition, currency, avg_price, min_price,
+        max_price, qty_avg_price, times_sold, total_quantity, updated_at
+    ) VALUES (
+        :item_type, :item_number, :condition, :currency, :avg_price, :min_price,
+        :max_price, :qty_avg_price, :times_sold, :total_quantity, :updated_at
+    )
+    ON CONFLICT (item_type, item_number, condition, currency) DO UPDATE SET
+        avg_price = COALESCE(excluded.avg_price, price_guide.avg_price),
+        min_price = COALESCE(excluded.min_price, price_guide.min_price),
+        max_price = COALESCE(excluded.max_price, price_guide.max_price),
+        qty_avg_price = COALESCE(excluded.qty_avg_price, price_guide.qty_avg_price),
+        times_sold = COALESCE(excluded.times_sold, price_guide.times_sold),
+        total_quantity = COALESCE(excluded.total_quantity, price_guide.total_quantity),
+        updated_at = excluded.updated_at
+"""
+
+
+@dataclass
+class ImportStats:
+    """Outcome of a price-guide import"""
+
+    imported: int = 0
+    skipped: int = 0
+
+
+def _item_key(item_type: str, item_number: str) -> str:
+    # BrickLink set numbers carry a variant suffix, same as BrickLinkClient
+    if item_type == "SET" and "-" not in item_number:
+        return f"{item_number}-1"
+    return item_number
+
+
+def _availability(times_sold: Optional[int]) -> str:
+    # Same bands as BrickLinkClient._determine_availability
+    times_sold = times_sold or 0
+    if times_sold == 0:
+        return "very_rare"
+    elif times_sold < 10:
+        return "rare"
+    elif times_sold < 50:
+        return "uncommon"
+    return "common"
+
+
+class PriceTable:
+    """Local price_guide table stored next to minifigures in the minifigure database"""
+
+    def __init__(
+        self,
+        db_path: str = "data/minifigure_database.db",
+        max_age_hours: Optional[int] = None,
+    ):
+        self.db_path = db_path
+        self.max_age = timedelta(
+            hours=max_age_hours or settings.price_table_max_age_hours
+        )
+        self._local = threading.local()
+
+    def _reader(self) -> Optional[sqlite3.Connection]:
+        """Per-thread read-only connection; None if the database does not exist"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            try:
+                conn = sqlite3.connect(
+                    f"file:{Path(self.db_path).as_posix()}?mode=ro", uri=True
+                )
+            except sqlite3.OperationalError:
+                return None
+            self._local.conn = conn
+        return conn
+
+    def create_table(self, conn: sqlite3.Connection):
+        # The composite primary key is the lookup index; WITHOUT ROWID keeps rows clustered on it
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS price_guide (
+                item_type TEXT NOT NULL,
+                item_number TEXT NOT NULL,
+                condition TEXT NOT NULL,
+                currency TEXT NOT NULL DEFAULT 'USD',
+                avg_price REAL,
+                min_price REAL,
+                max_price REAL,
+                qty_avg_price REAL,
+                times_sold INTEGER,
+                total_quantity INTEGER,
+                updated_at TIMESTAMP NOT NULL,
+                PRIMARY KEY (item_type, item_number, condition, currency)
+            ) WITHOUT ROWID
+        """
+        )
+
+    def lookup(
+        self,
+        item_type: str,
+        item_number: str,
+        condition: str,
+        currency: str = "USD",
+        include_stale: bool = False,
+    ) -> Optional[Dict[str, Any]]:
+        """Get a price row, or None if missing, stale or the table has not been imported"""
+        conn = self._reader()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                """
+                SELECT avg_price, min_price, max_price, qty_avg_price,
+                       times_sold, total_quantity, updated_at
+                FROM price_guide
+                WHERE item_type = ? AND item_number = ? AND condition = ? AND currency = ?
+                """,
+                (item_type, _item_key(item_type, item_number), condition, currency),
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return None  # No price_guide table yet
+
+        if row is None:
+            return None
+        updated_at = datetime.fromisoformat(row[6])
+        if not include_stale and datetime.utcnow() - updated_at > self.max_age:
+            return None
+
+        return {
+            "avg_price": row[0],
+            "min_price": row[1],
+            "max_price": row[2],
+            "qty_avg_price": row[3],
+            "times_sold": row[4],
+            "total_quantity": row[5],
+            "updated_at": updated_at,
+        }
+
+    def get_market_data(
+        self, item_type: str, item_number: str, condition: str
+    ) -> Optional[MarketData]:
+        """Fresh USD price as MarketData, shaped like BrickLinkClient.get_price_guide"""
+        row = self.lookup(item_type, item_number, condition)
+        record_cache("price_table", row is not None and row["avg_price"] is not None)
+        if row is None or row["avg_price"] is None:
+            return None
+        return MarketData(
+            current_price=row["avg_price"],
+            avg_price_6m=row["avg_price"],
+            times_sold=row["times_sold"],
+            availability=_availability(row["times_sold"]),
+        )
+
+    def get_detailed_pricing(
+        self, item_type: str, item_number: str
+    ) -> Optional[DetailedPricing]:
+        """New/used USD and EUR pricing; None unless both USD conditions are fresh"""
+        new_usd = self.lookup(item_type, item_number, "N", "USD")
+        used_usd = self.lookup(item_type, item_number, "U", "USD")
+        if new_usd is None or used_usd is None:
+            return None
+
+        new_eur = self.lookup(item_type, item_number, "N", "EUR") or {}
+        used_eur = self.lookup(item_type, item_number, "U", "EUR") or {}
+        return estimate_other_conditions(
+            DetailedPricing(
+                sealed_new_usd=new_usd["avg_price"],
+                used_complete_usd=used_usd["avg_price"],
+                sealed_new_eur=new_eur.get("avg_price"),
+                used_complete_eur=used_eur.get("avg_price"),
+            )
+        )
+
+    def upsert(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        create: bool = True,
+        batch_size: int = 1000,
+        merge: bool = False,
+    ) -> int:
+        """Insert or replace price rows in batches; returns the number written.
+
+        With create=False nothing is written unless the table already exists,
+        so write-through from valuations only happens once an import has run.
+        With merge=True, None values leave the existing column untouched.
+        """
+        sql = MERGE_SQL if merge else UPSERT_SQL
+        db_file = Path(self.db_path)
+        if not create and not db_file.exists():
+            return 0
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path)
+        written = 0
+        try:
+            if create:
+                self.create_table(conn)
+            batch: List[Dict[str, Any]] = []
+            with conn:
+                for row in rows:
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        conn.executemany(sql, batch)
+                        written += len(batch)
+                        batch = []
+                if batch:
+                    conn.executemany(sql, batch)
+                    written += len(batch)
+        except sqlite3.OperationalError as e:
+            if create:
+                raise
+            logger.debug(f"Price table not written: {e}")
+            return 0
+        finally:
+            conn.close()
+        return written
+
+    def store_market_data(
+        self, item_type: str, item_number: str, condition: str, market_data: MarketData
+    ):
+        """Write an API result through to the table if it has been set up"""
+        if market_data.current_price is None:
+            return
+        self.upsert(
+            [
+                {
+                    "item_type": item_type,
+                    "item_number": _item_key(item_type, item_number),
+                    "condition": condition,
+                    "currency": "USD",
+                    "avg_price": market_data.current_price,
+                    "min_price": None,
+                    "max_price": None,
+                    "qty_avg_price": None,
+                    "times_sold": market_data.times_sold,
+                    "total_quantity": None,
+                    "updated_at": datetime.utcnow().isoformat(sep=" "),
+                }
+            ],
+            create=False,
+            merge=True,
+        )
+
+    def import_file(
+        self, path: str, default_condition: Optional[str] = None
+    ) -> ImportStats:
+        """Import a CSV or BrickLink XML price-guide export"""
+        suffix = Path(path).suffix.lower()
+        if suffix == ".xml":
+            records = self._iter_xml(path)
+        elif suffix in (".csv", ".tsv", ".txt"):
+            records = self._iter_csv(path)
+        else:
+            raise ValueError(f"Unsupported price guide format: {suffix}")
+
+        stats = ImportStats()
+        imported_at = datetime.utcnow().isoformat(sep=" ")
+
+        def normalised_rows() -> Iterator[Dict[str, Any]]:
+            for record in records:
+                row = self._normalise(record, default_condition, imported_at)
+                if row is None:
+                    stats.skipped += 1
+                    continue
+                yield row
+
+        stats.imported = self.upsert(normalised_rows())
+        logger.info(
+            f"Imported {stats.imported} price rows from {path} ({stats.skipped} skipped)"
+        )
+        return stats
+
+    def count(self) -> int:
+        conn = self._reader()
+        if conn is None:
+            return 0
+        try:
+            return conn.execute("SELECT COUNT(*) FROM price_guide").fetchone()[0]
+        except sqlite3.OperationalError:
+            return 0
+
+    def _iter_csv(self, path: str) -> Iterator[Dict[str, str]]:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            sample = f.read(4096)
+            f.seek(0)
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            yield from csv.DictReader(f, dialect=dialect)
+
+    def _iter_xml(self, path: str) -> Iterator[Dict[str, str]]:
+        # iterparse keeps memory flat on multi-megabyte exports
+        for _, elem in ET.iterparse(path, events=("end",)):
+            if elem.tag.upper() == "ITEM":
+                yield {child.tag: (child.text or "").strip() for child in elem}
+                elem.clear()
+
+    def _normalise(
+        self, record: Dict[str, str], default_condition: Optional[str], imported_at: str
+    ) -> Optional[Dict[str, Any]]:
+        values: Dict[str, str] = {}
+        for key, value in record.items():
+            if key is None:
+                continue
+            column = COLUMN_ALIASES.get(key.strip().lower().replace(" ", "_"))
+            if column and value not in (None, ""):
+                values[column] = value.strip()
+
+        item_number = values.get("item_number")
+        item_type = values.get("item_type", "MINIFIG").upper()
+        item_type = ITEM_TYPE_CODES.get(item_type, item_type)
+        condition = (values.get("condition") or default_condition or "").upper()[:1]
+        if not item_number or condition not in ("N", "U"):
+            return None
+
+        row: Dict[str, Any] = {
+            "item_type": item_type,
+            "item_number": _item_key(item_type, item_number),
+            "condition": condition,
+            "currency": values.get("currency", "USD").upper(),
+            "updated_at": imported_at,
+        }
+        try:
+            for column in PRICE_COLUMNS:
+                row[column] = (
+                    float(values[column].lstrip("$€")) if column in values else None
+                )
+            for column in COUNT_COLUMNS:
+                row[column] = int(float(values[column])) if column in values else None
+        except ValueError:
+            return None
+        if row["avg_price"] is None:
+            return None
+        return row
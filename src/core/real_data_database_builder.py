@@ -9,13 +9,11 @@ import sqlite3
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import requests
+from functools import cached_property
 import hashlib
 from dataclasses import dataclass
 import logging
 
-from config.settings import settings
-from src.external.bricklink_client import BrickLinkClient
 from src.core.curated_minifigure_data import get_curated_minifigures_dict
 
 logger = logging.getLogger(__name__)
@@ -42,11 +40,21 @@ class RealDataDatabaseBuilder:
         self.db_path = db_path
         self.images_dir = Path("data/minifigure_images")
         self.images_dir.mkdir(parents=True, exist_ok=True)
-        self.bricklink_client = BrickLinkClient()
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'LEGO-Valuation-System/1.0'
-        })
+
+    @cached_property
+    def bricklink_client(self):
+        # Only building the database talks to BrickLink; counts and searches are local
+        from src.external.bricklink_client import BrickLinkClient
+
+        return BrickLinkClient()
+
+    @cached_property
+    def session(self):
+        import requests
+
+        session = requests.Session()
+        session.headers.update({"User-Agent": "LEGO-Valuation-System/1.0"})
+        return session
         
     def initialize_database(self):
         """Initialize the minifigure database with proper schema"""
@@ -89,6 +97,14 @@ class RealDataDatabaseBuilder:
         conn.close()
         return count
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Minifigure count and where the database and images live"""
+        return {
+            "total_minifigures": self.get_minifigure_count(),
+            "database_path": self.db_path,
+            "images_directory": str(self.images_dir),
+        }
+
     def search_minifigures(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Search minifigures by name or theme"""
         conn = sqlite3.connect(self.db_path)
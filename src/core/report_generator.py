@@ -6,6 +6,7 @@ from pathlib import Path
 from datetime import datetime
 import tempfile
 
+from src.utils.metrics import REPORT_RENDER_SECONDS
 from src.utils.minifigure_images import MinifigureImageService
 
 try:
@@ -122,6 +123,7 @@ class ReportGenerator:
 
         return str(file_path)
 
+    @REPORT_RENDER_SECONDS.time(format="html")
     def generate_html(self, report: ValuationReport) -> str:
         """Generate HTML report"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -138,6 +140,7 @@ class ReportGenerator:
 
         return str(file_path)
 
+    @REPORT_RENDER_SECONDS.time(format="pdf")
     def generate_pdf(self, report: ValuationReport) -> str:
         """Generate comprehensive PDF report with detailed pricing and image"""
         if not REPORTLAB_AVAILABLE:
@@ -180,27 +183,20 @@ class ReportGenerator:
                 
                 # Resize image to fit nicely in report with better proportions
                 img = RLImage(report.image_path)
-                # Calculate aspect ratio to maintain proportions
-                try:
-                    from PIL import Image
-                    pil_img = Image.open(report.image_path)
-                    aspect_ratio = pil_img.width / pil_img.height
-                    
-                    # Set max dimensions
-                    max_width = 5*inch
-                    max_height = 3.5*inch
-                    
-                    if aspect_ratio > 1:  # Landscape
-                        img.drawWidth = max_width
-                        img.drawHeight = max_width / aspect_ratio
-                    else:  # Portrait or square
-                        img.drawHeight = max_height
-                        img.drawWidth = max_height * aspect_ratio
-                        
-                except ImportError:
-                    # Fallback if PIL not available
-                    img.drawHeight = 3*inch
-                    img.drawWidth = 4*inch
+                # Calculate aspect ratio to maintain proportions; reportlab
+                # has already read the dimensions from the image header
+                aspect_ratio = img.imageWidth / img.imageHeight
+
+                # Set max dimensions
+                max_width = 5 * inch
+                max_height = 3.5 * inch
+
+                if aspect_ratio > 1:  # Landscape
+                    img.drawWidth = max_width
+                    img.drawHeight = max_width / aspect_ratio
+                else:  # Portrait or square
+                    img.drawHeight = max_height
+                    img.drawWidth = max_height * aspect_ratio
                 
                 story.append(img)
                 story.append(Spacer(1, 30))
@@ -0,0 +1,270 @@
+"""
+Staged Pipeline Executor
+Runs items through a chain of stages, each with its own bounded queue, worker
+count and executor (event loop, thread pool or process pool)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from src.utils.metrics import PIPELINE_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Where a stage's function runs
+EXECUTOR_ASYNC = "async"  # Coroutine on the event loop (API-bound work)
+EXECUTOR_THREAD = "thread"  # Stage thread pool (blocking I/O, rendering)
+EXECUTOR_PROCESS = (
+    "process"  # Stage process pool (CPU-bound; fn and its input must pickle)
+)
+
+
+@dataclass
+class Stage:
+    """One step of a staged pipeline.
+
+    fn receives select(item) (the item itself by default) and its result is
+    folded back with apply(item, result) (replacing the item by default).
+    Items for which when(item) is false pass through untouched.
+
+    Process stages run in spawned processes that start without the parent's
+    state; initializer (a module-level function) runs once in each of them to
+    load what fn needs.
+    """
+
+    name: str
+    fn: Callable
+    workers: int = 1
+    executor: str = EXECUTOR_ASYNC
+    queue_size: Optional[int] = None  # Defaults to twice the worker count
+    select: Optional[Callable[[Any], Any]] = None
+    apply: Optional[Callable[[Any, Any], Any]] = None
+    when: Optional[Callable[[Any], bool]] = None
+    initializer: Optional[Callable[[], Any]] = None
+
+
+@dataclass
+class StageStats:
+    """Counters for one stage; latency is time spent in fn, wait is time queued"""
+
+    name: str
+    workers: int
+    queue_size: int
+    queue_depth: int = 0
+    in_flight: int = 0
+    processed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    busy_seconds: float = 0.0
+    max_seconds: float = 0.0
+    wait_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        done = self.processed + self.failed
+        return self.busy_seconds / done if done else 0.0
+
+    @property
+    def mean_wait_seconds(self) -> float:
+        done = self.processed + self.failed + self.skipped
+        return self.wait_seconds / done if done else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "processed": self.processed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "mean_seconds": round(self.mean_seconds, 4),
+            "max_seconds": round(self.max_seconds, 4),
+            "mean_wait_seconds": round(self.mean_wait_seconds, 4),
+        }
+
+
+@dataclass
+class _Envelope:
+    item: Any
+    future: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class StagedPipeline:
+    """Bounded queues between stages give backpressure: when a stage falls
+    behind, its queue fills, the stage before it blocks handing items on, and
+    eventually submit() blocks. Throughput is set by the slowest stage rather
+    than by the slowest item.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self._queues: List[asyncio.Queue] = []
+        self._executors: List[Optional[Executor]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._stats = [
+            StageStats(stage.name, stage.workers, stage.queue_size or stage.workers * 2)
+            for stage in stages
+        ]
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Create the stage queues, executors and workers on the running event loop"""
+        if self.running:
+            return
+        self._queues = [
+            asyncio.Queue(maxsize=stats.queue_size) for stats in self._stats
+        ]
+        if not self._executors:
+            self._executors = [self._create_executor(stage) for stage in self.stages]
+        self._tasks = [
+            asyncio.create_task(self._worker(index))
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.workers)
+        ]
+
+    def warm_up(self) -> Dict[str, List[Any]]:
+        """Start the process pools now, ahead of the first item (call before start()).
+
+        Submits each process stage's initializer once per worker, which
+        spawns the pool's processes (each running the initializer as it
+        starts). Returns stage name -> initializer results. Blocks, so call
+        it from a thread or before the event loop starts.
+        """
+        if not self._executors:
+            self._executors = [self._create_executor(stage) for stage in self.stages]
+        futures = {
+            stage.name: [
+                executor.submit(stage.initializer) for _ in range(stage.workers)
+            ]
+            for stage, executor in zip(self.stages, self._executors)
+            if stage.executor == EXECUTOR_PROCESS and stage.initializer is not None
+        }
+        return {
+            name: [future.result() for future in pending]
+            for name, pending in futures.items()
+        }
+
+    async def stop(self):
+        """Cancel the stage workers and shut the executors down.
+
+        Items still in the pipeline fail with CancelledError.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for queue in self._queues:
+            while not queue.empty():
+                envelope = queue.get_nowait()
+                if not envelope.future.done():
+                    envelope.future.cancel()
+        for executor in self._executors:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executors = []
+
+    async def submit(self, item: Any) -> Any:
+        """Run item through every stage and return the final item.
+
+        Waits for room in the first stage's queue, and raises the exception
+        of the first stage that fails.
+        """
+        if not self.running:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[0].put(_Envelope(item, future))
+        return await future
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-stage queue depth, concurrency and latency"""
+        for stats, queue in zip(self._stats, self._queues):
+            stats.queue_depth = queue.qsize()
+        return [stats.to_dict() for stats in self._stats]
+
+    def _create_executor(self, stage: Stage) -> Optional[Executor]:
+        if stage.executor == EXECUTOR_THREAD:
+            return ThreadPoolExecutor(
+                max_workers=stage.workers, thread_name_prefix=f"stage-{stage.name}"
+            )
+        if stage.executor == EXECUTOR_PROCESS:
+            # Spawn rather than fork: the parent runs thread pools and database
+            # connections, and a child forked while another thread holds a lock
+            # can deadlock (Python 3.12+ warns about it). Spawned children start
+            # clean, so the stage's initializer loads their state instead.
+            return ProcessPoolExecutor(
+                max_workers=stage.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=stage.initializer,
+            )
+        if stage.executor != EXECUTOR_ASYNC:
+            raise ValueError(
+                f"Unknown executor for stage {stage.name}: {stage.executor}"
+            )
+        return None
+
+    async def _worker(self, index: int):
+        queue = self._queues[index]
+
+        while True:
+            envelope = await queue.get()
+            try:
+                await self._process(index, envelope)
+            except asyncio.CancelledError:
+                envelope.future.cancel()
+                raise
+
+    async def _process(self, index: int, envelope: _Envelope):
+        stage, stats = self.stages[index], self._stats[index]
+        executor = self._executors[index]
+        stats.wait_seconds += time.monotonic() - envelope.queued_at
+        if envelope.future.done():  # Submitter gave up
+            return
+
+        if stage.when is not None and not stage.when(envelope.item):
+            stats.skipped += 1
+        else:
+            stats.in_flight += 1
+            started = time.monotonic()
+            try:
+                argument = (
+                    stage.select(envelope.item) if stage.select else envelope.item
+                )
+                if executor is None:
+                    result = await stage.fn(argument)
+                else:
+                    result = await asyncio.get_running_loop().run_in_executor(
+                        executor, stage.fn, argument
+                    )
+                envelope.item = (
+                    stage.apply(envelope.item, result) if stage.apply else result
+                )
+                stats.processed += 1
+            except Exception as e:
+                stats.failed += 1
+                envelope.future.set_exception(e)
+                return
+            finally:
+                elapsed = time.monotonic() - started
+                stats.in_flight -= 1
+                stats.busy_seconds += elapsed
+                stats.max_seconds = max(stats.max_seconds, elapsed)
+                PIPELINE_STAGE_SECONDS.observe(elapsed, stage=stage.name)
+
+        if index == len(self.stages) - 1:
+            envelope.future.set_result(envelope.item)
+        else:
+            envelope.queued_at = time.monotonic()
+            await self._queues[index + 1].put(envelope)
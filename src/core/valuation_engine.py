@@ -15,11 +15,13 @@ from src.models.schemas import (
     DetailedPricing,
 )
 from src.external.bricklink_client import BrickLinkClient
+from src.core.price_table import PriceTable
 
 
 class ValuationEngine:
     def __init__(self):
         self.bricklink_client = BrickLinkClient()
+        self.price_table = PriceTable()
 
     async def evaluate_item(
         self, identification: IdentificationResult
@@ -107,10 +109,21 @@ class ValuationEngine:
         # Determine condition code
         condition_code = "N" if item.condition == ItemCondition.NEW else "U"
 
-        # Get price guide from BrickLink
+        # Imported price guides answer most items without a network round trip
+        market_data = self.price_table.get_market_data(
+            bl_item_type, item.item_number, condition_code
+        )
+        if market_data:
+            return market_data
+
+        # Missing or stale locally - get price guide from BrickLink
         market_data = self.bricklink_client.get_price_guide(
             bl_item_type, item.item_number, condition_code
         )
+        if market_data:
+            self.price_table.store_market_data(
+                bl_item_type, item.item_number, condition_code, market_data
+            )
 
         return market_data or MarketData()
 
@@ -126,7 +139,9 @@ class ValuationEngine:
         detailed_pricing = None
         if item.item_number:
             bl_item_type = "MINIFIG" if item.item_type == ItemType.MINIFIGURE else "SET"
-            detailed_pricing = self.bricklink_client.get_detailed_pricing(
+            detailed_pricing = self.price_table.get_detailed_pricing(
+                bl_item_type, item.item_number
+            ) or self.bricklink_client.get_detailed_pricing(
                 bl_item_type, item.item_number
             )
         
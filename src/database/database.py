@@ -1,30 +1,185 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, QueuePool, StaticPool
 from contextlib import contextmanager
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
+
+try:
+    from sqlalchemy.ext.asyncio import (
+        AsyncEngine,
+        AsyncSession,
+        async_sessionmaker,
+        create_async_engine,
+    )
+
+    ASYNC_DB_AVAILABLE = True
+except ImportError:
+    ASYNC_DB_AVAILABLE = False
 
 from config.settings import settings
+from src.utils import json_utils
 from .models import Base
+from .migrations import drop_migrations_table, run_migrations
+
+
+def _is_sqlite_memory(url) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite tuning for concurrent readers and a single writer"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.sqlite_busy_timeout_ms}")
+    cursor.execute(f"PRAGMA mmap_size={settings.sqlite_mmap_size}")
+    cursor.close()
+
+
+# JSON columns are encoded with orjson when it is installed
+JSON_CODEC = {
+    "json_serializer": json_utils.dumps,
+    "json_deserializer": json_utils.loads,
+}
+
+
+def create_database_engine(database_url: str, echo: bool = False) -> Engine:
+    """Create an engine with a connection pool suited to the backend.
+
+    In-memory SQLite keeps a single shared connection (StaticPool), since
+    each new connection would otherwise see an empty database. File-based
+    SQLite gets a QueuePool of WAL-mode connections, and other backends get
+    a sized pool with pre-ping and recycling.
+    """
+    url = make_url(database_url)
+
+    if url.get_backend_name() == "sqlite":
+        if _is_sqlite_memory(url):
+            return create_engine(
+                database_url,
+                poolclass=StaticPool,
+                connect_args={"check_same_thread": False},
+                echo=echo,
+                **JSON_CODEC,
+            )
+
+        sqlite_engine = create_engine(
+            database_url,
+            poolclass=QueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            connect_args={
+                "check_same_thread": False,
+                "timeout": settings.sqlite_busy_timeout_ms / 1000,
+            },
+            echo=echo,
+            **JSON_CODEC,
+        )
+        event.listen(sqlite_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
+    return create_engine(
+        database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        echo=echo,
+        **JSON_CODEC,
+    )
+
+
+# Sync driver -> async driver for the AsyncSession path
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync database URL onto its async driver (aiosqlite/asyncpg)"""
+    url = make_url(database_url)
+    if url.get_driver_name() in ("aiosqlite", "asyncpg"):
+        return database_url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+def create_async_database_engine(
+    database_url: str, echo: bool = False
+) -> "AsyncEngine":
+    """Async counterpart of create_database_engine with the same pooling rules"""
+    async_url = get_async_database_url(database_url)
+    url = make_url(async_url)
+
+    if url.get_backend_name() == "sqlite":
+        if _is_sqlite_memory(url):
+            return create_async_engine(
+                async_url, poolclass=StaticPool, echo=echo, **JSON_CODEC
+            )
+
+        # aiosqlite runs each connection on a non-daemon thread, so pooled
+        # connections would keep the process alive; SQLite connects are cheap
+        async_engine = create_async_engine(
+            async_url,
+            poolclass=NullPool,
+            connect_args={"timeout": settings.sqlite_busy_timeout_ms / 1000},
+            echo=echo,
+            **JSON_CODEC,
+        )
+        event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return async_engine
+
+    return create_async_engine(
+        async_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        echo=echo,
+        **JSON_CODEC,
+    )
 
 
 # Create database engine
-engine = create_engine(
-    settings.database_url,
-    poolclass=StaticPool,
-    connect_args=(
-        {"check_same_thread": False} if "sqlite" in settings.database_url else {}
-    ),
-    echo=settings.debug,
-)
+engine = create_database_engine(settings.database_url, echo=settings.debug)
+
+# Async engine is created on first use so the async driver stays optional
+_async_engine: Optional["AsyncEngine"] = None
+_async_session_factory = None
+
+
+def get_async_session_factory():
+    """Get the async session factory, creating the async engine if needed"""
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        if not ASYNC_DB_AVAILABLE:
+            raise RuntimeError("SQLAlchemy asyncio support is not installed")
+        _async_engine = create_async_database_engine(
+            settings.database_url, echo=settings.debug
+        )
+        _async_session_factory = async_sessionmaker(
+            _async_engine, expire_on_commit=False, autoflush=False
+        )
+    return _async_session_factory
+
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 def create_tables():
-    """Create all database tables"""
+    """Create all database tables and apply pending migrations"""
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -36,6 +191,21 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def dispose_async_engine():
+    """Close pooled async connections (application shutdown)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
+
+async def get_async_db() -> AsyncGenerator["AsyncSession", None]:
+    """Async database session dependency for read-heavy FastAPI endpoints"""
+    async with get_async_session_factory()() as db:
+        yield db
+
+
 @contextmanager
 def get_db_session() -> Generator[Session, None, None]:
     """Context manager for database sessions"""
@@ -56,14 +226,7 @@ class DatabaseManager:
     def __init__(self, database_url: str = None):
         if database_url:
             # Create custom engine for testing
-            self.engine = create_engine(
-                database_url,
-                poolclass=StaticPool,
-                connect_args=(
-                    {"check_same_thread": False} if "sqlite" in database_url else {}
-                ),
-                echo=False,
-            )
+            self.engine = create_database_engine(database_url)
             self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
         else:
             # Use global engine
@@ -71,8 +234,9 @@ class DatabaseManager:
             self.Session = SessionLocal
 
     def init_db(self):
-        """Initialize database with tables"""
+        """Initialize database with tables and apply pending migrations"""
         Base.metadata.create_all(bind=self.engine)
+        run_migrations(self.engine)
 
     def initialize_database(self):
         """Initialize database with tables (alias for init_db)"""
@@ -81,7 +245,8 @@ class DatabaseManager:
     def reset_database(self):
         """Drop and recreate all tables (use with caution!)"""
         Base.metadata.drop_all(bind=self.engine)
-        Base.metadata.create_all(bind=self.engine)
+        drop_migrations_table(self.engine)
+        self.init_db()
 
     def get_session(self) -> Session:
         """Get a new database session"""
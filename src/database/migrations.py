@@ -0,0 +1,421 @@
+"""
+Built-in Schema Migrator
+Applies numbered schema changes to existing databases and records them in schema_migrations
+"""
+
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, List, Union
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .models import TableVersion, ValuationItem, ValuationJob, ValuationRecord
+
+logger = logging.getLogger(__name__)
+
+MigrationStep = Union[str, Callable[[Connection], None]]
+
+
+@dataclass
+class Migration:
+    """A numbered schema change: SQL statements and/or callables run in one transaction"""
+
+    version: int
+    name: str
+    steps: List[MigrationStep] = field(default_factory=list)
+
+
+def _identified_items(column: str, field: str) -> str:
+    """SQLite expression joining one field of every identified item in a JSON column"""
+    return (
+        f"(SELECT group_concat(json_extract(value, '$.{field}'), ' ') FROM json_each("
+        f"CASE WHEN json_valid({column}) THEN {column} ELSE '{{}}' END, '$.identified_items'))"
+    )
+
+
+def _search_row(prefix: str) -> str:
+    return ", ".join(
+        [
+            f"{prefix}id",
+            _identified_items(f"{prefix}identification_data", "name"),
+            _identified_items(f"{prefix}identification_data", "item_number"),
+            _identified_items(f"{prefix}identification_data", "theme"),
+            f"{prefix}reasoning",
+            f"{prefix}notes",
+        ]
+    )
+
+
+SEARCH_INSERT = "INSERT INTO valuation_search (rowid, item_names, item_numbers, themes, reasoning, notes) "
+
+
+def create_valuation_search(conn: Connection):
+    """Full-text index over valuation text and identified item names, numbers and themes.
+
+    SQLite gets an FTS5 table kept in sync by triggers; PostgreSQL a generated,
+    weighted tsvector column with a GIN index. Other backends keep LIKE search.
+    """
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        # Rebuilt from scratch so a reset database does not keep stale rows
+        conn.execute(text("DROP TABLE IF EXISTS valuation_search"))
+        conn.execute(
+            text(
+                "CREATE VIRTUAL TABLE valuation_search USING fts5("
+                "item_names, item_numbers, themes, reasoning, notes, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        )
+        conn.execute(
+            text(
+                f"""
+            CREATE TRIGGER IF NOT EXISTS valuation_search_insert
+            AFTER INSERT ON valuation_records BEGIN
+                {SEARCH_INSERT} SELECT {_search_row("new.")};
+            END
+        """
+            )
+        )
+        conn.execute(
+            text(
+                f"""
+            CREATE TRIGGER IF NOT EXISTS valuation_search_update
+            AFTER UPDATE OF identification_data, reasoning, notes ON valuation_records BEGIN
+                DELETE FROM valuation_search WHERE rowid = old.id;
+                {SEARCH_INSERT} SELECT {_search_row("new.")};
+            END
+        """
+            )
+        )
+        conn.execute(
+            text(
+                """
+            CREATE TRIGGER IF NOT EXISTS valuation_search_delete
+            AFTER DELETE ON valuation_records BEGIN
+                DELETE FROM valuation_search WHERE rowid = old.id;
+            END
+        """
+            )
+        )
+        conn.execute(
+            text(f"{SEARCH_INSERT} SELECT {_search_row('')} FROM valuation_records")
+        )
+    elif dialect == "postgresql":
+        items = "identification_data::jsonb"
+        conn.execute(
+            text(
+                f"""
+            ALTER TABLE valuation_records ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(jsonb_path_query_array({items}, '$.identified_items[*].name')::text, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(jsonb_path_query_array({items}, '$.identified_items[*].item_number')::text, '')), 'A')
+                || setweight(to_tsvector('simple', coalesce(jsonb_path_query_array({items}, '$.identified_items[*].theme')::text, '')), 'B')
+                || setweight(to_tsvector('simple', coalesce(notes, '')), 'C')
+                || setweight(to_tsvector('simple', coalesce(reasoning, '')), 'D')
+            ) STORED
+        """
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_valuation_records_search_vector "
+                "ON valuation_records USING GIN (search_vector)"
+            )
+        )
+    else:
+        logger.info(f"No full-text index for {dialect}; valuation search uses LIKE")
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+ITEM_FIELDS = (
+    "item_number",
+    "name",
+    "item_type",
+    "condition",
+    "year_released",
+    "theme",
+    "category",
+    "pieces",
+)
+
+
+def backfill_valuation_items(conn: Connection):
+    """Copy identified items out of identification_data for records saved before valuation_items.
+
+    Individual valuations were never persisted, so only the item columns are filled.
+    """
+    ValuationItem.__table__.create(conn, checkfirst=True)
+    insert = text(
+        "INSERT INTO valuation_items (valuation_record_id, position, created_at, "
+        + ", ".join(ITEM_FIELDS)
+        + ") VALUES (:valuation_record_id, :position, :created_at, "
+        + ", ".join(f":{field}" for field in ITEM_FIELDS)
+        + ")"
+    )
+    records = conn.execute(
+        text(
+            "SELECT id, identification_data, created_at FROM valuation_records "
+            "WHERE id NOT IN (SELECT valuation_record_id FROM valuation_items)"
+        )
+    )
+
+    batch, backfilled = [], 0
+    for record_id, identification_data, created_at in records:
+        try:
+            data = (
+                json.loads(identification_data)
+                if isinstance(identification_data, str)
+                else identification_data
+            )
+            items = data.get("identified_items") or []
+        except (ValueError, AttributeError):
+            continue  # Unparseable or non-object JSON: nothing to extract
+
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            batch.append(
+                {
+                    "valuation_record_id": record_id,
+                    "position": position,
+                    "created_at": created_at,
+                    **{field: item.get(field) for field in ITEM_FIELDS},
+                }
+            )
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            conn.execute(insert, batch)
+            backfilled += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert, batch)
+        backfilled += len(batch)
+    logger.info(f"Backfilled {backfilled} valuation items")
+
+
+def _add_missing_columns(conn: Connection, table, names: List[str]):
+    """ALTER TABLE ADD COLUMN for each of names missing from table (a model's __table__)"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name in existing:
+            continue
+        column_type = table.c[name].type.compile(dialect=conn.dialect)
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+        logger.info(f"Added {table.name}.{name}")
+
+
+def add_report_blob_columns(conn: Connection):
+    """Add the materialised report columns to valuation_records created before them.
+
+    Existing rows keep NULL blobs; readers rebuild those reports from the row.
+    """
+    _add_missing_columns(
+        conn, ValuationRecord.__table__, ["report_blob", "report_schema_version"]
+    )
+
+
+def add_job_batch_columns(conn: Connection):
+    """Add the batch and content hash columns to valuation_jobs created before them"""
+    _add_missing_columns(conn, ValuationJob.__table__, ["batch_id", "content_hash"])
+
+
+# Tables whose API responses are validated by change counter (weak ETags)
+VERSIONED_TABLES = ("inventory_items",)
+
+
+def create_table_versions(conn: Connection):
+    """Change counters for VERSIONED_TABLES, bumped by a trigger on every insert, update and delete.
+
+    Triggers see every write, including bulk updates and other processes.
+    Counters start from the current time, so a rebuilt database never
+    repeats a version (and ETag) an old client might still hold. Backends
+    other than SQLite and PostgreSQL get no counters; readers then fall back
+    to hashing the response.
+    """
+    TableVersion.__table__.create(conn, checkfirst=True)
+    dialect = conn.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        logger.info(f"No table version triggers for {dialect}")
+        return
+
+    if dialect == "postgresql":
+        conn.execute(
+            text(
+                """
+            CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+            BEGIN
+                UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        """
+            )
+        )
+
+    for table in VERSIONED_TABLES:
+        conn.execute(
+            text(
+                "INSERT INTO table_versions (table_name, version) SELECT :table, :start "
+                "WHERE NOT EXISTS (SELECT 1 FROM table_versions WHERE table_name = :table)"
+            ),
+            {"table": table, "start": int(time.time())},
+        )
+        if dialect == "sqlite":
+            for operation in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(
+                    text(
+                        f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{operation.lower()}
+                    AFTER {operation} ON {table} BEGIN
+                        UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';
+                    END
+                """
+                    )
+                )
+        else:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {table}_version ON {table}"))
+            conn.execute(
+                text(
+                    f"CREATE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table} "
+                    "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+                )
+            )
+
+
+def require_valuation_created_at(conn: Connection):
+    """Backfill valuation_records.created_at and make it NOT NULL.
+
+    Keyset pages order and encode their cursors by created_at, so a NULL
+    there broke /valuations. Missing values fall back to the upload time,
+    then the last update, then the epoch. SQLite cannot add a constraint to
+    an existing column; the model's default covers new rows there.
+    """
+    conn.execute(
+        text(
+            "UPDATE valuation_records "
+            "SET created_at = COALESCE(upload_timestamp, updated_at, :epoch) WHERE created_at IS NULL"
+        ),
+        {"epoch": datetime(1970, 1, 1)},
+    )
+    if conn.dialect.name == "postgresql":
+        conn.execute(
+            text("ALTER TABLE valuation_records ALTER COLUMN created_at SET NOT NULL")
+        )
+
+
+# Index names match the Index() declarations in models.py, so databases created
+# by create_all already have them and these statements are no-ops there
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "hot query indexes",
+        [
+            "CREATE INDEX IF NOT EXISTS ix_valuation_records_created_at "
+            "ON valuation_records (created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_valuation_records_recommendation_created "
+            "ON valuation_records (recommendation_category, created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_valuation_records_estimated_value "
+            "ON valuation_records (estimated_value)",
+            "CREATE INDEX IF NOT EXISTS ix_inventory_items_status_created "
+            "ON inventory_items (status, created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_inventory_items_created_at "
+            "ON inventory_items (created_at)",
+            "CREATE INDEX IF NOT EXISTS ix_inventory_items_status_price_update "
+            "ON inventory_items (status, last_price_update)",
+            "CREATE INDEX IF NOT EXISTS ix_inventory_items_item_number "
+            "ON inventory_items (item_number)",
+            "CREATE INDEX IF NOT EXISTS ix_sale_records_inventory_item_id "
+            "ON sale_records (inventory_item_id)",
+            "CREATE INDEX IF NOT EXISTS ix_sale_records_sold_date "
+            "ON sale_records (sold_date)",
+        ],
+    ),
+    Migration(2, "valuation full-text search", [create_valuation_search]),
+    Migration(3, "valuation items backfill", [backfill_valuation_items]),
+    Migration(4, "materialised valuation reports", [add_report_blob_columns]),
+    Migration(
+        5,
+        "batch uploads",
+        [
+            add_job_batch_columns,
+            "CREATE INDEX IF NOT EXISTS ix_valuation_jobs_batch_id ON valuation_jobs (batch_id)",
+            "CREATE INDEX IF NOT EXISTS ix_valuation_jobs_content_hash ON valuation_jobs (content_hash)",
+        ],
+    ),
+    Migration(6, "table version counters", [create_table_versions]),
+    Migration(7, "valuation created_at required", [require_valuation_created_at]),
+]
+
+
+def _ensure_migrations_table(conn: Connection):
+    conn.execute(
+        text(
+            """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP NOT NULL
+        )
+    """
+        )
+    )
+
+
+def get_applied_versions(engine: Engine) -> List[int]:
+    """Versions already recorded in schema_migrations"""
+    with engine.begin() as conn:
+        _ensure_migrations_table(conn)
+        rows = conn.execute(
+            text("SELECT version FROM schema_migrations ORDER BY version")
+        )
+        return [row[0] for row in rows]
+
+
+def run_migrations(engine: Engine, migrations: List[Migration] = None) -> List[int]:
+    """Apply pending migrations in version order; returns the versions applied"""
+    migrations = sorted(
+        migrations if migrations is not None else MIGRATIONS, key=lambda m: m.version
+    )
+    applied = set(get_applied_versions(engine))
+    newly_applied = []
+
+    for migration in migrations:
+        if migration.version in applied:
+            continue
+
+        with engine.begin() as conn:
+            if conn.dialect.name == "sqlite":
+                # pysqlite does not open a transaction for DDL on its own, which
+                # would leave a half-applied migration behind on failure
+                conn.exec_driver_sql("BEGIN")
+            for step in migration.steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(text(step))
+            conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, name, applied_at) "
+                    "VALUES (:version, :name, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "name": migration.name,
+                    "applied_at": datetime.utcnow(),
+                },
+            )
+        logger.info(f"Applied migration {migration.version}: {migration.name}")
+        newly_applied.append(migration.version)
+
+    return newly_applied
+
+
+def drop_migrations_table(engine: Engine):
+    """Forget applied migrations (used when the schema is rebuilt from scratch)"""
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("DROP TABLE IF EXISTS valuation_search"))
@@ -1,6 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, JSON, Boolean
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Float,
+    DateTime,
+    Text,
+    JSON,
+    Boolean,
+    LargeBinary,
+    Index,
+    ForeignKey,
+)
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
 Base = declarative_base()
@@ -33,13 +45,78 @@ class ValuationRecord(Base):
 
     # Metadata
     notes = Column(Text)  # User notes
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )  # Keyset pagination key
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Status tracking
     is_archived = Column(Boolean, default=False)
     status = Column(String(50), default="pending")  # pending, reviewed, sold, archived
 
+    # Detail document rendered at write time (gzip JSON, see report_store)
+    report_blob = deferred(Column(LargeBinary))
+    report_schema_version = Column(Integer)
+
+    # Identified items, one row each (also kept in identification_data)
+    items = relationship(
+        "ValuationItem",
+        back_populates="valuation",
+        cascade="all, delete-orphan",
+        order_by="ValuationItem.position",
+    )
+
+    # Hot query access paths (added to existing databases by migration 1)
+    __table_args__ = (
+        Index("ix_valuation_records_created_at", "created_at"),
+        Index(
+            "ix_valuation_records_recommendation_created",
+            "recommendation_category",
+            "created_at",
+        ),
+        Index("ix_valuation_records_estimated_value", "estimated_value"),
+    )
+
+
+class ValuationItem(Base):
+    __tablename__ = "valuation_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    valuation_record_id = Column(
+        Integer, ForeignKey("valuation_records.id", ondelete="CASCADE"), nullable=False
+    )
+    position = Column(
+        Integer, nullable=False, default=0
+    )  # Order within identified_items
+
+    # Identified item
+    item_number = Column(String(50))
+    name = Column(String(255))
+    item_type = Column(String(50))  # minifigure, set, part
+    condition = Column(String(50))  # new, used_complete, etc.
+    year_released = Column(Integer)
+    theme = Column(String(100))
+    category = Column(String(100))
+    pieces = Column(Integer)
+
+    # Individual valuation (empty for records backfilled from identification_data)
+    estimated_value_usd = Column(Float)
+    estimated_value_eur = Column(Float)
+    valuation_confidence = Column(Float)
+    market_price = Column(Float)
+    times_sold = Column(Integer)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    valuation = relationship("ValuationRecord", back_populates="items")
+
+    __table_args__ = (
+        Index("ix_valuation_items_valuation_record_id", "valuation_record_id"),
+        Index("ix_valuation_items_item_number", "item_number"),
+        Index("ix_valuation_items_theme", "theme"),
+        Index("ix_valuation_items_year_released", "year_released"),
+    )
+
 
 class InventoryItem(Base):
     __tablename__ = "inventory_items"
@@ -78,6 +155,13 @@ class InventoryItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_inventory_items_status_created", "status", "created_at"),
+        Index("ix_inventory_items_created_at", "created_at"),
+        Index("ix_inventory_items_status_price_update", "status", "last_price_update"),
+        Index("ix_inventory_items_item_number", "item_number"),
+    )
+
 
 class SaleRecord(Base):
     __tablename__ = "sale_records"
@@ -105,3 +189,81 @@ class SaleRecord(Base):
     # Notes
     sale_notes = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_sale_records_inventory_item_id", "inventory_item_id"),
+        Index("ix_sale_records_sold_date", "sold_date"),
+    )
+
+
+class TableVersion(Base):
+    """Change counter per table, bumped by triggers on every write (see migrations)"""
+
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class ValuationBatch(Base):
+    __tablename__ = "valuation_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(500))  # Uploaded filenames or the directory processed
+    notes = Column(Text)
+
+    # Intake outcome; progress comes from the batch's jobs
+    total_files = Column(Integer, nullable=False, default=0)
+    queued_files = Column(Integer, nullable=False, default=0)
+    duplicate_files = Column(Integer, nullable=False, default=0)
+    rejected_files = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ValuationJob(Base):
+    __tablename__ = "valuation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Upload to process
+    image_path = Column(String(500), nullable=False)
+    image_filename = Column(String(255), nullable=False)
+    notes = Column(Text)
+    batch_id = Column(
+        Integer, ForeignKey("valuation_batches.id", ondelete="SET NULL"), index=True
+    )
+    content_hash = Column(
+        String(64), index=True
+    )  # SHA-256 of the uploaded image, for dedupe
+
+    # Lifecycle
+    status = Column(
+        String(20), nullable=False, default="queued"
+    )  # queued, running, succeeded, failed
+    stage = Column(String(50))  # Last pipeline stage reached
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    available_at = Column(
+        DateTime, nullable=False, default=datetime.utcnow
+    )  # Retry backoff
+
+    # Lease held by the worker running the job; expired leases are re-leased
+    lease_owner = Column(String(100))
+    lease_expires_at = Column(DateTime)
+
+    # Outcome
+    valuation_record_id = Column(
+        Integer, ForeignKey("valuation_records.id", ondelete="SET NULL")
+    )
+    report_path = Column(String(500))
+    last_error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_valuation_jobs_status_available", "status", "available_at"),
+        Index("ix_valuation_jobs_status_lease", "status", "lease_expires_at"),
+    )
@@ -0,0 +1,118 @@
+"""
+Materialised Valuation Reports
+Renders each valuation's detail document once at write time and stores it as
+a gzip-compressed, versioned JSON blob on the valuation record
+"""
+
+import gzip
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.models.schemas import IdentificationResult, ValuationReport, ValuationResult
+from src.utils import json_utils
+
+# Bump when the document layout changes and add an upgrade step below
+REPORT_SCHEMA_VERSION = 1
+
+# Old schema version -> function upgrading a document to the next version
+_UPGRADES: Dict[int, Any] = {}
+
+
+def render_document(
+    valuation_id: int, report: ValuationReport, created_at: datetime
+) -> Dict[str, Any]:
+    """Detail document for GET /valuations/{id}.
+
+    The top-level fields match the endpoint's row-built response; the full
+    identification and valuation (including individual valuations) make the
+    document enough to rebuild the ValuationReport for PDF/HTML rendering.
+    """
+    valuation = report.valuation
+    return {
+        "schema_version": REPORT_SCHEMA_VERSION,
+        "id": valuation_id,
+        "image_filename": report.image_filename,
+        "upload_timestamp": report.upload_timestamp,
+        "identification": report.identification.model_dump(),
+        "estimated_value": valuation.estimated_value,
+        "confidence_score": valuation.confidence_score,
+        "recommendation": valuation.recommendation.value,
+        "reasoning": valuation.reasoning,
+        "suggested_platforms": [p.value for p in valuation.suggested_platforms],
+        "market_data": valuation.market_data.model_dump()
+        if valuation.market_data
+        else None,
+        "notes": report.notes,
+        "created_at": created_at,
+        "valuation": valuation.model_dump(),
+    }
+
+
+def encode_document(document: Dict[str, Any]) -> bytes:
+    # mtime=0 keeps the blob deterministic for identical documents
+    return gzip.compress(json_utils.dumpb(document), compresslevel=6, mtime=0)
+
+
+def encode_report(
+    valuation_id: int, report: ValuationReport, created_at: datetime
+) -> bytes:
+    """Compressed report_blob for a valuation"""
+    return encode_document(render_document(valuation_id, report, created_at))
+
+
+def decode_document(blob: bytes) -> Dict[str, Any]:
+    """Decompress a report_blob and upgrade it to the current schema version"""
+    document = json_utils.loads(gzip.decompress(blob))
+    version = document.get("schema_version", 1)
+    while version < REPORT_SCHEMA_VERSION:
+        document = _UPGRADES[version](document)
+        version = document["schema_version"]
+    if version > REPORT_SCHEMA_VERSION:
+        raise ValueError(
+            f"Report schema version {version} is newer than supported {REPORT_SCHEMA_VERSION}"
+        )
+    return document
+
+
+def report_from_document(document: Dict[str, Any]) -> ValuationReport:
+    """Rebuild the ValuationReport stored in a detail document"""
+    return ValuationReport(
+        id=str(document["id"]),
+        image_filename=document["image_filename"],
+        upload_timestamp=document["upload_timestamp"],
+        identification=IdentificationResult.model_validate(document["identification"]),
+        valuation=ValuationResult.model_validate(document["valuation"]),
+        notes=document.get("notes"),
+        created_at=document["created_at"],
+    )
+
+
+def report_from_record(record) -> Optional[ValuationReport]:
+    """Best-effort report for records saved before report blobs existed.
+
+    Individual valuations were never stored for those records, so the
+    rebuilt report only has the overall valuation.
+    """
+    identification = record.identification_data
+    if not isinstance(identification, dict):
+        return None
+    identification = {"description": "", "condition_assessment": "", **identification}
+    try:
+        return ValuationReport(
+            id=str(record.id),
+            image_filename=record.image_filename,
+            upload_timestamp=record.upload_timestamp or record.created_at,
+            identification=IdentificationResult.model_validate(identification),
+            valuation=ValuationResult(
+                estimated_value=record.estimated_value or 0.0,
+                confidence_score=record.valuation_confidence or 0.0,
+                recommendation=record.recommendation_category,
+                reasoning=record.reasoning or "",
+                suggested_platforms=record.suggested_platforms or [],
+                market_data=record.market_data,
+            ),
+            notes=record.notes,
+            created_at=record.created_at,
+        )
+    except ValueError:  # pydantic ValidationError: incomplete legacy data
+        return None
@@ -1,11 +1,294 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc, or_
-from datetime import datetime
+from sqlalchemy import and_, func, desc, insert, or_, select, text, tuple_, update
+from sqlalchemy.orm import aliased
+from datetime import datetime, timedelta
+import base64
 import json
+import time
 
-from .models import ValuationRecord, InventoryItem, SaleRecord
+from .models import (
+    ValuationRecord,
+    ValuationItem,
+    InventoryItem,
+    SaleRecord,
+    ValuationBatch,
+    ValuationJob,
+    TableVersion,
+)
+from .report_store import (
+    REPORT_SCHEMA_VERSION,
+    decode_document,
+    encode_report,
+    report_from_document,
+    report_from_record,
+)
+from .search import search_backend, search_index_probe, valuation_search_query
 from src.models.schemas import ValuationReport, IdentificationResult, ValuationResult, MarketData
+from src.utils.metrics import DB_WRITE_SECONDS, record_cache
+
+# Columns returned by valuation listings; the JSON blobs are left out
+VALUATION_LIST_COLUMNS = (
+    ValuationRecord.id,
+    ValuationRecord.image_filename,
+    ValuationRecord.estimated_value,
+    ValuationRecord.recommendation_category,
+    ValuationRecord.confidence_score,
+    ValuationRecord.created_at,
+)
+
+# Database URL -> (expiry, total) for count_valuations
+_valuation_count_cache: Dict[str, Tuple[float, int]] = {}
+
+
+def encode_cursor(created_at: datetime, record_id: int) -> str:
+    """Opaque keyset cursor for the row a page ended on"""
+    raw = f"{created_at.isoformat()}|{record_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, record_id = raw.split("|")
+        return datetime.fromisoformat(created_at), int(record_id)
+    except ValueError as e:  # Also covers binascii.Error and UnicodeDecodeError
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def invalidate_valuation_count():
+    """Drop cached valuation totals after records are added or removed"""
+    _valuation_count_cache.clear()
+
+
+def valuation_page_query(limit: int, cursor: Optional[str] = None):
+    """Newest-first keyset page over (created_at, id).
+
+    Selects one extra row so callers can tell whether another page exists.
+    Seeking from the cursor uses ix_valuation_records_created_at (which
+    carries the rowid), so every page costs the same as the first.
+    """
+    query = (
+        select(*VALUATION_LIST_COLUMNS)
+        .order_by(desc(ValuationRecord.created_at), desc(ValuationRecord.id))
+        .limit(limit + 1)
+    )
+    if cursor:
+        created_at, record_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(ValuationRecord.created_at, ValuationRecord.id)
+            < tuple_(created_at, record_id)
+        )
+    return query
+
+
+def valuation_statistics_query():
+    """All valuation statistics in one pass using conditional aggregation"""
+    by_category = ValuationRecord.recommendation_category
+    return select(
+        func.count(ValuationRecord.id).label("total_valuations"),
+        func.sum(ValuationRecord.estimated_value).label("total_value"),
+        func.max(ValuationRecord.estimated_value).label("highest_value"),
+        func.count(ValuationRecord.id)
+        .filter(by_category == "museum")
+        .label("museum_count"),
+        func.count(ValuationRecord.id)
+        .filter(by_category == "resale")
+        .label("resale_count"),
+        func.count(ValuationRecord.id)
+        .filter(by_category == "collection")
+        .label("collection_count"),
+    )
+
+
+def inventory_summary_query():
+    """Inventory summary in one pass using conditional aggregation"""
+    return select(
+        func.count(InventoryItem.id).label("total_items"),
+        func.sum(InventoryItem.estimated_value).label("total_value"),
+        func.max(InventoryItem.estimated_value).label("highest_value"),
+        func.count(InventoryItem.id)
+        .filter(InventoryItem.status == "in_inventory")
+        .label("available_items"),
+    )
+
+
+def valuation_version_query(valuation_id: int):
+    """When a valuation last changed and its stored report's schema version (HTTP validators)"""
+    return select(
+        func.coalesce(ValuationRecord.updated_at, ValuationRecord.created_at).label(
+            "updated_at"
+        ),
+        ValuationRecord.report_schema_version,
+    ).where(ValuationRecord.id == valuation_id)
+
+
+def table_version_query(table_name: str):
+    """A table's change counter; no row when the database has no version triggers"""
+    return select(TableVersion.version).where(TableVersion.table_name == table_name)
+
+
+def _valuation_version(row) -> Optional[Tuple[Optional[datetime], Optional[int]]]:
+    return None if row is None else (row.updated_at, row.report_schema_version)
+
+
+def sales_statistics_query():
+    """Sales statistics in one pass"""
+    return select(
+        func.count(SaleRecord.id).label("total_sales"),
+        func.sum(SaleRecord.sale_price).label("total_revenue"),
+        func.sum(SaleRecord.net_profit).label("total_profit"),
+    )
+
+
+def _valuation_statistics(row) -> Dict[str, Any]:
+    total_valuations = row.total_valuations or 0
+    total_value = row.total_value or 0
+    return {
+        "total_valuations": total_valuations,
+        "total_value": float(total_value),
+        "average_value": float(total_value / total_valuations)
+        if total_valuations > 0
+        else 0,
+        "highest_value": float(row.highest_value or 0),
+        "museum_count": row.museum_count or 0,
+        "resale_count": row.resale_count or 0,
+        "collection_count": row.collection_count or 0,
+    }
+
+
+def _inventory_summary(row) -> Dict[str, Any]:
+    total_items = row.total_items or 0
+    total_value = row.total_value or 0
+    return {
+        "total_items": total_items,
+        "total_value": float(total_value),
+        "available_items": row.available_items or 0,
+        "average_value": float(total_value / total_items) if total_items > 0 else 0,
+        "highest_value": float(row.highest_value or 0),
+    }
+
+
+def _sales_statistics(row) -> Dict[str, Any]:
+    total_sales = row.total_sales or 0
+    total_revenue = row.total_revenue or 0
+    return {
+        "total_sales": total_sales,
+        "total_revenue": float(total_revenue),
+        "total_profit": float(row.total_profit or 0),
+        "average_sale_price": float(total_revenue / total_sales)
+        if total_sales > 0
+        else 0,
+    }
+
+
+def _valuation_record_row(report: ValuationReport) -> Dict[str, Any]:
+    """valuation_records column values for a report, with complex objects serialized to JSON"""
+    identification_data = {
+        "confidence_score": report.identification.confidence_score,
+        "identified_items": [
+            item.model_dump() for item in report.identification.identified_items
+        ],
+        "description": report.identification.description,
+        "condition_assessment": report.identification.condition_assessment,
+    }
+
+    market_data = None
+    if report.valuation.market_data:
+        market_data = report.valuation.market_data.model_dump()
+
+    return {
+        "image_filename": report.image_filename,
+        "original_filename": report.image_filename,
+        "identification_data": identification_data,
+        "confidence_score": report.identification.confidence_score,
+        "estimated_value": report.valuation.estimated_value,
+        "valuation_confidence": report.valuation.confidence_score,
+        "recommendation_category": report.valuation.recommendation.value,
+        "reasoning": report.valuation.reasoning,
+        "suggested_platforms": [p.value for p in report.valuation.suggested_platforms],
+        "market_data": market_data,
+        "notes": report.notes,
+        "upload_timestamp": report.upload_timestamp,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def _valuation_item_rows(report: ValuationReport) -> List[Dict[str, Any]]:
+    """valuation_items column values, one per identified item, paired with its individual valuation.
+
+    The valuation engine values items in identification order, so valuations
+    are matched by position and only used when they are for the same item.
+    """
+    individual = report.valuation.individual_valuations
+    rows = []
+    for position, item in enumerate(report.identification.identified_items):
+        valuation = individual[position] if position < len(individual) else None
+        if valuation is not None and valuation.item != item:
+            valuation = None
+        market_data = valuation.market_data if valuation else None
+
+        rows.append(
+            {
+                "position": position,
+                "item_number": item.item_number,
+                "name": item.name,
+                "item_type": item.item_type.value,
+                "condition": item.condition.value,
+                "year_released": item.year_released,
+                "theme": item.theme,
+                "category": item.category,
+                "pieces": item.pieces,
+                "estimated_value_usd": valuation.estimated_individual_value_usd
+                if valuation
+                else None,
+                "estimated_value_eur": valuation.estimated_individual_value_eur
+                if valuation
+                else None,
+                "valuation_confidence": valuation.confidence_score
+                if valuation
+                else None,
+                "market_price": market_data.current_price if market_data else None,
+                "times_sold": market_data.times_sold if market_data else None,
+            }
+        )
+    return rows
+
+
+def _rerender_report(record: ValuationRecord):
+    """Re-encode a record's report blob from its updated row, in the caller's transaction"""
+    if record.report_blob is None:
+        return  # Legacy record; the detail endpoint already reads the row
+    report = report_from_document(decode_document(record.report_blob))
+    report.valuation.market_data = (
+        MarketData.model_validate(record.market_data) if record.market_data else None
+    )
+    record.report_blob = encode_report(record.id, report, record.created_at)
+    record.report_schema_version = REPORT_SCHEMA_VERSION
+
+
+def _chunks(rows: List[Any], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _search_backend(session) -> str:
+    """Full-text backend available on the session's database"""
+    dialect = session.get_bind().dialect.name
+    probe = search_index_probe(dialect)
+    return search_backend(
+        dialect, probe is not None and session.execute(text(probe)).first() is not None
+    )
+
+
+def _valuation_page(rows, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    items = [dict(row._mapping) for row in rows]
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1]["created_at"], items[-1]["id"])
+    return items, next_cursor
 
 
 class ValuationRepository:
@@ -38,42 +321,66 @@ class ValuationRepository:
             # For direct usage - return the context manager
             return self.db_manager.get_session_context()  # Fixed: was self._get_session_context()
 
+    @DB_WRITE_SECONDS.time(operation="save_valuation")
     def save_valuation(self, report: ValuationReport) -> int:
         """Save a valuation report to the database"""
         with self._get_session_context() as session:
-            # Serialize complex objects to JSON
-            identification_data = {
-                "confidence_score": report.identification.confidence_score,
-                "identified_items": [
-                    item.model_dump() for item in report.identification.identified_items
-                ],
-                "description": report.identification.description,
-                "condition_assessment": report.identification.condition_assessment,
-            }
-
-            market_data = None
-            if report.valuation.market_data:
-                market_data = report.valuation.market_data.model_dump()
-
             record = ValuationRecord(
-                image_filename=report.image_filename,
-                original_filename=report.image_filename,
-                identification_data=identification_data,
-                confidence_score=report.identification.confidence_score,
-                estimated_value=report.valuation.estimated_value,
-                valuation_confidence=report.valuation.confidence_score,
-                recommendation_category=report.valuation.recommendation.value,
-                reasoning=report.valuation.reasoning,
-                suggested_platforms=[p.value for p in report.valuation.suggested_platforms],
-                market_data=market_data,
-                upload_timestamp=report.upload_timestamp,
-                created_at=datetime.utcnow()
+                **_valuation_record_row(report),
+                items=[ValuationItem(**row) for row in _valuation_item_rows(report)],
             )
 
             session.add(record)
             session.flush()  # Get the ID
+            record.report_blob = encode_report(record.id, report, record.created_at)
+            record.report_schema_version = REPORT_SCHEMA_VERSION
+            invalidate_valuation_count()
             return record.id
 
+    @DB_WRITE_SECONDS.time(operation="save_valuations_bulk")
+    def save_valuations_bulk(
+        self, reports: List[ValuationReport], chunk_size: int = 500
+    ) -> List[int]:
+        """Save many reports with multi-row INSERTs, one transaction per chunk.
+
+        Returns the new valuation IDs in the same order as reports. A failing
+        chunk rolls back on its own; earlier chunks stay committed.
+        """
+        ids: List[int] = []
+        for chunk in _chunks(reports, chunk_size):
+            with self._get_session_context() as session:
+                rows = [_valuation_record_row(report) for report in chunk]
+                chunk_ids = session.scalars(
+                    insert(ValuationRecord).returning(
+                        ValuationRecord.id, sort_by_parameter_order=True
+                    ),
+                    rows,
+                ).all()
+                session.execute(
+                    update(ValuationRecord),
+                    [
+                        {
+                            "id": valuation_id,
+                            "report_blob": encode_report(
+                                valuation_id, report, row["created_at"]
+                            ),
+                            "report_schema_version": REPORT_SCHEMA_VERSION,
+                        }
+                        for valuation_id, report, row in zip(chunk_ids, chunk, rows)
+                    ],
+                )
+                item_rows = [
+                    {**row, "valuation_record_id": valuation_id}
+                    for valuation_id, report in zip(chunk_ids, chunk)
+                    for row in _valuation_item_rows(report)
+                ]
+                if item_rows:
+                    session.execute(insert(ValuationItem), item_rows)
+            ids.extend(chunk_ids)
+
+        invalidate_valuation_count()
+        return ids
+
     def get_valuation(self, valuation_id: int) -> Optional[dict]:
         """Get a valuation record by ID, returned as dict to avoid session issues"""
         with self._get_session_context() as session:
@@ -101,30 +408,39 @@ class ValuationRepository:
                 desc(ValuationRecord.created_at)
             ).limit(limit).offset(offset).all()
 
-    def search_valuations(self, search_term: str) -> List[ValuationRecord]:
-        """Search valuations by item name or description"""
+    def list_valuation_page(
+        self, limit: int = 50, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List valuation summaries after a keyset cursor; returns (rows, next_cursor)"""
         with self._get_session_context() as session:
-            # Search in JSON fields - SQLite doesn't have full JSON support
-            # So we'll search in the reasoning and notes fields
-            return session.query(ValuationRecord).filter(
-                or_(
-                    ValuationRecord.reasoning.contains(search_term),
-                    ValuationRecord.notes.contains(search_term) if ValuationRecord.notes else False
-                )
-            ).all()
+            return _valuation_page(
+                session.execute(valuation_page_query(limit, cursor)), limit
+            )
 
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get valuation statistics"""
+    def search_valuations(
+        self, search_term: str, limit: int = 50, offset: int = 0
+    ) -> List[ValuationRecord]:
+        """Search item names, numbers, themes, reasoning and notes, best match first"""
         with self._get_session_context() as session:
-            total_valuations = session.query(func.count(ValuationRecord.id)).scalar()
-            total_value = session.query(func.sum(ValuationRecord.estimated_value)).scalar() or 0
-            average_value = total_value / total_valuations if total_valuations > 0 else 0
+            query = valuation_search_query(
+                _search_backend(session),
+                search_term,
+                ValuationRecord,
+                limit=limit,
+                offset=offset,
+            )
+            records = list(session.execute(query).scalars())
+            # Detach loaded rows so they stay readable after the context commits
+            for record in records:
+                session.expunge(record)
+            return records
 
-            return {
-                "total_valuations": total_valuations,
-                "total_value": float(total_value),
-                "average_value": float(average_value)
-            }
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get valuation statistics, including counts per recommendation category"""
+        with self._get_session_context() as session:
+            return _valuation_statistics(
+                session.execute(valuation_statistics_query()).one()
+            )
 
     def save_market_data(self, valuation_id: int, item_number: str, item_name: str, market_data: MarketData) -> int:
         """Save market data for a valuation (updates the valuation record)"""
@@ -135,6 +451,7 @@ class ValuationRepository:
             
             if valuation:
                 valuation.market_data = market_data.model_dump()
+                _rerender_report(valuation)
                 session.flush()
                 return valuation.id
             return None
@@ -149,6 +466,7 @@ class ValuationRepository:
             if valuation:
                 valuation.status = status
                 valuation.updated_at = datetime.utcnow()
+                _rerender_report(valuation)
                 return True
             return False
 
@@ -161,6 +479,7 @@ class ValuationRepository:
             
             if valuation:
                 session.delete(valuation)
+                invalidate_valuation_count()
                 return True
             return False
 
@@ -180,10 +499,31 @@ class ValuationRepository:
     def get_valuation_record(self, valuation_id: int) -> Optional[ValuationRecord]:
         """Get a valuation record by ID (API compatibility method)"""
         with self._get_session_context() as session:
-            return session.query(ValuationRecord).filter(
-                ValuationRecord.id == valuation_id
-            ).first()
-    
+            return (
+                session.query(ValuationRecord)
+                .filter(ValuationRecord.id == valuation_id)
+                .first()
+            )
+
+    def get_valuation_version(
+        self, valuation_id: int
+    ) -> Optional[Tuple[Optional[datetime], Optional[int]]]:
+        """(updated_at, report_schema_version) for a valuation; None if it does not exist"""
+        with self._get_session_context() as session:
+            return _valuation_version(
+                session.execute(valuation_version_query(valuation_id)).first()
+            )
+
+    def get_report(self, valuation_id: int) -> Optional[ValuationReport]:
+        """Rebuild the saved ValuationReport from its report blob (or the row for older records)"""
+        with self._get_session_context() as session:
+            record = session.get(ValuationRecord, valuation_id)
+            if record is None:
+                return None
+            if record.report_blob is not None:
+                return report_from_document(decode_document(record.report_blob))
+            return report_from_record(record)
+
     def create_valuation_record(self, report: ValuationReport) -> int:
         """Create a valuation record (API compatibility method)"""
         return self.save_valuation(report)
@@ -195,6 +535,40 @@ class ValuationRepository:
                 ValuationRecord.recommendation_category == recommendation
             ).all()
 
+    def get_valuations_with_item(
+        self, item_number: str, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Valuation summaries that identified item_number, newest first"""
+        with self._get_session_context() as session:
+            containing = select(ValuationItem.valuation_record_id).where(
+                ValuationItem.item_number == item_number
+            )
+            query = (
+                select(*VALUATION_LIST_COLUMNS)
+                .where(ValuationRecord.id.in_(containing))
+                .order_by(desc(ValuationRecord.created_at))
+                .limit(limit)
+            )
+            return [dict(row._mapping) for row in session.execute(query)]
+
+    def get_value_by_theme(self) -> List[Dict[str, Any]]:
+        """Identified item counts and individual values per theme, highest value first"""
+        with self._get_session_context() as session:
+            total_value = func.coalesce(func.sum(ValuationItem.estimated_value_usd), 0)
+            query = (
+                select(
+                    ValuationItem.theme,
+                    func.count(ValuationItem.id).label("item_count"),
+                    func.count(func.distinct(ValuationItem.valuation_record_id)).label(
+                        "valuation_count"
+                    ),
+                    total_value.label("total_value"),
+                )
+                .group_by(ValuationItem.theme)
+                .order_by(desc(total_value))
+            )
+            return [dict(row._mapping) for row in session.execute(query)]
+
     def get_high_value_items(self, min_value: float = 100.0) -> List[ValuationRecord]:
         """Get high-value items above a threshold"""
         with self._get_session_context() as session:
@@ -241,6 +615,26 @@ class InventoryRepository:
             session.flush()
             return item.id
 
+    def add_items_bulk(
+        self, items: List[Dict[str, Any]], chunk_size: int = 500
+    ) -> List[int]:
+        """Add many inventory items with multi-row INSERTs, one transaction per chunk.
+
+        Returns the new item IDs in the same order as items.
+        """
+        ids: List[int] = []
+        for chunk in _chunks(items, chunk_size):
+            with self._get_session_context() as session:
+                ids.extend(
+                    session.scalars(
+                        insert(InventoryItem).returning(
+                            InventoryItem.id, sort_by_parameter_order=True
+                        ),
+                        chunk,
+                    ).all()
+                )
+        return ids
+
     def get_item(self, item_id: int) -> Optional[InventoryItem]:
         """Get inventory item by ID"""
         with self._get_session_context() as session:
@@ -268,29 +662,106 @@ class InventoryRepository:
                 InventoryItem.status == "in_inventory"
             ).all()
 
+    def get_stale_items(
+        self, stale_before: datetime, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Get items whose market price is missing or older than stale_before.
+
+        Rows are returned in refresh priority order: never-priced items first,
+        then by estimated value, age of the last price and sales turnover of
+        the same item number.
+        """
+        with self._get_session_context() as session:
+            sold_item = aliased(InventoryItem)
+            turnover = (
+                select(func.count(SaleRecord.id))
+                .join(sold_item, SaleRecord.inventory_item_id == sold_item.id)
+                .where(sold_item.item_number == InventoryItem.item_number)
+                .correlate(InventoryItem)
+                .scalar_subquery()
+            )
+
+            query = (
+                select(
+                    InventoryItem.id,
+                    InventoryItem.item_number,
+                    InventoryItem.item_type,
+                    InventoryItem.condition,
+                    InventoryItem.estimated_value,
+                    InventoryItem.last_price_update,
+                    turnover.label("turnover"),
+                )
+                .where(
+                    InventoryItem.item_number.isnot(None),
+                    InventoryItem.item_number != "",
+                    InventoryItem.status.in_(
+                        ["in_inventory", "on_display", "reserved"]
+                    ),
+                    or_(
+                        InventoryItem.last_price_update.is_(None),
+                        InventoryItem.last_price_update < stale_before,
+                    ),
+                )
+                .order_by(
+                    InventoryItem.last_price_update.isnot(None),
+                    desc(func.coalesce(InventoryItem.estimated_value, 0)),
+                    InventoryItem.last_price_update,
+                    desc(turnover),
+                )
+            )
+            if limit:
+                query = query.limit(limit)
+
+            return [dict(row._mapping) for row in session.execute(query)]
+
+    def bulk_update_prices(self, updates: List[Dict[str, Any]]) -> int:
+        """Write refreshed market prices with bulk UPDATE statements.
+
+        Each update is a dict with ``id``, ``last_price_update`` and optionally
+        ``current_market_price`` (omitted when the price guide had no data).
+        """
+        if not updates:
+            return 0
+
+        now = datetime.utcnow()
+        priced = [
+            {**u, "updated_at": now} for u in updates if "current_market_price" in u
+        ]
+        unpriced = [
+            {
+                "id": u["id"],
+                "last_price_update": u["last_price_update"],
+                "updated_at": now,
+            }
+            for u in updates
+            if "current_market_price" not in u
+        ]
+
+        with self._get_session_context() as session:
+            # executemany-style UPDATE ... WHERE id = ? grouped by column set
+            if priced:
+                session.execute(update(InventoryItem), priced)
+            if unpriced:
+                session.execute(update(InventoryItem), unpriced)
+            session.flush()
+
+        return len(updates)
+
     # API compatibility methods - these are what the FastAPI endpoints expect
-    def list_inventory(self) -> List[InventoryItem]:
-        """List all inventory items (API compatibility method)"""
+    def list_inventory(self, limit: Optional[int] = None) -> List[InventoryItem]:
+        """List inventory items, newest first (API compatibility method)"""
         with self._get_session_context() as session:
-            return session.query(InventoryItem).order_by(
+            query = session.query(InventoryItem).order_by(
                 desc(InventoryItem.created_at)
-            ).all()
+            )
+            if limit:
+                query = query.limit(limit)
+            return query.all()
     
     def get_inventory_summary(self) -> Dict[str, Any]:
         """Get inventory summary statistics (API compatibility method)"""
         with self._get_session_context() as session:
-            total_items = session.query(func.count(InventoryItem.id)).scalar() or 0
-            total_value = session.query(func.sum(InventoryItem.estimated_value)).scalar() or 0
-            available_items = session.query(func.count(InventoryItem.id)).filter(
-                InventoryItem.status == "in_inventory"
-            ).scalar() or 0
-            
-            return {
-                "total_items": total_items,
-                "total_value": float(total_value),
-                "available_items": available_items,
-                "average_value": float(total_value / total_items) if total_items > 0 else 0
-            }
+            return _inventory_summary(session.execute(inventory_summary_query()).one())
     
     def create_from_valuation(self, valuation_record, location: str = "") -> InventoryItem:
         """Create inventory item from valuation record (API compatibility method)"""
@@ -301,7 +772,7 @@ class InventoryRepository:
                 estimated_value=valuation_record.estimated_value,
                 location=location,
                 status="in_inventory",
-                source_valuation_id=valuation_record.id,
+                valuation_record_id=valuation_record.id,
                 created_at=datetime.utcnow()
             )
             session.add(item)
@@ -315,6 +786,9 @@ class SaleRepository:
     def __init__(self, db_manager):
         self.db_manager = db_manager
 
+    def _get_session_context(self):
+        return self.db_manager.get_session_context()
+
     def record_sale(self, sale_data: Dict[str, Any]) -> int:
         """Record a sale"""
         with self._get_session_context() as session:
@@ -341,13 +815,556 @@ class SaleRepository:
     def get_sales_statistics(self) -> Dict[str, Any]:
         """Get sales statistics"""
         with self._get_session_context() as session:
-            total_sales = session.query(func.count(SaleRecord.id)).scalar()
-            total_revenue = session.query(func.sum(SaleRecord.sale_price)).scalar() or 0
-            total_profit = session.query(func.sum(SaleRecord.net_profit)).scalar() or 0
+            return _sales_statistics(session.execute(sales_statistics_query()).one())
+
+
+# Job statuses
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+# Columns returned for a job (everything but the lease bookkeeping)
+JOB_COLUMNS = (
+    ValuationJob.id,
+    ValuationJob.image_path,
+    ValuationJob.image_filename,
+    ValuationJob.notes,
+    ValuationJob.batch_id,
+    ValuationJob.status,
+    ValuationJob.stage,
+    ValuationJob.attempts,
+    ValuationJob.max_attempts,
+    ValuationJob.valuation_record_id,
+    ValuationJob.report_path,
+    ValuationJob.last_error,
+    ValuationJob.created_at,
+    ValuationJob.updated_at,
+    ValuationJob.finished_at,
+)
+
 
-            return {
-                "total_sales": total_sales,
-                "total_revenue": float(total_revenue),
-                "total_profit": float(total_profit),
-                "average_sale_price": float(total_revenue / total_sales) if total_sales > 0 else 0
-            }
\ No newline at end of file
+BATCH_COLUMNS = (
+    ValuationBatch.id,
+    ValuationBatch.source,
+    ValuationBatch.notes,
+    ValuationBatch.total_files,
+    ValuationBatch.queued_files,
+    ValuationBatch.duplicate_files,
+    ValuationBatch.rejected_files,
+    ValuationBatch.created_at,
+)
+
+
+def batch_jobs_query(batch_id: int):
+    """Job counts and valued total per status for a batch"""
+    return (
+        select(
+            ValuationJob.status,
+            func.count(ValuationJob.id).label("jobs"),
+            func.sum(ValuationRecord.estimated_value).label("estimated_value"),
+        )
+        .outerjoin(
+            ValuationRecord, ValuationRecord.id == ValuationJob.valuation_record_id
+        )
+        .where(ValuationJob.batch_id == batch_id)
+        .group_by(ValuationJob.status)
+    )
+
+
+def _batch_progress(batch, status_rows) -> Dict[str, Any]:
+    jobs = {row.status: row.jobs for row in status_rows}
+    values = {row.status: row.estimated_value for row in status_rows}
+    finished = jobs.get(JOB_SUCCEEDED, 0) + jobs.get(JOB_FAILED, 0)
+    queued_files = batch.queued_files or 0
+    return {
+        **dict(batch._mapping),
+        "jobs": jobs,
+        "finished": finished,
+        "progress": round(finished / queued_files, 4) if queued_files else 1.0,
+        "completed": finished >= queued_files,
+        "estimated_value": float(values.get(JOB_SUCCEEDED) or 0),
+    }
+
+
+def _leasable(now: datetime):
+    """Jobs a worker may take: queued and due, or running with an expired lease"""
+    return or_(
+        and_(ValuationJob.status == JOB_QUEUED, ValuationJob.available_at <= now),
+        and_(ValuationJob.status == JOB_RUNNING, ValuationJob.lease_expires_at < now),
+    )
+
+
+class JobRepository:
+    """Durable valuation job queue with leases.
+
+    A worker leases a job for a visibility timeout and must extend the lease
+    while it works; if it dies, the lease expires and another worker takes
+    the job over. Every update after the lease is fenced on the lease owner so
+    a worker whose lease was taken over cannot overwrite the new owner.
+    """
+
+    def __init__(self, db_session_or_manager):
+        # Support both Session objects (for API) and db_manager (for direct usage)
+        if hasattr(db_session_or_manager, "query"):
+            self.db_session = db_session_or_manager
+            self.db_manager = None
+        else:
+            self.db_manager = db_session_or_manager
+            self.db_session = None
+
+    def _get_session_context(self):
+        """Get session context manager or direct session"""
+        if self.db_session:
+
+            class DirectSession:
+                def __init__(self, session):
+                    self.session = session
+
+                def __enter__(self):
+                    return self.session
+
+                def __exit__(self, exc_type, exc_val, exc_tb):
+                    pass
+
+            return DirectSession(self.db_session)
+        return self.db_manager.get_session_context()
+
+    def enqueue(
+        self,
+        image_path: str,
+        image_filename: str,
+        notes: Optional[str] = None,
+        max_attempts: int = 3,
+        batch_id: Optional[int] = None,
+        content_hash: Optional[str] = None,
+    ) -> int:
+        """Add a job to the queue"""
+        with self._get_session_context() as session:
+            job = ValuationJob(
+                image_path=image_path,
+                image_filename=image_filename,
+                notes=notes,
+                batch_id=batch_id,
+                content_hash=content_hash,
+                status=JOB_QUEUED,
+                max_attempts=max_attempts,
+                available_at=datetime.utcnow(),
+            )
+            session.add(job)
+            session.flush()
+            return job.id
+
+    def lease(
+        self, worker_id: str, visibility_timeout: float, candidates: int = 5
+    ) -> Optional[Dict[str, Any]]:
+        """Claim the oldest due job for worker_id, or None when the queue is empty.
+
+        The claim is a conditional UPDATE, so two workers racing for the same
+        job cannot both win. Jobs whose lease expired on their last allowed
+        attempt are failed instead of being retried again.
+        """
+        now = datetime.utcnow()
+        with self._get_session_context() as session:
+            session.execute(
+                update(ValuationJob)
+                .where(
+                    ValuationJob.status == JOB_RUNNING,
+                    ValuationJob.lease_expires_at < now,
+                    ValuationJob.attempts >= ValuationJob.max_attempts,
+                )
+                .values(
+                    status=JOB_FAILED,
+                    lease_owner=None,
+                    finished_at=now,
+                    last_error="Lease expired on final attempt",
+                )
+            )
+            job_ids = session.scalars(
+                select(ValuationJob.id)
+                .where(_leasable(now))
+                .order_by(ValuationJob.available_at, ValuationJob.id)
+                .limit(candidates)
+            ).all()
+
+            for job_id in job_ids:
+                claimed = session.execute(
+                    update(ValuationJob)
+                    .where(ValuationJob.id == job_id, _leasable(now))
+                    .values(
+                        status=JOB_RUNNING,
+                        attempts=ValuationJob.attempts + 1,
+                        lease_owner=worker_id,
+                        lease_expires_at=now + timedelta(seconds=visibility_timeout),
+                        updated_at=now,
+                    )
+                ).rowcount
+                if claimed:
+                    row = session.execute(
+                        select(*JOB_COLUMNS).where(ValuationJob.id == job_id)
+                    ).one()
+                    return dict(row._mapping)
+        return None
+
+    def _owned(self, job_id: int, worker_id: str):
+        return update(ValuationJob).where(
+            ValuationJob.id == job_id,
+            ValuationJob.status == JOB_RUNNING,
+            ValuationJob.lease_owner == worker_id,
+        )
+
+    def extend_lease(
+        self,
+        job_id: int,
+        worker_id: str,
+        visibility_timeout: float,
+        stage: Optional[str] = None,
+    ) -> bool:
+        """Renew the lease (optionally recording the stage reached); False if it was lost"""
+        now = datetime.utcnow()
+        values = {
+            "lease_expires_at": now + timedelta(seconds=visibility_timeout),
+            "updated_at": now,
+        }
+        if stage is not None:
+            values["stage"] = stage
+        with self._get_session_context() as session:
+            return (
+                session.execute(
+                    self._owned(job_id, worker_id).values(**values)
+                ).rowcount
+                == 1
+            )
+
+    def save_result(
+        self, job_id: int, worker_id: str, report: ValuationReport, stage: str
+    ) -> Optional[int]:
+        """Save the job's valuation and link it to the job in one transaction.
+
+        Returns the valuation ID, or None (saving nothing) if the lease was lost.
+        """
+        with self._get_session_context() as session:
+            valuation_id = ValuationRepository(session).save_valuation(report)
+            linked = session.execute(
+                self._owned(job_id, worker_id).values(
+                    valuation_record_id=valuation_id,
+                    stage=stage,
+                    updated_at=datetime.utcnow(),
+                )
+            ).rowcount
+            if not linked:
+                session.rollback()
+                return None
+            return valuation_id
+
+    def complete(
+        self, job_id: int, worker_id: str, stage: str, report_path: Optional[str] = None
+    ) -> bool:
+        """Mark a leased job succeeded"""
+        now = datetime.utcnow()
+        with self._get_session_context() as session:
+            return (
+                session.execute(
+                    self._owned(job_id, worker_id).values(
+                        status=JOB_SUCCEEDED,
+                        stage=stage,
+                        report_path=report_path,
+                        lease_owner=None,
+                        lease_expires_at=None,
+                        last_error=None,
+                        updated_at=now,
+                        finished_at=now,
+                    )
+                ).rowcount
+                == 1
+            )
+
+    def release(self, job_id: int, worker_id: str) -> bool:
+        """Requeue a leased job now without counting the attempt (its worker is shutting down).
+
+        Stages already recorded are kept, so a job whose valuation was saved
+        only re-renders its report.
+        """
+        now = datetime.utcnow()
+        with self._get_session_context() as session:
+            return (
+                session.execute(
+                    self._owned(job_id, worker_id).values(
+                        status=JOB_QUEUED,
+                        attempts=ValuationJob.attempts - 1,
+                        available_at=now,
+                        lease_owner=None,
+                        lease_expires_at=None,
+                        updated_at=now,
+                    )
+                ).rowcount
+                == 1
+            )
+
+    def fail(
+        self, job_id: int, worker_id: str, error: str, retry_delay: float
+    ) -> Optional[str]:
+        """Record a failed attempt: requeue after retry_delay, or fail for good
+        once max_attempts is used up. Returns the new status (None if the lease was lost).
+        """
+        now = datetime.utcnow()
+        with self._get_session_context() as session:
+            job = session.execute(
+                select(ValuationJob.attempts, ValuationJob.max_attempts).where(
+                    ValuationJob.id == job_id
+                )
+            ).first()
+            if job is None:
+                return None
+            if job.attempts >= job.max_attempts:
+                values = {"status": JOB_FAILED, "finished_at": now}
+            else:
+                values = {
+                    "status": JOB_QUEUED,
+                    "available_at": now + timedelta(seconds=retry_delay),
+                }
+            updated = session.execute(
+                self._owned(job_id, worker_id).values(
+                    **values,
+                    lease_owner=None,
+                    lease_expires_at=None,
+                    last_error=error,
+                    updated_at=now,
+                )
+            ).rowcount
+            return values["status"] if updated else None
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job status and outcome"""
+        with self._get_session_context() as session:
+            row = session.execute(
+                select(*JOB_COLUMNS).where(ValuationJob.id == job_id)
+            ).first()
+            return dict(row._mapping) if row else None
+
+    def count_by_status(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        with self._get_session_context() as session:
+            rows = session.execute(
+                select(ValuationJob.status, func.count(ValuationJob.id)).group_by(
+                    ValuationJob.status
+                )
+            ).all()
+            return {status: count for status, count in rows}
+
+    def find_by_content_hash(self, content_hash: str) -> Optional[int]:
+        """ID of the oldest job for the same image that has not failed, if any"""
+        with self._get_session_context() as session:
+            return session.execute(
+                select(ValuationJob.id)
+                .where(
+                    ValuationJob.content_hash == content_hash,
+                    ValuationJob.status != JOB_FAILED,
+                )
+                .order_by(ValuationJob.id)
+                .limit(1)
+            ).scalar()
+
+    def create_batch(self, source: str, notes: Optional[str] = None) -> int:
+        """Register a batch; its jobs are enqueued with its ID"""
+        with self._get_session_context() as session:
+            batch = ValuationBatch(source=source[:500], notes=notes)
+            session.add(batch)
+            session.flush()
+            return batch.id
+
+    def update_batch_counts(
+        self,
+        batch_id: int,
+        total_files: int,
+        queued_files: int,
+        duplicate_files: int,
+        rejected_files: int,
+    ):
+        """Record how many of a batch's files were queued, deduplicated or rejected"""
+        with self._get_session_context() as session:
+            session.execute(
+                update(ValuationBatch)
+                .where(ValuationBatch.id == batch_id)
+                .values(
+                    total_files=total_files,
+                    queued_files=queued_files,
+                    duplicate_files=duplicate_files,
+                    rejected_files=rejected_files,
+                )
+            )
+
+    def get_batch_progress(self, batch_id: int) -> Optional[Dict[str, Any]]:
+        """Batch intake counts plus aggregate progress of its jobs"""
+        with self._get_session_context() as session:
+            batch = session.execute(
+                select(*BATCH_COLUMNS).where(ValuationBatch.id == batch_id)
+            ).first()
+            if batch is None:
+                return None
+            return _batch_progress(
+                batch, session.execute(batch_jobs_query(batch_id)).all()
+            )
+
+
+class AsyncValuationRepository:
+    """Async read path for valuation records (FastAPI list/detail endpoints)"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def list_valuation_records(
+        self, skip: int = 0, limit: int = 20
+    ) -> List[ValuationRecord]:
+        """List valuation records with pagination, newest first"""
+        result = await self.session.execute(
+            select(ValuationRecord)
+            .order_by(desc(ValuationRecord.created_at))
+            .limit(limit)
+            .offset(skip)
+        )
+        return list(result.scalars().all())
+
+    async def list_valuation_page(
+        self, limit: int = 20, cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List valuation summaries after a keyset cursor; returns (rows, next_cursor)"""
+        result = await self.session.execute(valuation_page_query(limit, cursor))
+        return _valuation_page(result, limit)
+
+    async def search_valuation_page(
+        self, search_term: str, limit: int = 20, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """Ranked valuation summaries matching search_term"""
+        dialect = self.session.get_bind().dialect.name
+        probe = search_index_probe(dialect)
+        index_exists = (
+            probe is not None
+            and (await self.session.execute(text(probe))).first() is not None
+        )
+        query = valuation_search_query(
+            search_backend(dialect, index_exists),
+            search_term,
+            *VALUATION_LIST_COLUMNS,
+            limit=limit,
+            offset=offset,
+        )
+        result = await self.session.execute(query)
+        return [dict(row._mapping) for row in result]
+
+    async def count_valuations(self, max_age: float = 0) -> int:
+        """Total number of valuation records, cached for up to max_age seconds"""
+        key = str(self.session.get_bind().url)
+        cached = _valuation_count_cache.get(key)
+        now = time.monotonic()
+        if max_age > 0:
+            record_cache("valuation_count", bool(cached and cached[0] > now))
+        if max_age > 0 and cached and cached[0] > now:
+            return cached[1]
+
+        total = (
+            await self.session.execute(select(func.count(ValuationRecord.id)))
+        ).scalar_one()
+        if max_age > 0:
+            _valuation_count_cache[key] = (now + max_age, total)
+        return total
+
+    async def get_valuation_record(
+        self, valuation_id: int
+    ) -> Optional[ValuationRecord]:
+        """Get a valuation record by ID"""
+        return await self.session.get(ValuationRecord, valuation_id)
+
+    async def get_valuation_version(
+        self, valuation_id: int
+    ) -> Optional[Tuple[Optional[datetime], Optional[int]]]:
+        """(updated_at, report_schema_version) for a valuation; None if it does not exist"""
+        result = await self.session.execute(valuation_version_query(valuation_id))
+        return _valuation_version(result.first())
+
+    async def get_report_blob(
+        self, valuation_id: int
+    ) -> Optional[Tuple[Optional[bytes], Optional[int]]]:
+        """(report_blob, report_schema_version) for a valuation, without loading the row.
+
+        Returns None when the valuation does not exist; both values are None
+        for records saved before report blobs existed.
+        """
+        result = await self.session.execute(
+            select(
+                ValuationRecord.report_blob, ValuationRecord.report_schema_version
+            ).where(ValuationRecord.id == valuation_id)
+        )
+        row = result.first()
+        return None if row is None else (row.report_blob, row.report_schema_version)
+
+
+class AsyncInventoryRepository:
+    """Async read path for inventory items (FastAPI inventory endpoint)"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def list_inventory(self, limit: Optional[int] = None) -> List[InventoryItem]:
+        """List inventory items, newest first"""
+        query = select(InventoryItem).order_by(desc(InventoryItem.created_at))
+        if limit:
+            query = query.limit(limit)
+        result = await self.session.execute(query)
+        return list(result.scalars().all())
+
+    async def get_inventory_summary(self) -> Dict[str, Any]:
+        """Get inventory summary statistics in a single query"""
+        result = await self.session.execute(inventory_summary_query())
+        return _inventory_summary(result.one())
+
+    async def get_version(self) -> Optional[int]:
+        """inventory_items change counter; None without version triggers"""
+        result = await self.session.execute(
+            table_version_query(InventoryItem.__tablename__)
+        )
+        return result.scalar()
+
+
+class AsyncJobRepository:
+    """Async read path for valuation jobs (FastAPI job status endpoints)"""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Job status and outcome.
+
+        Ends the read transaction afterwards so repeated polls on one session
+        see updates committed by the workers.
+        """
+        result = await self.session.execute(
+            select(*JOB_COLUMNS).where(ValuationJob.id == job_id)
+        )
+        row = result.first()
+        await self.session.rollback()
+        return dict(row._mapping) if row else None
+
+    async def count_by_status(self) -> Dict[str, int]:
+        """Number of jobs in each status"""
+        result = await self.session.execute(
+            select(ValuationJob.status, func.count(ValuationJob.id)).group_by(
+                ValuationJob.status
+            )
+        )
+        return {status: count for status, count in result.all()}
+
+    async def get_batch_progress(self, batch_id: int) -> Optional[Dict[str, Any]]:
+        """Batch intake counts plus aggregate progress of its jobs (fresh on every poll)"""
+        batch = (
+            await self.session.execute(
+                select(*BATCH_COLUMNS).where(ValuationBatch.id == batch_id)
+            )
+        ).first()
+        status_rows = (
+            (await self.session.execute(batch_jobs_query(batch_id))).all()
+            if batch
+            else []
+        )
+        await self.session.rollback()
+        return _batch_progress(batch, status_rows) if batch else None
@@ -0,0 +1,104 @@
+"""
+Valuation Full-Text Search
+Ranked search over valuation history using the index created by migration 2
+(FTS5 on SQLite, a tsvector column on PostgreSQL), with a LIKE fallback
+"""
+
+import re
+from typing import Optional
+
+from sqlalchemy import (
+    String,
+    cast,
+    column,
+    desc,
+    false,
+    func,
+    literal_column,
+    or_,
+    select,
+    table,
+    text,
+)
+
+from .models import ValuationRecord
+
+FTS5 = "fts5"
+TSVECTOR = "tsvector"
+LIKE = "like"
+
+# bm25 column weights, in valuation_search column order:
+# item_names, item_numbers, themes, reasoning, notes
+BM25_WEIGHTS = "10.0, 10.0, 3.0, 1.0, 2.0"
+
+valuation_search = table("valuation_search", column("rowid"))
+
+_INDEX_PROBES = {
+    "sqlite": "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'valuation_search'",
+    "postgresql": (
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_name = 'valuation_records' AND column_name = 'search_vector'"
+    ),
+}
+_BACKENDS = {"sqlite": FTS5, "postgresql": TSVECTOR}
+
+
+def search_index_probe(dialect: str) -> Optional[str]:
+    """SQL returning a row when the full-text index exists, or None if the dialect has none"""
+    return _INDEX_PROBES.get(dialect)
+
+
+def search_backend(dialect: str, index_exists: bool) -> str:
+    return _BACKENDS[dialect] if index_exists else LIKE
+
+
+def fts5_match(term: str) -> Optional[str]:
+    """Quote user input as FTS5 terms: every word must match, the last as a prefix.
+
+    "Boba Fett" becomes '"Boba" "Fett"*', so partially typed names still match
+    and FTS5 operators in the input are treated as plain text.
+    """
+    words = [word.replace('"', '""') for word in re.findall(r"\S+", term)]
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def valuation_search_query(
+    backend: str, term: str, *entities, limit: int = 20, offset: int = 0
+):
+    """Select entities (ORM class or columns) for valuations matching term, best match first"""
+    query = select(*entities).limit(limit).offset(offset)
+
+    if backend == FTS5:
+        match = fts5_match(term)
+        if match is None:
+            return query.where(false())
+        return (
+            query.join_from(
+                ValuationRecord,
+                valuation_search,
+                valuation_search.c.rowid == ValuationRecord.id,
+            )
+            .where(text("valuation_search MATCH :match").bindparams(match=match))
+            .order_by(
+                literal_column(f"bm25(valuation_search, {BM25_WEIGHTS})"),
+                desc(ValuationRecord.created_at),
+            )
+        )
+
+    if backend == TSVECTOR:
+        search_vector = literal_column("valuation_records.search_vector")
+        tsquery = func.websearch_to_tsquery("simple", term)
+        return query.where(search_vector.op("@@")(tsquery)).order_by(
+            desc(func.ts_rank(search_vector, tsquery)), desc(ValuationRecord.created_at)
+        )
+
+    # No full-text index: unindexed substring scan, newest first
+    return query.where(
+        or_(
+            ValuationRecord.reasoning.contains(term),
+            ValuationRecord.notes.contains(term),
+            cast(ValuationRecord.identification_data, String).contains(term),
+        )
+    ).order_by(desc(ValuationRecord.created_at))
@@ -1,24 +1,73 @@
+import asyncio
 import base64
 import hashlib
 import hmac
 import time
+import json
+import threading
 import urllib.parse
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any
 import requests
 from datetime import datetime, timedelta
 
 from config.settings import settings
 from src.models.schemas import MarketData, DetailedPricing
+from src.utils.metrics import BRICKLINK_REQUEST_SECONDS, record_cache
+from src.utils.rate_limiter import (
+    BrickLinkRateLimiter,
+    CircuitBreaker,
+    CircuitBreakerOpenError,
+    QuotaExceededError,
+    backoff_delay,
+    get_bricklink_circuit_breaker,
+    get_bricklink_rate_limiter,
+)
+
+# Last good response per request, served while the circuit breaker is open
+_stale_responses: "OrderedDict[str, bytes]" = OrderedDict()
+_stale_lock = threading.Lock()
+STALE_CACHE_SIZE = 2048
+
+
+def estimate_other_conditions(pricing: DetailedPricing) -> DetailedPricing:
+    """Estimate other conditions based on used_complete prices"""
+    if pricing.used_complete_usd:
+        pricing.used_incomplete_usd = pricing.used_complete_usd * 0.7
+        pricing.missing_instructions_usd = pricing.used_complete_usd * 0.85
+        pricing.missing_box_usd = pricing.used_complete_usd * 0.9
+
+    if pricing.used_complete_eur:
+        pricing.used_incomplete_eur = pricing.used_complete_eur * 0.7
+        pricing.missing_instructions_eur = pricing.used_complete_eur * 0.85
+        pricing.missing_box_eur = pricing.used_complete_eur * 0.9
+
+    return pricing
 
 
 class BrickLinkClient:
     BASE_URL = "https://api.bricklink.com/api/store/v1"
 
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[BrickLinkRateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        base_url: Optional[str] = None,
+    ):
         self.consumer_key = settings.bricklink_consumer_key
         self.consumer_secret = settings.bricklink_consumer_secret
         self.token_value = settings.bricklink_token_value
         self.token_secret = settings.bricklink_token_secret
+        self.rate_limiter = rate_limiter or get_bricklink_rate_limiter()
+        self.circuit_breaker = circuit_breaker or get_bricklink_circuit_breaker()
+        self._base_url = base_url
+
+    @property
+    def base_url(self) -> str:
+        """API root, overridable to target a local fake BrickLink server"""
+        return (self._base_url or settings.bricklink_base_url or self.BASE_URL).rstrip(
+            "/"
+        )
 
     def _generate_oauth_signature(
         self, method: str, url: str, params: Dict[str, str]
@@ -72,6 +121,123 @@ class BrickLinkClient:
 
         return {"Authorization": auth_header}
 
+    def _request(
+        self, url: str, params: Optional[Dict] = None, endpoint: str = "other"
+    ) -> requests.Response:
+        """GET a BrickLink endpoint with rate limiting, retries and circuit breaking.
+
+        Timeouts, connection errors, 429s and 5xx responses are retried with
+        jittered exponential backoff. While the breaker is open the last good
+        response for the same request is served instead, or the call fails
+        fast with CircuitBreakerOpenError. Each call is timed under endpoint.
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self._send(url, params)
+            if response.headers.get("X-Stale-Cache") == "1":
+                outcome = "stale"
+            else:
+                outcome = "ok" if response.status_code < 400 else "http_error"
+            return response
+        finally:
+            BRICKLINK_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, endpoint=endpoint, outcome=outcome
+            )
+
+    def _send(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        cache_key = f"{url}?{urllib.parse.urlencode(sorted((params or {}).items()))}"
+
+        if not self.circuit_breaker.allow_request():
+            stale = self._get_stale_response(cache_key)
+            record_cache("bricklink_stale", stale is not None)
+            if stale is not None:
+                return stale
+            raise CircuitBreakerOpenError("BrickLink circuit breaker is open")
+
+        # Every way out records an outcome with the breaker, so a half-open
+        # probe slot taken by allow_request() is always given back
+        try:
+            response = self._attempt(url, params)
+        except QuotaExceededError:
+            # Our own daily budget, not a BrickLink failure
+            self.circuit_breaker.release_probe()
+            raise
+        except Exception:
+            self.circuit_breaker.record_failure()
+            raise
+
+        if response.status_code == 429 or response.status_code >= 500:
+            self.circuit_breaker.record_failure()
+            return response
+
+        self.circuit_breaker.record_success()
+        self.rate_limiter.record_success()
+        if response.status_code == 200:
+            self._store_stale_response(cache_key, response)
+        return response
+
+    def _attempt(self, url: str, params: Optional[Dict]) -> requests.Response:
+        """GET with retries; returns the last response once retries run out"""
+        max_retries = settings.bricklink_max_retries
+        for attempt in range(max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                headers = self._get_oauth_headers("GET", url, params)
+                response = requests.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=settings.bricklink_timeout,
+                )
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                if attempt < max_retries:
+                    time.sleep(
+                        backoff_delay(attempt, settings.bricklink_retry_base_delay)
+                    )
+                    continue
+                raise
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if response.status_code == 429:
+                    self.rate_limiter.record_throttled()
+                if attempt < max_retries:
+                    time.sleep(
+                        backoff_delay(attempt, settings.bricklink_retry_base_delay)
+                    )
+                    continue
+            return response
+
+    def _store_stale_response(self, cache_key: str, response: requests.Response):
+        """Remember a successful response body for stale serving"""
+        content = getattr(response, "content", None)
+        if not isinstance(content, bytes):
+            return
+        with _stale_lock:
+            _stale_responses[cache_key] = content
+            _stale_responses.move_to_end(cache_key)
+            while len(_stale_responses) > STALE_CACHE_SIZE:
+                _stale_responses.popitem(last=False)
+
+    def _get_stale_response(self, cache_key: str) -> Optional[requests.Response]:
+        """Rebuild the last good response for a request, if we have one"""
+        with _stale_lock:
+            content = _stale_responses.get(cache_key)
+        if content is None:
+            return None
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.headers["X-Stale-Cache"] = "1"
+        return response
+
+    def get_guard_status(self) -> Dict[str, Any]:
+        """Get rate limiter and circuit breaker status"""
+        return {
+            "rate_limiter": self.rate_limiter.get_usage_stats(),
+            "circuit_breaker": self.circuit_breaker.get_status(),
+        }
+
     def search_items(self, item_type: str, search_term: str) -> List[Dict[str, Any]]:
         """Search for items on BrickLink"""
         if not all(
@@ -85,12 +251,11 @@ class BrickLinkClient:
             return []
 
         # Use the correct BrickLink API endpoint format
-        url = f"{self.BASE_URL}/items/{item_type}"
+        url = f"{self.base_url}/items/{item_type}"
         params = {"name": search_term}
 
         try:
-            headers = self._get_oauth_headers("GET", url, params)
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self._request(url, params, endpoint="search")
 
             data = response.json()
             
@@ -142,7 +307,7 @@ class BrickLinkClient:
         if item_type == "SET" and "-" not in item_no:
             item_no = f"{item_no}-1"
 
-        url = f"{self.BASE_URL}/items/{item_type}/{item_no}/price"
+        url = f"{self.base_url}/items/{item_type}/{item_no}/price"
         params = {
             "guide_type": "stock",
             "new_or_used": condition,  # N for new, U for used
@@ -151,8 +316,7 @@ class BrickLinkClient:
         }
 
         try:
-            headers = self._get_oauth_headers("GET", url, params)
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self._request(url, params, endpoint="price_guide")
 
             data = response.json()
             
@@ -196,6 +360,14 @@ class BrickLinkClient:
             print(f"Error getting price guide: {e}")
             return None
 
+    async def get_price_guide_async(
+        self, item_type: str, item_no: str, condition: str = "U"
+    ) -> Optional[MarketData]:
+        """Get price guide data without blocking the event loop"""
+        return await asyncio.to_thread(
+            self.get_price_guide, item_type, item_no, condition
+        )
+
     def get_item_details(
         self, item_type: str, item_no: str
     ) -> Optional[Dict[str, Any]]:
@@ -215,11 +387,10 @@ class BrickLinkClient:
         if item_type == "SET" and "-" not in item_no:
             item_no = f"{item_no}-1"
             
-        url = f"{self.BASE_URL}/items/{item_type}/{item_no}"
+        url = f"{self.base_url}/items/{item_type}/{item_no}"
 
         try:
-            headers = self._get_oauth_headers("GET", url)
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self._request(url, endpoint="item")
 
             data = response.json()
             
@@ -315,24 +486,13 @@ class BrickLinkClient:
                     print(f"Error getting {condition_name} {currency_suffix.upper()} pricing: {e}")
                     continue
 
-        # Estimate other conditions based on used_complete prices
-        if pricing.used_complete_usd:
-            pricing.used_incomplete_usd = pricing.used_complete_usd * 0.7
-            pricing.missing_instructions_usd = pricing.used_complete_usd * 0.85
-            pricing.missing_box_usd = pricing.used_complete_usd * 0.9
-        
-        if pricing.used_complete_eur:
-            pricing.used_incomplete_eur = pricing.used_complete_eur * 0.7
-            pricing.missing_instructions_eur = pricing.used_complete_eur * 0.85
-            pricing.missing_box_eur = pricing.used_complete_eur * 0.9
-
-        return pricing
+        return estimate_other_conditions(pricing)
 
     def _get_price_guide_currency(
         self, item_type: str, item_no: str, condition: str, currency: str
     ) -> Optional[MarketData]:
         """Get price guide for specific currency"""
-        url = f"{self.BASE_URL}/items/{item_type}/{item_no}/price"
+        url = f"{self.base_url}/items/{item_type}/{item_no}/price"
         params = {
             "guide_type": "stock",
             "new_or_used": condition,
@@ -341,8 +501,7 @@ class BrickLinkClient:
         }
 
         try:
-            headers = self._get_oauth_headers("GET", url, params)
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self._request(url, params, endpoint="price_guide")
             data = response.json()
 
             if response.status_code == 200:
@@ -0,0 +1,313 @@
+"""
+Local BrickLink Stand-in Server
+Serves the BrickLink store API endpoints used by BrickLinkClient with configurable
+latency, error and rate-limit behaviour, plus record/replay of real responses
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+MODES = ("synthetic", "record", "replay")
+UPSTREAM_URL = "https://api.bricklink.com/api/store/v1"
+
+
+@dataclass
+class FakeBrickLinkConfig:
+    """Behaviour knobs for the fake server"""
+
+    latency_ms: float = 50.0
+    latency_jitter_ms: float = 25.0
+    error_rate: float = 0.0  # Fraction of requests answered with a 500
+    rate_limit_rate: float = 0.0  # Fraction of requests answered with a 429
+    requests_per_second: Optional[float] = None  # Hard cap, excess requests get a 429
+    mode: str = "synthetic"
+    fixtures_path: str = "data/fake_bricklink_fixtures.json"
+    upstream_url: str = UPSTREAM_URL
+    seed: Optional[int] = None
+
+
+class FixtureStore:
+    """Recorded BrickLink responses keyed by path and query string"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.responses: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                self.responses = json.load(f)
+            logger.info(
+                f"Loaded {len(self.responses)} recorded responses from {self.path}"
+            )
+
+    @staticmethod
+    def make_key(path: str, params: Dict[str, str]) -> str:
+        return f"{path}?{urllib.parse.urlencode(sorted(params.items()))}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.responses.get(key)
+
+    def put(self, key: str, status_code: int, body: Dict[str, Any]):
+        with self._lock:
+            self.responses[key] = {"status_code": status_code, "body": body}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.responses, f, indent=1, sort_keys=True)
+            tmp_path.replace(self.path)
+
+
+def _meta(code: int, message: str) -> Dict[str, Any]:
+    return {"code": code, "message": message, "description": message}
+
+
+def _item_hash(item_no: str) -> int:
+    return int(hashlib.sha1(item_no.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def synthetic_price_guide(
+    item_type: str, item_no: str, params: Dict[str, str]
+) -> Dict[str, Any]:
+    """Deterministic price guide so repeated runs are comparable"""
+    h = _item_hash(item_no)
+    avg_price = 2.0 + (h % 20000) / 100.0
+    if params.get("new_or_used", "N") == "N":
+        avg_price *= 1.6
+    if params.get("currency_code", "USD") == "EUR":
+        avg_price *= 0.92
+    times_sold = h % 120
+
+    return {
+        "item": {"no": item_no, "type": item_type},
+        "new_or_used": params.get("new_or_used", "N"),
+        "currency_code": params.get("currency_code", "USD"),
+        "min_price": round(avg_price * 0.6, 2),
+        "max_price": round(avg_price * 1.8, 2),
+        "avg_price": round(avg_price, 2),
+        "qty_avg_price": round(avg_price * 0.95, 2),
+        "unit_quantity": times_sold,
+        "total_quantity": times_sold + h % 7,
+        "times_sold": times_sold,
+        "price_detail": [],
+    }
+
+
+def synthetic_item(item_type: str, item_no: str) -> Dict[str, Any]:
+    h = _item_hash(item_no)
+    return {
+        "no": item_no,
+        "name": f"Synthetic {item_type.title()} {item_no}",
+        "type": item_type,
+        "category_id": h % 800,
+        "year_released": 1978 + h % 47,
+        "weight": f"{(h % 500) / 100 + 1:.2f}",
+        "is_obsolete": False,
+    }
+
+
+def synthetic_search(item_type: str, name: str) -> list:
+    prefix = "".join(c for c in name.lower() if c.isalnum())[:3] or "itm"
+    return [
+        {
+            "no": f"{prefix}{_item_hash(name + str(i)) % 10000:04d}",
+            "name": f"{name} {i + 1}",
+            "type": item_type,
+            "category_name": "Synthetic",
+        }
+        for i in range(5)
+    ]
+
+
+class FakeBrickLinkServer:
+    """Request handling state shared by the app routes"""
+
+    def __init__(self, config: FakeBrickLinkConfig):
+        if config.mode not in MODES:
+            raise ValueError(f"Unknown mode '{config.mode}', expected one of {MODES}")
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.fixtures = (
+            FixtureStore(config.fixtures_path) if config.mode != "synthetic" else None
+        )
+        self.stats: Counter = Counter()
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._upstream = None
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+            self._recent.clear()
+
+    def _over_rate_cap(self) -> bool:
+        if not self.config.requests_per_second:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if len(self._recent) >= self.config.requests_per_second:
+                return True
+            self._recent.append(now)
+            return False
+
+    async def handle(
+        self, request: Request, item_type: str, item_no: Optional[str], kind: str
+    ) -> JSONResponse:
+        self.stats["requests"] += 1
+        params = dict(request.query_params)
+
+        delay_ms = self.config.latency_ms + self.random.uniform(
+            -self.config.latency_jitter_ms, self.config.latency_jitter_ms
+        )
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000.0)
+
+        if self._over_rate_cap() or self.random.random() < self.config.rate_limit_rate:
+            self.stats["throttled"] += 1
+            return JSONResponse(
+                {"meta": _meta(429, "TOO_MANY_REQUESTS")},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+        if self.random.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return JSONResponse(
+                {"meta": _meta(500, "INTERNAL_SERVER_ERROR")}, status_code=500
+            )
+
+        if self.fixtures is not None:
+            key = FixtureStore.make_key(request.url.path, params)
+            recorded = self.fixtures.get(key)
+            if recorded is not None:
+                self.stats["replayed"] += 1
+                return JSONResponse(
+                    recorded["body"], status_code=recorded["status_code"]
+                )
+            if self.config.mode == "record":
+                return await self._record(key, request.url.path, params)
+            self.stats["replay_misses"] += 1
+
+        self.stats["synthetic"] += 1
+        if kind == "price":
+            data = synthetic_price_guide(item_type, item_no, params)
+        elif kind == "item":
+            data = synthetic_item(item_type, item_no)
+        else:
+            data = synthetic_search(item_type, params.get("name", ""))
+        return JSONResponse({"meta": _meta(200, "OK"), "data": data})
+
+    async def _record(
+        self, key: str, path: str, params: Dict[str, str]
+    ) -> JSONResponse:
+        """Fetch a real response once through the rate-limited client and keep it"""
+        if self._upstream is None:
+            from src.external.bricklink_client import BrickLinkClient
+
+            self._upstream = BrickLinkClient(base_url=self.config.upstream_url)
+
+        url = f"{self._upstream.base_url}{path}"
+        try:
+            response = await asyncio.to_thread(
+                self._upstream._request, url, params or None
+            )
+            body = response.json()
+        except Exception as e:
+            logger.error(f"Upstream request for {key} failed: {e}")
+            self.stats["upstream_errors"] += 1
+            return JSONResponse({"meta": _meta(502, "UPSTREAM_ERROR")}, status_code=502)
+
+        # Only keep successes; throttles and outages should be retried next time
+        if response.status_code == 200:
+            self.fixtures.put(key, response.status_code, body)
+            self.stats["recorded"] += 1
+        return JSONResponse(body, status_code=response.status_code)
+
+
+def create_app(config: Optional[FakeBrickLinkConfig] = None) -> FastAPI:
+    """Build the fake BrickLink FastAPI app"""
+    server = FakeBrickLinkServer(config or FakeBrickLinkConfig())
+    app = FastAPI(title="Fake BrickLink API")
+    app.state.fake_bricklink = server
+
+    @app.get("/items/{item_type}/{item_no}/price")
+    async def price_guide(request: Request, item_type: str, item_no: str):
+        return await server.handle(request, item_type, item_no, "price")
+
+    @app.get("/items/{item_type}/{item_no}")
+    async def item_details(request: Request, item_type: str, item_no: str):
+        return await server.handle(request, item_type, item_no, "item")
+
+    @app.get("/items/{item_type}")
+    async def search_items(request: Request, item_type: str):
+        return await server.handle(request, item_type, None, "search")
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {"mode": server.config.mode, **server.stats}
+
+    @app.post("/_fake/reset")
+    async def reset():
+        server.reset_stats()
+        return {"status": "reset"}
+
+    return app
+
+
+def main():
+    """Run the fake BrickLink server"""
+    parser = argparse.ArgumentParser(
+        description="Local BrickLink stand-in for load testing"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--mode", choices=MODES, default="synthetic")
+    parser.add_argument(
+        "--fixtures",
+        default=FakeBrickLinkConfig.fixtures_path,
+        help="Recorded responses file for record/replay modes",
+    )
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=25.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rps", type=float, help="Hard requests-per-second cap")
+    parser.add_argument("--seed", type=int)
+
+    args = parser.parse_args()
+
+    import uvicorn
+
+    config = FakeBrickLinkConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        requests_per_second=args.rps,
+        mode=args.mode,
+        fixtures_path=args.fixtures,
+        seed=args.seed,
+    )
+    print(f"Fake BrickLink ({config.mode}) on http://{args.host}:{args.port}")
+    print(f"Point the app at it with BRICKLINK_BASE_URL=http://{args.host}:{args.port}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
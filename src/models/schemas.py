@@ -111,3 +111,4 @@ class ImageUpload(BaseModel):
     filename: str
     content_type: str
     size: int
+    content_hash: Optional[str] = None  # SHA-256 of the saved file
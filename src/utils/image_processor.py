@@ -1,6 +1,8 @@
+import hashlib
+import io
 import os
 import uuid
-from typing import Tuple, Optional
+from typing import BinaryIO, Tuple, Optional
 from pathlib import Path
 from PIL import Image
 import magic
@@ -8,6 +10,11 @@ from slugify import slugify
 
 from config.settings import settings
 from src.models.schemas import ImageUpload
+from src.utils.preprocessed_image import PreprocessedImage
+
+# Uploads are read and written in chunks of this size, so an upload costs one
+# chunk of memory however large the file is; libmagic only needs the first
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 
 class ImageProcessor:
@@ -23,8 +30,11 @@ class ImageProcessor:
                 f"File size exceeds maximum allowed size of {settings.max_upload_size} bytes"
             )
 
+        self._validate_type(magic.from_buffer(file_content, mime=True), filename)
+        return True
+
+    def _validate_type(self, mime_type: str, filename: str):
         # Check file type using python-magic
-        mime_type = magic.from_buffer(file_content, mime=True)
         if not mime_type.startswith("image/"):
             raise ValueError(f"File type {mime_type} is not supported")
 
@@ -33,14 +43,27 @@ class ImageProcessor:
         if file_ext and file_ext not in settings.allowed_image_types:
             raise ValueError(f"File extension '{file_ext}' is not allowed")
 
-        return True
-
     def save_image(
         self, file_content: bytes, original_filename: str
     ) -> Tuple[str, ImageUpload]:
         """Save uploaded image and return the saved filename and metadata"""
-        # Validate the image
-        self.validate_image(file_content, original_filename)
+        return self.save_image_stream(io.BytesIO(file_content), original_filename)
+
+    def save_image_stream(
+        self,
+        stream: BinaryIO,
+        original_filename: str,
+        chunk_size: int = UPLOAD_CHUNK_SIZE,
+    ) -> Tuple[str, ImageUpload]:
+        """Validate and save an image from a file-like object, one chunk at a time.
+
+        The type is sniffed from the first chunk, the size limit is enforced
+        as chunks are written and the content is hashed on the way through.
+        A partly written file is removed if validation fails.
+        """
+        chunk = stream.read(chunk_size)
+        mime_type = magic.from_buffer(chunk, mime=True)
+        self._validate_type(mime_type, original_filename)
 
         # Generate unique filename
         file_ext = (
@@ -54,14 +77,29 @@ class ImageProcessor:
 
         # Save file
         file_path = self.upload_dir / new_filename
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(file_path, "wb") as f:
+                while chunk:
+                    size += len(chunk)
+                    if size > settings.max_upload_size:
+                        raise ValueError(
+                            f"File size exceeds maximum allowed size of {settings.max_upload_size} bytes"
+                        )
+                    digest.update(chunk)
+                    f.write(chunk)
+                    chunk = stream.read(chunk_size)
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            raise
 
         # Create metadata
         image_upload = ImageUpload(
             filename=new_filename,
-            content_type=magic.from_buffer(file_content, mime=True),
-            size=len(file_content),
+            content_type=mime_type,
+            size=size,
+            content_hash=digest.hexdigest(),
         )
 
         return str(file_path), image_upload
@@ -70,26 +108,22 @@ class ImageProcessor:
         self, file_path: str, max_size: Tuple[int, int] = (1024, 1024)
     ) -> str:
         """Optimize image for AI processing by resizing if needed"""
-        optimized_dir = self.upload_dir / "optimized"
-        optimized_dir.mkdir(exist_ok=True)
-
-        with Image.open(file_path) as img:
-            # Convert to RGB if necessary
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
+        return self.preprocess(file_path, max_size).path
 
-            # Resize if image is too large
-            if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-
-            # Save optimized version
-            optimized_filename = f"opt_{Path(file_path).name}"
-            optimized_path = optimized_dir / optimized_filename
+    def preprocess(
+        self, file_path: str, max_size: Tuple[int, int] = (1024, 1024)
+    ) -> PreprocessedImage:
+        """Decode an upload once into its AI-ready form and save that alongside it.
 
-            # Save with quality optimization
-            img.save(optimized_path, "JPEG", quality=85, optimize=True)
+        The returned image's path is the optimized JPEG; pass the object on
+        so later steps reuse the decoded pixels instead of reopening the file.
+        """
+        optimized_dir = self.upload_dir / "optimized"
+        optimized_dir.mkdir(exist_ok=True)
 
-            return str(optimized_path)
+        image = PreprocessedImage.open(file_path, max_size, reencode=True)
+        image.save(optimized_dir / f"opt_{Path(file_path).name}")
+        return image
 
     def get_image_info(self, file_path: str) -> dict:
         """Extract basic information from an image"""
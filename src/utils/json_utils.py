@@ -0,0 +1,59 @@
+"""
+Fast JSON Encoding
+orjson-backed encoding for API responses and JSON database columns, with a
+standard-library fallback when orjson is not installed
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from pathlib import Path
+from typing import Any, Union
+
+from pydantic import BaseModel
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles natively (orjson already covers datetimes and enums)"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumpb(obj: Any) -> bytes:
+    """Encode to compact UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        obj, default=_default, ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+def dumps(obj: Any) -> str:
+    """Encode to a compact JSON string (SQLAlchemy json_serializer)"""
+    return dumpb(obj).decode()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text (SQLAlchemy json_deserializer)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
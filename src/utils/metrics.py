@@ -0,0 +1,481 @@
+"""
+Metrics
+Process-wide counters, gauges and histograms, rendered in the Prometheus text
+exposition format for GET /metrics and accumulated across CLI runs
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent CLI runs may lose each other's totals
+    fcntl = None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds in seconds; local work is milliseconds, API calls are seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# A histogram is flagged as slower than usual when this run's mean exceeds the
+# mean of earlier runs by this factor, once they hold enough observations
+REGRESSION_FACTOR = 1.5
+REGRESSION_MIN_OBSERVATIONS = 5
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape_help(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape(value: str) -> str:
+    return _escape_help(value).replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+        + "}"
+    )
+
+
+class Metric:
+    """A named metric family; samples are keyed by label values"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+        self._values: Dict[LabelValues, Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames) or set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Dict[LabelValues, Any]:
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._values.items()}
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def _copy(self, value):
+        return value
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape_help(self.documentation)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for key, value in sorted(self.samples().items()):
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key: LabelValues, value) -> List[str]:
+        return [
+            f"{self.name}{_label_text(self.labelnames, key)} {_format_value(value)}"
+        ]
+
+
+class Counter(Metric):
+    """Monotonic total, e.g. cache hits"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    """Point-in-time value, e.g. a queue depth"""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Histogram(Metric):
+    """Distribution of observations (seconds, by convention) over fixed buckets.
+
+    Each sample holds per-bucket counts (not cumulative; the last one is
+    +Inf), the sum and the count.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = next(
+            (i for i, bound in enumerate(self.buckets) if value <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = {
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            sample["buckets"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the time the block (or decorated function) takes, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            sample = self._values.get(self._key(labels))
+            return sample["count"] if sample else 0
+
+    def _copy(self, value):
+        return {
+            "buckets": list(value["buckets"]),
+            "sum": value["sum"],
+            "count": value["count"],
+        }
+
+    def _render_sample(self, key: LabelValues, value) -> List[str]:
+        names = self.labelnames + ("le",)
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + (math.inf,), value["buckets"]):
+            cumulative += count
+            lines.append(
+                f"{self.name}_bucket{_label_text(names, key + (_format_value(bound),))} {cumulative}"
+            )
+        labels = _label_text(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(value['sum'])}")
+        lines.append(f"{self.name}_count{labels} {value['count']}")
+        return lines
+
+
+class Registry:
+    """The metric families of a process, with collectors run before each render"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"{name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(
+        self, name: str, documentation: str, labels: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter, name, documentation, labels)
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labels)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labels, buckets)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Call collector before every render, e.g. to set gauges read from elsewhere"""
+        self._collectors.append(collector)
+
+    def has_samples(self) -> bool:
+        return any(metric.samples() for metric in self._metrics.values())
+
+    def render(self) -> str:
+        """All families in the Prometheus text exposition format (0.0.4)"""
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(
+        self, kinds: Sequence[str] = ("counter", "gauge", "histogram")
+    ) -> Dict[str, Any]:
+        """JSON-serialisable copy of the samples of the given kinds"""
+        snapshot = {}
+        for name, metric in self._metrics.items():
+            samples = metric.samples()
+            if metric.kind not in kinds or not samples:
+                continue
+            snapshot[name] = {
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "labels": list(metric.labelnames),
+                "samples": [[list(key), value] for key, value in samples.items()],
+            }
+            if isinstance(metric, Histogram):
+                snapshot[name]["buckets"] = list(metric.buckets)
+        return snapshot
+
+    def merge(self, snapshot: Dict[str, Any]):
+        """Add a snapshot's counters and histograms to ours; its gauges replace ours.
+
+        Families whose labels or buckets changed since the snapshot was taken
+        are skipped.
+        """
+        for name, family in snapshot.items():
+            kind, labels = family["kind"], family["labels"]
+            if kind == "histogram":
+                metric = self.histogram(name, family["help"], labels, family["buckets"])
+                if list(metric.buckets) != family["buckets"]:
+                    continue
+            else:
+                metric = (self.counter if kind == "counter" else self.gauge)(
+                    name, family["help"], labels
+                )
+            if list(metric.labelnames) != labels:
+                continue
+
+            with metric._lock:
+                for key, value in family["samples"]:
+                    key = tuple(key)
+                    current = metric._values.get(key)
+                    if kind == "gauge" or current is None:
+                        metric._values[key] = metric._copy(value)
+                    elif kind == "counter":
+                        metric._values[key] = current + value
+                    else:
+                        current["buckets"] = [
+                            a + b for a, b in zip(current["buckets"], value["buckets"])
+                        ]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+
+    def clear(self):
+        """Drop every sample (tests)"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+REGISTRY = Registry()
+
+
+def accumulate(path: Union[str, Path], registry: Registry = REGISTRY) -> Registry:
+    """Add the counters and histograms in registry to the totals kept at path.
+
+    Used at the end of CLI runs, which are too short-lived to be scraped. The
+    totals are kept as JSON at path, and written next to it in the text
+    format (path with a .prom suffix) for node_exporter's textfile collector.
+    Gauges describe a process that is about to exit, so they are not kept.
+    Returns the totals from before this run.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        previous = load(path)
+        totals = Registry()
+        totals.merge(previous.snapshot())
+        totals.merge(registry.snapshot(kinds=("counter", "histogram")))
+
+        for target, content in (
+            (path, json.dumps(totals.snapshot())),
+            (path.with_suffix(".prom"), totals.render()),
+        ):
+            temporary = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+            temporary.write_text(content)
+            os.replace(temporary, target)
+    return previous
+
+
+def load(path: Union[str, Path]) -> Registry:
+    """Registry holding the totals saved by accumulate (empty if there are none yet)"""
+    registry = Registry()
+    try:
+        registry.merge(json.loads(Path(path).read_text()))
+    except FileNotFoundError:
+        pass
+    except ValueError:
+        pass  # Corrupt totals start over rather than break the CLI
+    return registry
+
+
+def slower_than_usual(
+    previous: Registry, current: Registry = REGISTRY, factor: float = REGRESSION_FACTOR
+) -> List[Tuple[str, Dict[str, str], float, float]]:
+    """Histograms whose mean in current is more than factor times their mean in previous.
+
+    Returns (name, labels, current mean, previous mean) for each.
+    """
+    slower = []
+    for name, family in current.snapshot(kinds=("histogram",)).items():
+        before = previous.get(name)
+        if not isinstance(before, Histogram):
+            continue
+        history = before.samples()
+        for key, sample in family["samples"]:
+            usual = history.get(tuple(key))
+            if (
+                not usual
+                or usual["count"] < REGRESSION_MIN_OBSERVATIONS
+                or not usual["sum"]
+            ):
+                continue
+            mean, usual_mean = (
+                sample["sum"] / sample["count"],
+                usual["sum"] / usual["count"],
+            )
+            if mean > usual_mean * factor:
+                slower.append(
+                    (name, dict(zip(family["labels"], key)), mean, usual_mean)
+                )
+    return slower
+
+
+# What the application records. Keep label values to small fixed sets: every
+# combination is a separate time series.
+PIPELINE_STAGE_SECONDS = REGISTRY.histogram(
+    "lego_pipeline_stage_seconds",
+    "Time valuation pipeline stages spend on each job",
+    ["stage"],
+    SLOW_BUCKETS,
+)
+PIPELINE_QUEUE_DEPTH = REGISTRY.gauge(
+    "lego_pipeline_queue_depth",
+    "Jobs waiting for each valuation pipeline stage",
+    ["stage"],
+)
+PIPELINE_IN_FLIGHT = REGISTRY.gauge(
+    "lego_pipeline_in_flight",
+    "Jobs each valuation pipeline stage is working on",
+    ["stage"],
+)
+JOBS = REGISTRY.gauge(
+    "lego_jobs", "Valuation jobs in the queue table by status", ["status"]
+)
+IMAGE_DECODE_SECONDS = REGISTRY.histogram(
+    "lego_image_decode_seconds",
+    "Decoding and resizing an upload for identification",
+)
+IMAGE_MATCH_SECONDS = REGISTRY.histogram(
+    "lego_image_match_seconds",
+    "Feature matching an image against the minifigure database",
+    buckets=SLOW_BUCKETS,
+)
+CLAUDE_REQUEST_SECONDS = REGISTRY.histogram(
+    "lego_claude_request_seconds",
+    "Claude API identification calls",
+    ["model"],
+    SLOW_BUCKETS,
+)
+BRICKLINK_REQUEST_SECONDS = REGISTRY.histogram(
+    "lego_bricklink_request_seconds",
+    "BrickLink API calls, including retries and rate limiting waits",
+    ["endpoint", "outcome"],
+    SLOW_BUCKETS,
+)
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "lego_db_write_seconds", "Database writes", ["operation"]
+)
+REPORT_RENDER_SECONDS = REGISTRY.histogram(
+    "lego_report_render_seconds",
+    "Rendering report files",
+    ["format"],
+    SLOW_BUCKETS,
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "lego_http_request_seconds",
+    "API requests until the response is sent",
+    ["method", "route", "status"],
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    "lego_cache_requests_total", "Cache lookups", ["cache", "result"]
+)
+RATE_LIMIT_WAITS = REGISTRY.counter(
+    "lego_rate_limit_waits_total",
+    "Calls held back by a rate limiter",
+    ["limiter"],
+)
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.counter(
+    "lego_rate_limit_wait_seconds_total",
+    "Time spent waiting on rate limiters",
+    ["limiter"],
+)
+CLI_RUN_SECONDS = REGISTRY.histogram(
+    "lego_cli_run_seconds",
+    "main.py commands from start to exit",
+    ["command"],
+    SLOW_BUCKETS,
+)
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a lookup in one of the application's caches"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_rate_limit_wait(limiter: str, seconds: float):
+    """Count a call a rate limiter made wait"""
+    RATE_LIMIT_WAITS.inc(limiter=limiter)
+    RATE_LIMIT_WAIT_SECONDS.inc(seconds, limiter=limiter)
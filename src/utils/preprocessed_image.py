@@ -0,0 +1,158 @@
+"""
+Preprocessed Image
+An upload decoded once, with the variants each pipeline step needs
+"""
+
+import base64
+import hashlib
+import io
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from src.utils.metrics import IMAGE_DECODE_SECONDS
+
+# What Claude is sent: RGB JPEG no larger than this
+AI_MAX_SIZE = (1024, 1024)
+AI_JPEG_QUALITY = 85
+
+
+class PreprocessedImage:
+    """An image decoded once and shared by every step that looks at it.
+
+    Holds the AI-ready JPEG bytes and their pixels as a BGR array (OpenCV's
+    layout). The grayscale and HSV variants are converted on first use and
+    cached, so the matcher, quality checks and local analysis share one
+    conversion. Pickles without the cached variants, for process pools.
+    """
+
+    media_type = "image/jpeg"
+
+    def __init__(
+        self,
+        pixels: np.ndarray,
+        jpeg_bytes: bytes,
+        content_hash: str,
+        path: Optional[str] = None,
+    ):
+        self.pixels = pixels
+        self.jpeg_bytes = jpeg_bytes
+        self.content_hash = content_hash
+        self.path = path
+        self._gray: Optional[np.ndarray] = None
+        self._hsv: Optional[np.ndarray] = None
+        self._base64: Optional[str] = None
+
+    @classmethod
+    @IMAGE_DECODE_SECONDS.time()
+    def from_bytes(
+        cls,
+        data: bytes,
+        max_size: Tuple[int, int] = AI_MAX_SIZE,
+        reencode: bool = False,
+        path: Optional[str] = None,
+    ) -> "PreprocessedImage":
+        """Decode an encoded image, converting to RGB and shrinking to max_size.
+
+        An RGB JPEG already within max_size keeps its bytes unless reencode
+        is set; anything else is re-encoded as a JPEG.
+        """
+        with Image.open(io.BytesIO(data)) as img:
+            is_ai_ready = img.format == "JPEG" and img.mode == "RGB"
+            rgb = img.convert("RGB") if img.mode != "RGB" else img
+            if rgb.width > max_size[0] or rgb.height > max_size[1]:
+                rgb.thumbnail(max_size, Image.Resampling.LANCZOS)
+                is_ai_ready = False
+
+            if is_ai_ready and not reencode:
+                jpeg_bytes = data
+            else:
+                buffer = io.BytesIO()
+                rgb.save(buffer, "JPEG", quality=AI_JPEG_QUALITY, optimize=True)
+                jpeg_bytes = buffer.getvalue()
+
+            pixels = np.ascontiguousarray(np.asarray(rgb)[:, :, ::-1])  # RGB -> BGR
+
+        return cls(pixels, jpeg_bytes, hashlib.sha256(data).hexdigest(), path)
+
+    @classmethod
+    def open(
+        cls,
+        path: Union[str, Path],
+        max_size: Tuple[int, int] = AI_MAX_SIZE,
+        reencode: bool = False,
+    ) -> "PreprocessedImage":
+        """Read and decode an image file"""
+        return cls.from_bytes(
+            Path(path).read_bytes(), max_size, reencode, path=str(path)
+        )
+
+    def save(self, path: Union[str, Path]) -> str:
+        """Write the AI-ready JPEG and remember where it is"""
+        Path(path).write_bytes(self.jpeg_bytes)
+        self.path = str(path)
+        return self.path
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def gray(self) -> np.ndarray:
+        if self._gray is None:
+            import cv2
+
+            self._gray = cv2.cvtColor(self.pixels, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    @property
+    def hsv(self) -> np.ndarray:
+        if self._hsv is None:
+            import cv2
+
+            self._hsv = cv2.cvtColor(self.pixels, cv2.COLOR_BGR2HSV)
+        return self._hsv
+
+    def base64(self) -> str:
+        """The AI-ready JPEG, base64 encoded for the Claude API"""
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self.jpeg_bytes).decode("utf-8")
+        return self._base64
+
+    def without_jpeg(self) -> "PreprocessedImage":
+        """A copy holding only the pixels, for process pool work that never reads the JPEG.
+
+        Keeps what is pickled to the pool down to the one array the matcher
+        uses (it derives grayscale and HSV from it in the child).
+        """
+        return PreprocessedImage(self.pixels, b"", self.content_hash, self.path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_gray=None, _hsv=None, _base64=None)
+        return state
+
+    def __repr__(self) -> str:
+        return f"PreprocessedImage({self.path or self.content_hash[:12]}, {self.width}x{self.height})"
+
+
+def preprocess(image: Union[str, Path, PreprocessedImage]) -> PreprocessedImage:
+    """The preprocessed image for image, decoding it if given a path"""
+    return (
+        image if isinstance(image, PreprocessedImage) else PreprocessedImage.open(image)
+    )
+
+
+def image_location(image: Union[str, Path, PreprocessedImage]) -> Optional[str]:
+    """Path of an image given either way, for logging and reports"""
+    return image.path if isinstance(image, PreprocessedImage) else str(image)
@@ -1,10 +1,16 @@
 import time
 import asyncio
-from typing import Dict, List
+import random
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
 from collections import deque
 from dataclasses import dataclass
 import logging
 
+from config.settings import settings
+from src.utils.metrics import record_rate_limit_wait
+
 logger = logging.getLogger(__name__)
 
 
@@ -116,6 +122,7 @@ class AnthropicRateLimiter:
         
         if wait_time > 0:
             logger.info(f"Rate limiting: waiting {wait_time:.1f} seconds for API capacity")
+            record_rate_limit_wait("anthropic", wait_time)
             await asyncio.sleep(wait_time)
     
     def record_usage(self, input_tokens: int, output_tokens: int = 0):
@@ -150,4 +157,249 @@ class AnthropicRateLimiter:
             'max_requests_per_minute': self.max_requests_per_minute,
             'input_tokens_remaining': max(0, self.max_input_tokens_per_minute - current_usage['input_tokens']),
             'requests_remaining': max(0, self.max_requests_per_minute - current_usage['requests']),
-        }
\ No newline at end of file
+        }
+
+
+class QuotaExceededError(Exception):
+    """Raised when the daily API quota has been used up"""
+
+
+class CircuitBreakerOpenError(Exception):
+    """Raised when a call is rejected because the circuit breaker is open"""
+
+
+class BrickLinkRateLimiter:
+    """Token bucket limiter sized to BrickLink's per-second and daily quotas.
+
+    The refill rate adapts to throttling: a 429 halves the rate and each
+    success restores it gradually (AIMD) up to the configured maximum.
+    Thread-safe, since BrickLink calls run in worker threads.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: float = 5.0,
+        burst: int = 10,
+        daily_quota: int = 5000,
+        min_rate: float = 0.2,
+    ):
+        self.max_rate = requests_per_second
+        self.rate = requests_per_second
+        self.min_rate = min(min_rate, requests_per_second)
+        self.burst = burst
+        self.daily_quota = daily_quota
+
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.quota_day = datetime.utcnow().date()
+        self.daily_count = 0
+        self.total_wait_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Add tokens for the time elapsed since the last refill"""
+        now = time.monotonic()
+        self.tokens = min(
+            self.burst, self.tokens + (now - self.last_refill) * self.rate
+        )
+        self.last_refill = now
+
+        # Daily quota resets at UTC midnight, like BrickLink's
+        today = datetime.utcnow().date()
+        if today != self.quota_day:
+            self.quota_day = today
+            self.daily_count = 0
+
+    def _reserve(self) -> float:
+        """Take a token, returning how long the caller must wait for it"""
+        with self.lock:
+            self._refill()
+            if self.daily_count >= self.daily_quota:
+                raise QuotaExceededError(
+                    f"BrickLink daily quota of {self.daily_quota} requests exhausted"
+                )
+            self.daily_count += 1
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            wait_time = -self.tokens / self.rate
+            self.total_wait_seconds += wait_time
+            record_rate_limit_wait("bricklink", wait_time)
+            return wait_time
+
+    def acquire(self):
+        """Block until a request may be made"""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.debug(f"BrickLink rate limiting: waiting {wait_time:.2f} seconds")
+            time.sleep(wait_time)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be made"""
+        wait_time = self._reserve()
+        if wait_time > 0:
+            logger.debug(f"BrickLink rate limiting: waiting {wait_time:.2f} seconds")
+            await asyncio.sleep(wait_time)
+
+    def record_throttled(self):
+        """Back off after a 429 response"""
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+        logger.warning(f"BrickLink throttled us - rate reduced to {self.rate:.2f}/s")
+
+    def record_success(self):
+        """Recover towards the configured rate after a successful call"""
+        if self.rate < self.max_rate:
+            with self.lock:
+                self.rate = min(self.max_rate, self.rate + 0.1 * self.max_rate)
+
+    def get_usage_stats(self) -> Dict:
+        """Get current usage statistics"""
+        with self.lock:
+            self._refill()
+            return {
+                "current_rate": self.rate,
+                "max_rate": self.max_rate,
+                "tokens_available": max(0.0, self.tokens),
+                "daily_requests": self.daily_count,
+                "daily_quota": self.daily_quota,
+                "daily_remaining": max(0, self.daily_quota - self.daily_count),
+                "total_wait_seconds": self.total_wait_seconds,
+            }
+
+
+class CircuitBreaker:
+    """Circuit breaker with half-open probes.
+
+    closed -> open after failure_threshold consecutive failures; open ->
+    half_open once recovery_timeout has passed, letting a limited number of
+    probe calls through; a successful probe closes it, a failed one reopens.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+
+        self._state = self.CLOSED
+        self.failure_count = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_calls = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half_open once the timeout has passed"""
+        with self.lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self.opened_at >= self.recovery_timeout
+        ):
+            self._state = self.HALF_OPEN
+            self.half_open_calls = 0
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected outright"""
+        return self.state == self.OPEN
+
+    def allow_request(self) -> bool:
+        """Check whether a call may proceed, reserving a probe slot if half-open"""
+        with self.lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if (
+                state == self.HALF_OPEN
+                and self.half_open_calls < self.half_open_max_calls
+            ):
+                self.half_open_calls += 1
+                return True
+            return False
+
+    def release_probe(self):
+        """Give back a half-open probe slot for a call that never reached the service"""
+        with self.lock:
+            if self._state == self.HALF_OPEN and self.half_open_calls > 0:
+                self.half_open_calls -= 1
+
+    def record_success(self):
+        """Record a successful call, closing the breaker"""
+        with self.lock:
+            if self._state != self.CLOSED:
+                logger.info("Circuit breaker closed after successful probe")
+            self._state = self.CLOSED
+            self.failure_count = 0
+            self.half_open_calls = 0
+
+    def record_failure(self):
+        """Record a failed call, opening the breaker when the threshold is hit"""
+        with self.lock:
+            self.failure_count += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self.failure_count >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Circuit breaker opened after {self.failure_count} failures"
+                    )
+                self._state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.half_open_calls = 0
+
+    def get_status(self) -> Dict:
+        """Get breaker status for reporting"""
+        return {
+            "state": self.state,
+            "failure_count": self.failure_count,
+            "failure_threshold": self.failure_threshold,
+            "recovery_timeout": self.recovery_timeout,
+        }
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(max_delay, base_delay * (2**attempt)))
+
+
+# BrickLink quotas are per account, so every client in the process shares these
+_bricklink_rate_limiter: Optional[BrickLinkRateLimiter] = None
+_bricklink_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def get_bricklink_rate_limiter() -> BrickLinkRateLimiter:
+    """Get the process-wide BrickLink rate limiter"""
+    global _bricklink_rate_limiter
+    if _bricklink_rate_limiter is None:
+        _bricklink_rate_limiter = BrickLinkRateLimiter(
+            requests_per_second=settings.bricklink_requests_per_second,
+            burst=settings.bricklink_burst,
+            daily_quota=settings.bricklink_daily_quota,
+        )
+    return _bricklink_rate_limiter
+
+
+def get_bricklink_circuit_breaker() -> CircuitBreaker:
+    """Get the process-wide BrickLink circuit breaker"""
+    global _bricklink_circuit_breaker
+    if _bricklink_circuit_breaker is None:
+        _bricklink_circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.bricklink_breaker_failure_threshold,
+            recovery_timeout=settings.bricklink_breaker_recovery_seconds,
+        )
+    return _bricklink_circuit_breaker
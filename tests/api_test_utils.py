@@ -226,8 +226,10 @@ class MockFactory:
         upload_info.filename = filename
         upload_info.size = 12345
         upload_info.content_type = "image/jpeg"
+        upload_info.content_hash = None
         
         mock.save_image.return_value = (file_path, upload_info)
+        mock.save_image_stream.return_value = (file_path, upload_info)
         mock.optimize_image_for_ai.return_value = "/tmp/optimized.jpg"
         return mock
     
@@ -0,0 +1,75 @@
+"""
+Fixtures and helpers shared by the test modules
+"""
+
+import pytest
+from datetime import datetime
+
+from src.database.database import DatabaseManager
+from src.database.repository import JobRepository, ValuationRepository
+from src.models.schemas import (
+    IdentificationResult,
+    ItemCondition,
+    ItemType,
+    ItemValuation,
+    LegoItem,
+    MarketData,
+    RecommendationCategory,
+    ValuationReport,
+    ValuationResult,
+)
+
+
+def make_report(i):
+    """Valuation report for one Star Wars figure, numbered i"""
+    item = LegoItem(
+        item_number=f"sw{i:04d}",
+        name=f"Figure {i}",
+        item_type=ItemType.MINIFIGURE,
+        condition=ItemCondition.USED_COMPLETE,
+        theme="Star Wars",
+    )
+    return ValuationReport(
+        image_filename=f"figure{i}.jpg",
+        upload_timestamp=datetime(2024, 1, 1, 12, 0),
+        identification=IdentificationResult(
+            confidence_score=0.9,
+            identified_items=[item],
+            description="A figure",
+            condition_assessment="Good",
+        ),
+        valuation=ValuationResult(
+            estimated_value=10.0 + i,
+            confidence_score=0.8,
+            recommendation=RecommendationCategory.RESALE,
+            reasoning="Steady demand",
+            suggested_platforms=["ebay"],
+            market_data=MarketData(current_price=10.0),
+            individual_valuations=[
+                ItemValuation(
+                    item=item,
+                    estimated_individual_value_usd=10.0 + i,
+                    confidence_score=0.8,
+                )
+            ],
+        ),
+        notes="Boxed",
+    )
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    """Migrated SQLite database in the test's temporary directory"""
+    db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+    db_manager.init_db()
+    return db_manager
+
+
+@pytest.fixture
+def repository(db_manager):
+    return ValuationRepository(db_manager)
+
+
+@pytest.fixture
+def job_repository(db_manager):
+    return JobRepository(db_manager)
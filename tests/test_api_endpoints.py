@@ -2,10 +2,12 @@
 Tests for FastAPI endpoints in the LEGO Valuation System.
 """
 
+import hashlib
 import pytest
 import tempfile
 import json
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
 from unittest.mock import Mock, patch, AsyncMock
@@ -33,8 +35,14 @@ try:
     from src.api.main import app, get_db
     from src.database.database import Base
     from src.models.schemas import (
-        IdentificationResult, ValuationResult, LegoItem, 
-        ItemType, ItemCondition, RecommendationCategory, PlatformType
+        IdentificationResult,
+        ValuationResult,
+        LegoItem,
+        ItemType,
+        ItemCondition,
+        RecommendationCategory,
+        PlatformType,
+        ImageUpload,
     )
 except ImportError as e:
     pytest.skip(f"Missing project dependencies: {e}", allow_module_level=True)
@@ -73,8 +81,9 @@ if TestClient is None:
 if create_engine is None:
     pytest.skip("SQLAlchemy not available - install sqlalchemy", allow_module_level=True)
 
-# Test database setup - use in-memory SQLite for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database setup - use in-memory SQLite for testing. A named shared-cache
+# database lets the sync and async (aiosqlite) engines see the same tables.
+SQLALCHEMY_DATABASE_URL = "sqlite:///file:api_tests?mode=memory&cache=shared&uri=true"
 
 try:
     from sqlalchemy.pool import StaticPool
@@ -92,18 +101,43 @@ except ImportError:
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from src.api.main import get_async_db
+
+# NullPool: the sync engine's open connection keeps the shared database alive,
+# and no aiosqlite worker thread outlives its request
+async_engine = create_async_engine(
+    SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://"),
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+
+# StaticPool hands every session the same connection, so requests from
+# concurrent test threads take turns instead of interleaving transactions
+_db_lock = threading.Lock()
+
 
 def override_get_db():
     """Override database dependency for testing"""
-    try:
-        db = TestingSessionLocal()
+    with _db_lock:
+        try:
+            db = TestingSessionLocal()
+            yield db
+        finally:
+            db.close()
+
+
+async def override_get_async_db():
+    """Override async database dependency for testing"""
+    async with TestingAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 # Override the dependency
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
 
 # Create test client
 client = TestClient(app)
@@ -201,6 +235,17 @@ class TestAPIEndpoints:
         """Mock image processor for testing"""
         with patch('src.api.main.image_processor') as mock:
             mock.save_image.return_value = ("/tmp/test.jpg", Mock(filename="test.jpg"))
+
+            def save_image_stream(stream, filename):
+                data = stream.read()
+                return "/tmp/test.jpg", ImageUpload(
+                    filename="test.jpg",
+                    content_type="image/jpeg",
+                    size=len(data),
+                    content_hash=hashlib.sha256(data).hexdigest(),
+                )
+
+            mock.save_image_stream.side_effect = save_image_stream
             mock.optimize_image_for_ai.return_value = "/tmp/optimized.jpg"
             yield mock
 
@@ -254,7 +299,7 @@ class TestUploadEndpoint(TestAPIEndpoints):
             assert "message" in data
             
             # Verify mocks were called
-            mock_image_processor.save_image.assert_called_once()
+            mock_image_processor.save_image_stream.assert_called_once()
             mock_image_processor.optimize_image_for_ai.assert_called_once()
         except Exception as e:
             pytest.skip(f"Upload test failed due to setup issue: {e}")
@@ -284,10 +329,87 @@ class TestUploadEndpoint(TestAPIEndpoints):
         assert response.status_code == 200
         # Notes should be passed to background task
     
+    def test_upload_queues_job(self, test_image, mock_image_processor):
+        """Test uploads are persisted as queued valuation jobs"""
+        import asyncio
+        from src.database.repository import JobRepository
+
+        def optimize(path):
+            # Resizing blocks, so it must not run on the event loop
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()
+            return "/tmp/optimized.jpg"
+
+        mock_image_processor.optimize_image_for_ai.side_effect = optimize
+        with open(test_image, "rb") as f:
+            response = client.post(
+                "/upload?notes=Attic",
+                files={"file": ("test.jpg", f, "image/jpeg")},
+            )
+
+        assert response.status_code == 200
+        db = TestingSessionLocal()
+        try:
+            job = JobRepository(db).get_job(response.json()["job_id"])
+        finally:
+            db.close()
+        assert job["status"] == "queued"
+        assert job["image_path"] == "/tmp/optimized.jpg"
+        assert job["notes"] == "Attic"
+        mock_image_processor.optimize_image_for_ai.assert_called_once()
+
+    def test_upload_batch_dedupes_and_tracks_progress(
+        self, test_image, mock_image_processor
+    ):
+        """Test batch uploads of images and archives register one deduplicated batch"""
+        import io
+        import zipfile
+
+        image_bytes = Path(test_image).read_bytes()
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("lot/boba.jpg", image_bytes)  # Same bytes as the loose upload
+            zf.writestr("lot/vader.jpg", image_bytes + b"\0")
+            zf.writestr("__MACOSX/lot/._vader.jpg", b"")
+
+        response = client.post(
+            "/upload/batch?notes=Estate",
+            files=[
+                ("files", ("luke.jpg", image_bytes, "image/jpeg")),
+                ("files", ("lot.zip", archive.getvalue(), "application/zip")),
+            ],
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert (
+            data["total_files"],
+            data["queued"],
+            data["duplicates"],
+            data["rejected"],
+        ) == (3, 2, 1, 0)
+        assert data["files"][1]["job_id"] == data["files"][0]["job_id"]
+        assert data["status_url"] == f"/batches/{data['batch_id']}"
+
+        status = client.get(data["status_url"]).json()
+        assert status["status"] == "processing"
+        assert status["jobs"] == {"queued": 2}
+        assert (
+            status["queued_files"],
+            status["duplicate_files"],
+            status["progress"],
+        ) == (2, 1, 0.0)
+        job = client.get(f"/jobs/{data['files'][0]['job_id']}").json()
+        assert job["batch_id"] == data["batch_id"]
+
+    def test_batch_not_found(self):
+        """Test status of a batch that does not exist"""
+        assert client.get("/batches/99999").status_code == 404
+
     @patch('src.api.main.image_processor')
     def test_upload_image_processing_error(self, mock_processor, test_image):
         """Test upload when image processing fails"""
-        mock_processor.save_image.side_effect = ValueError("Invalid image")
+        mock_processor.save_image_stream.side_effect = ValueError("Invalid image")
         
         with open(test_image, 'rb') as f:
             response = client.post(
@@ -305,25 +427,37 @@ class TestBackgroundProcessing(TestAPIEndpoints):
     
     @pytest.mark.asyncio
     async def test_process_image_valuation(
-        self, mock_lego_identifier, mock_valuation_engine
+        self,
+        mock_lego_identifier,
+        mock_valuation_engine,
+        db_manager,
+        test_image,
+        tmp_path,
     ):
-        """Test background image valuation processing"""
-        from src.api.main import process_image_valuation
-        
-        db = TestingSessionLocal()
-        try:
-            await process_image_valuation(
-                "/tmp/test.jpg", 
-                "test.jpg", 
-                "Test notes", 
-                db
-            )
-            
-            # Verify components were called
-            mock_lego_identifier.identify_lego_items.assert_called_once_with("/tmp/test.jpg")
-            mock_valuation_engine.evaluate_item.assert_called_once()
-        finally:
-            db.close()
+        """Test queued uploads are valued by the job pipeline"""
+        from src.core.job_worker import JobWorkerPool, ValuationPipeline
+        from src.database.repository import JobRepository, ValuationRepository
+
+        report_generator = Mock(
+            generate_pdf=Mock(return_value=str(tmp_path / "report.pdf"))
+        )
+        pipeline = ValuationPipeline(
+            mock_lego_identifier, mock_valuation_engine, report_generator, db_manager
+        )
+        job_id = JobRepository(db_manager).enqueue(test_image, "test.jpg", "Test notes")
+
+        assert (
+            await JobWorkerPool(db_manager, pipeline, workers=1).run_until_empty() == 1
+        )
+
+        # Verify components were called
+        image = mock_lego_identifier.identify_lego_items.call_args[0][0]
+        assert image.path == test_image
+        mock_valuation_engine.evaluate_item.assert_called_once()
+        job = JobRepository(db_manager).get_job(job_id)
+        assert job["status"] == "succeeded"
+        report = ValuationRepository(db_manager).get_report(job["valuation_record_id"])
+        assert report.notes == "Test notes"
 
 
 @pytest.mark.api
@@ -361,6 +495,335 @@ class TestValuationsEndpoint(TestAPIEndpoints):
         assert isinstance(data["valuations"], list)
         assert isinstance(data["total"], int)
 
+    def test_list_valuations_cursor(self):
+        """Test walking pages with next_cursor"""
+        from src.database.models import ValuationRecord
+        from src.database.repository import invalidate_valuation_count
+
+        db = TestingSessionLocal()
+        try:
+            for i in range(5):
+                db.add(
+                    ValuationRecord(
+                        image_filename=f"page{i}.jpg",
+                        created_at=datetime(2024, 1, i + 1),
+                    )
+                )
+            db.commit()
+        finally:
+            db.close()
+        invalidate_valuation_count()
+
+        first = client.get("/valuations?limit=3").json()
+        second = client.get(f"/valuations?limit=3&cursor={first['next_cursor']}").json()
+
+        assert first["total"] == 5
+        assert [v["image_filename"] for v in first["valuations"]] == [
+            "page4.jpg",
+            "page3.jpg",
+            "page2.jpg",
+        ]
+        assert [v["image_filename"] for v in second["valuations"]] == [
+            "page1.jpg",
+            "page0.jpg",
+        ]
+        assert second["next_cursor"] is None
+        assert client.get("/valuations?include_total=false").json()["total"] is None
+
+    def test_search_valuations(self):
+        """Test searching valuations (LIKE fallback on the migration-free test database)"""
+        from src.database.models import ValuationRecord
+
+        db = TestingSessionLocal()
+        try:
+            db.add(
+                ValuationRecord(
+                    image_filename="boba.jpg",
+                    identification_data={
+                        "identified_items": [
+                            {"name": "Boba Fett", "item_number": "sw0002"}
+                        ]
+                    },
+                )
+            )
+            db.add(
+                ValuationRecord(image_filename="other.jpg", reasoning="Common figure")
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        data = client.get("/valuations/search?q=Boba%20Fett").json()
+
+        assert [v["image_filename"] for v in data["valuations"]] == ["boba.jpg"]
+        assert client.get("/valuations/search?q=").status_code == 422
+
+    def test_get_valuation_detail(self):
+        """Test the detail payload encodes JSON columns and datetimes"""
+        from src.database.models import ValuationRecord
+
+        db = TestingSessionLocal()
+        try:
+            record = ValuationRecord(
+                image_filename="detail.jpg",
+                identification_data={
+                    "identified_items": [{"item_number": "sw0002", "name": "Boba Fett"}]
+                },
+                market_data={"current_price": 40.0},
+                estimated_value=40.0,
+                created_at=datetime(2024, 1, 15, 14, 30, 22),
+            )
+            db.add(record)
+            db.commit()
+            valuation_id = record.id
+        finally:
+            db.close()
+
+        response = client.get(f"/valuations/{valuation_id}")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["created_at"] == "2024-01-15T14:30:22"
+        assert data["identification"]["identified_items"][0]["name"] == "Boba Fett"
+        assert data["market_data"]["current_price"] == 40.0
+
+    def test_get_valuation_detail_from_report_blob(self):
+        """Test saved valuations are served from their gzip report blob"""
+        from src.database.repository import ValuationRepository
+        from src.models.schemas import ValuationReport
+
+        report = ValuationReport(
+            image_filename="blob.jpg",
+            upload_timestamp=datetime(2024, 2, 1, 9, 0),
+            identification=IdentificationResult(
+                confidence_score=0.9,
+                identified_items=[TestDataFactory.create_lego_item()],
+                description="Blob figure",
+                condition_assessment="Good",
+            ),
+            valuation=ValuationResult(
+                estimated_value=25.0,
+                confidence_score=0.8,
+                recommendation=RecommendationCategory.RESALE,
+                reasoning="Stored once",
+                suggested_platforms=[PlatformType.BRICKLINK],
+            ),
+        )
+        db = TestingSessionLocal()
+        try:
+            valuation_id = ValuationRepository(db).save_valuation(report)
+            db.commit()
+        finally:
+            db.close()
+
+        response = client.get(
+            f"/valuations/{valuation_id}", headers={"Accept-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        data = response.json()
+        assert data["id"] == valuation_id
+        assert data["reasoning"] == "Stored once"
+        assert data["identification"]["description"] == "Blob figure"
+
+        plain = client.get(
+            f"/valuations/{valuation_id}", headers={"Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == data
+
+    def test_valuation_detail_follows_market_data_updates(self):
+        """Test updating a saved valuation re-renders its report blob"""
+        from src.database.repository import ValuationRepository
+        from src.models.schemas import MarketData, ValuationReport
+
+        report = ValuationReport(
+            image_filename="repriced.jpg",
+            upload_timestamp=datetime(2024, 2, 1, 9, 0),
+            identification=IdentificationResult(
+                confidence_score=0.9,
+                identified_items=[TestDataFactory.create_lego_item()],
+                description="Repriced figure",
+                condition_assessment="Good",
+            ),
+            valuation=ValuationResult(
+                estimated_value=25.0,
+                confidence_score=0.8,
+                recommendation=RecommendationCategory.RESALE,
+                reasoning="Stored once",
+                suggested_platforms=[PlatformType.BRICKLINK],
+                market_data=MarketData(current_price=20.0),
+            ),
+        )
+        db = TestingSessionLocal()
+        try:
+            repo = ValuationRepository(db)
+            valuation_id = repo.save_valuation(report)
+            db.commit()
+            before = client.get(f"/valuations/{valuation_id}")
+
+            repo.save_market_data(
+                valuation_id,
+                "sw0001a",
+                "Luke",
+                MarketData(current_price=55.0, times_sold=4),
+            )
+            repo.update_valuation_status(valuation_id, "reviewed")
+            db.commit()
+        finally:
+            db.close()
+
+        response = client.get(
+            f"/valuations/{valuation_id}",
+            headers={"If-None-Match": before.headers["etag"]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["market_data"]["current_price"] == 55.0
+        assert data["valuation"]["market_data"]["times_sold"] == 4
+        assert data["reasoning"] == "Stored once"
+
+    def test_valuation_detail_revalidation(self):
+        """Test unchanged valuations are revalidated with a 304"""
+        from src.database.models import ValuationRecord
+
+        db = TestingSessionLocal()
+        try:
+            record = ValuationRecord(
+                image_filename="cached.jpg",
+                estimated_value=40.0,
+                created_at=datetime(2024, 1, 15, 14, 30, 22),
+                updated_at=datetime(2024, 1, 15, 14, 30, 22, 500),
+            )
+            db.add(record)
+            db.commit()
+            valuation_id = record.id
+        finally:
+            db.close()
+
+        response = client.get(f"/valuations/{valuation_id}")
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+        assert response.headers["last-modified"] == "Mon, 15 Jan 2024 14:30:22 GMT"
+
+        cached = client.get(
+            f"/valuations/{valuation_id}", headers={"If-None-Match": etag}
+        )
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+        assert (
+            client.get(
+                f"/valuations/{valuation_id}",
+                headers={"If-None-Match": f'"other", W/{etag}'},
+            ).status_code
+            == 304
+        )
+        assert (
+            client.get(
+                f"/valuations/{valuation_id}",
+                headers={"If-Modified-Since": response.headers["last-modified"]},
+            ).status_code
+            == 304
+        )
+        assert (
+            client.get(
+                f"/valuations/{valuation_id}",
+                headers={"If-Modified-Since": "Mon, 15 Jan 2024 14:30:21 GMT"},
+            ).status_code
+            == 200
+        )
+
+        db = TestingSessionLocal()
+        try:
+            db.get(ValuationRecord, valuation_id).notes = "Repriced"
+            db.commit()
+        finally:
+            db.close()
+
+        changed = client.get(
+            f"/valuations/{valuation_id}", headers={"If-None-Match": etag}
+        )
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+
+    def test_generate_report_not_modified(self, tmp_path):
+        """Test a client holding the current report is not sent it again"""
+        from src.api import main
+        from src.database.models import ValuationRecord
+
+        db = TestingSessionLocal()
+        try:
+            record = ValuationRecord(
+                image_filename="legacy.jpg",
+                identification_data={"confidence_score": 0.7, "identified_items": []},
+                estimated_value=12.0,
+                valuation_confidence=0.5,
+                recommendation_category="collection",
+                reasoning="Legacy row",
+                suggested_platforms=[],
+                created_at=datetime(2023, 5, 1),
+            )
+            db.add(record)
+            db.commit()
+            valuation_id = record.id
+        finally:
+            db.close()
+
+        with patch.object(main.report_generator, "output_dir", tmp_path):
+            html = client.get(f"/reports/generate/{valuation_id}?format=html")
+            pdf = client.get(f"/reports/generate/{valuation_id}?format=pdf")
+        assert html.headers["etag"] != pdf.headers["etag"]
+
+        with patch.object(main.report_generator, "generate_html") as generate:
+            response = client.get(
+                f"/reports/generate/{valuation_id}?format=html",
+                headers={"If-None-Match": html.headers["etag"]},
+            )
+        assert response.status_code == 304
+        generate.assert_not_called()
+
+    def test_generate_html_report_from_stored_valuation(self, tmp_path):
+        """Test reports are regenerated from the stored report"""
+        from src.api import main
+        from src.database.models import ValuationRecord
+
+        db = TestingSessionLocal()
+        try:
+            record = ValuationRecord(
+                image_filename="legacy.jpg",
+                identification_data={"confidence_score": 0.7, "identified_items": []},
+                estimated_value=12.0,
+                valuation_confidence=0.5,
+                recommendation_category="collection",
+                reasoning="Legacy row",
+                suggested_platforms=[],
+                created_at=datetime(2023, 5, 1),
+            )
+            db.add(record)
+            db.commit()
+            valuation_id = record.id
+        finally:
+            db.close()
+
+        with patch.object(main.report_generator, "output_dir", tmp_path):
+            response = client.get(f"/reports/generate/{valuation_id}?format=html")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/html")
+        assert "Legacy row" in response.text
+
+    def test_generate_report_unsupported_format(self):
+        """Test unknown report formats are rejected"""
+        response = client.get("/reports/generate/1?format=docx")
+        assert response.status_code == 400
+
+    def test_list_valuations_invalid_cursor(self):
+        """Test malformed cursors are rejected"""
+        response = client.get("/valuations?cursor=garbage")
+        assert response.status_code == 400
+
 
 @pytest.mark.api
 class TestValuationDetailEndpoint(TestAPIEndpoints):
@@ -392,6 +855,45 @@ class TestInventoryEndpoint(TestAPIEndpoints):
         assert "recent_items" in data
         assert isinstance(data["recent_items"], list)
     
+    def test_inventory_revalidation_by_content(self):
+        """Test the inventory ETag falls back to a hash without version triggers"""
+        response = client.get("/inventory")
+        etag = response.headers["etag"]
+        assert etag.startswith('W/"')
+
+        assert (
+            client.get("/inventory", headers={"If-None-Match": etag}).status_code == 304
+        )
+
+    def test_inventory_revalidation_by_version(self):
+        """Test the inventory ETag follows the inventory_items change counter"""
+        from src.database.migrations import create_table_versions
+        from src.database.models import InventoryItem
+
+        with engine.begin() as conn:
+            create_table_versions(conn)
+        etag = client.get("/inventory").headers["etag"]
+        assert etag.startswith('W/"inventory-')
+        assert (
+            client.get("/inventory", headers={"If-None-Match": etag}).status_code == 304
+        )
+
+        db = TestingSessionLocal()
+        try:
+            db.add(
+                InventoryItem(
+                    item_name="Boba Fett", item_type="minifigure", estimated_value=40.0
+                )
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        response = client.get("/inventory", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["recent_items"][0]["item_name"] == "Boba Fett"
+
     def test_add_to_inventory_not_found(self):
         """Test adding non-existent valuation to inventory"""
         response = client.post("/inventory/add/999?location=Shelf A")
@@ -430,6 +932,152 @@ class TestReportEndpoint(TestAPIEndpoints):
         assert response.status_code == 422  # Validation error
 
 
+@pytest.mark.api
+class TestJobEndpoints(TestAPIEndpoints):
+    """Test job status and progress stream endpoints"""
+
+    def enqueue(self):
+        from src.database.repository import JobRepository
+
+        db = TestingSessionLocal()
+        try:
+            job_id = JobRepository(db).enqueue("/tmp/optimized.jpg", "job.jpg")
+            db.commit()
+            return job_id
+        finally:
+            db.close()
+
+    def finish(self, job_id):
+        from src.database.models import ValuationJob, ValuationRecord
+
+        db = TestingSessionLocal()
+        try:
+            record = ValuationRecord(image_filename="job.jpg")
+            db.add(record)
+            db.flush()
+            job = db.get(ValuationJob, job_id)
+            job.status, job.stage, job.valuation_record_id = (
+                "succeeded",
+                "report_ready",
+                record.id,
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def events(self, response):
+        events = []
+        for block in response.text.strip().split("\n\n"):
+            lines = dict(
+                line.split(": ", 1)
+                for line in block.splitlines()
+                if not line.startswith(":")
+            )
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+    def test_job_status(self):
+        """Test a queued job's status"""
+        job_id = self.enqueue()
+
+        response = client.get(f"/jobs/{job_id}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["job_id"] == job_id
+        assert data["status"] == "queued"
+        assert data["report_url"] is None
+
+    def test_pipeline_stats(self):
+        """Test per-stage pipeline statistics"""
+        self.enqueue()
+
+        data = client.get("/pipeline/stats").json()
+
+        assert data["jobs"]["queued"] >= 1
+        assert [stage["name"] for stage in data["stages"]] == [
+            "decode",
+            "identify",
+            "price",
+            "save",
+            "report",
+        ]
+        assert {"queue_depth", "in_flight", "mean_seconds", "mean_wait_seconds"} <= set(
+            data["stages"][0]
+        )
+
+    def test_metrics(self):
+        """Test the Prometheus metrics endpoint"""
+        self.enqueue()
+        client.get("/valuations/12345")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = response.text.splitlines()
+        assert 'lego_jobs{status="queued"} 1' in lines
+        assert 'lego_jobs{status="failed"} 0' in lines
+        assert 'lego_pipeline_queue_depth{stage="identify"} 0' in lines
+        # Labelled by route template, not by URL
+        assert any(
+            line.startswith(
+                'lego_http_request_seconds_count{method="GET",route="/valuations/{valuation_id}",status="404"}'
+            )
+            for line in lines
+        )
+
+    def test_job_not_found(self):
+        """Test unknown jobs return 404"""
+        assert client.get("/jobs/999").status_code == 404
+        assert client.get("/jobs/999/events").status_code == 404
+
+    def test_event_stream_follows_job_until_finished(self, monkeypatch):
+        """Test the stream reports status changes made by another process"""
+        import threading
+        from src.api import main
+
+        monkeypatch.setattr(main.settings, "job_poll_interval_seconds", 0.05)
+        job_id = self.enqueue()
+        timer = threading.Timer(0.3, self.finish, args=(job_id,))
+        timer.start()
+        try:
+            response = client.get(f"/jobs/{job_id}/events")
+        finally:
+            timer.join()
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self.events(response)
+        assert [(kind, data["status"]) for kind, data in events] == [
+            ("snapshot", "queued"),
+            ("snapshot", "succeeded"),
+        ]
+        assert events[-1][1]["valuation_id"] is not None
+        assert (
+            events[-1][1]["report_url"]
+            == f"/reports/generate/{events[-1][1]['valuation_id']}"
+        )
+
+    def test_lifespan_preloads_and_drains(self, monkeypatch):
+        """Test server startup preloads shared state and shutdown drains the job workers"""
+        from src.api import main
+
+        monkeypatch.setattr(main, "create_tables", Mock())
+        monkeypatch.setattr(main.valuation_pipeline, "preload", Mock(return_value={}))
+        monkeypatch.setattr(main.job_pool, "start", AsyncMock())
+        monkeypatch.setattr(main.job_pool, "stop", AsyncMock())
+        monkeypatch.setattr(main.settings, "server_drain_seconds", 5.0)
+
+        with TestClient(app) as server:
+            main.create_tables.assert_called_once()
+            main.valuation_pipeline.preload.assert_called_once()
+            main.job_pool.start.assert_awaited_once()
+            assert server.get("/health").status_code == 200
+            main.job_pool.stop.assert_not_awaited()
+
+        main.job_pool.stop.assert_awaited_once_with(drain_timeout=5.0)
+
+
 @pytest.mark.api
 class TestErrorHandling(TestAPIEndpoints):
     """Test error handling across endpoints"""
@@ -500,9 +1148,11 @@ class TestIntegrationScenarios(TestAPIEndpoints):
         # Step 3: Check inventory
         inventory_response = client.get("/inventory")
         assert inventory_response.status_code == 200
-    
-    @patch('src.api.main.process_image_valuation')
-    def test_upload_error_handling(self, mock_process, test_image, mock_image_processor):
+
+    @patch("src.api.main.valuation_pipeline.run")
+    def test_upload_error_handling(
+        self, mock_process, test_image, mock_image_processor
+    ):
         """Test error handling in upload workflow"""
         mock_process.side_effect = Exception("Processing failed")
         
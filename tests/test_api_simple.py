@@ -99,7 +99,12 @@ class TestUploadWithMocking:
         # Setup mock
         mock_upload_info = Mock()
         mock_upload_info.filename = "test.jpg"
+        mock_upload_info.content_hash = None
         mock_processor.save_image.return_value = ("/tmp/test.jpg", mock_upload_info)
+        mock_processor.save_image_stream.return_value = (
+            "/tmp/test.jpg",
+            mock_upload_info,
+        )
         mock_processor.optimize_image_for_ai.return_value = "/tmp/optimized.jpg"
         
         # Create test file
@@ -0,0 +1,169 @@
+import io
+import tarfile
+import zipfile
+import pytest
+from PIL import Image
+from sqlalchemy import inspect, text
+
+from src.core.batch_intake import (
+    BatchIntake,
+    ENTRY_DUPLICATE,
+    ENTRY_QUEUED,
+    ENTRY_REJECTED,
+)
+from src.database.database import DatabaseManager
+from src.database.migrations import run_migrations
+from src.database.models import Base, ValuationJob, ValuationRecord
+from src.database.repository import JOB_FAILED, JOB_SUCCEEDED
+from src.utils.image_processor import ImageProcessor
+
+
+def jpeg(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color=color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestBatchIntake:
+    """Test batch registration, archive unpacking and content-hash dedupe"""
+
+    @pytest.fixture
+    def intake(self, job_repository, tmp_path):
+        return BatchIntake(
+            ImageProcessor(str(tmp_path / "uploads")), job_repository, max_attempts=2
+        )
+
+    def statuses(self, batch):
+        return [(entry.filename.split("_")[0], entry.status) for entry in batch.entries]
+
+    def test_directory_with_archives(self, intake, job_repository, tmp_path):
+        collection = tmp_path / "collection"
+        collection.mkdir()
+        (collection / "boba.jpg").write_bytes(jpeg("red"))
+        (collection / "notes.txt").write_text("not an image")
+        (collection / ".DS_Store").write_bytes(b"\0")
+        with zipfile.ZipFile(collection / "lot1.zip", "w") as zf:
+            zf.writestr("lot1/vader.jpg", jpeg("black"))
+            zf.writestr("lot1/boba-again.jpg", jpeg("red"))
+        with tarfile.open(collection / "lot2.tar.gz", "w:gz") as tf:
+            data = jpeg("white")
+            info = tarfile.TarInfo("lot2/trooper.jpg")
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+
+        batch = intake.start(str(collection), "Estate")
+        intake.add_directory(batch, collection)
+        intake.finish(batch)
+
+        assert self.statuses(batch) == [
+            ("boba", ENTRY_QUEUED),
+            ("vader", ENTRY_QUEUED),
+            ("boba-again.jpg", ENTRY_DUPLICATE),
+            ("trooper", ENTRY_QUEUED),
+            ("notes.txt", ENTRY_REJECTED),
+        ]
+        assert batch.entries[2].job_id == batch.entries[0].job_id
+        job = job_repository.get_job(batch.entries[3].job_id)
+        assert (job["batch_id"], job["notes"], job["max_attempts"]) == (
+            batch.batch_id,
+            "Estate",
+            2,
+        )
+
+        progress = job_repository.get_batch_progress(batch.batch_id)
+        assert (progress["total_files"], progress["queued_files"]) == (5, 3)
+        assert (progress["duplicate_files"], progress["rejected_files"]) == (1, 1)
+        assert progress["jobs"] == {"queued": 3}
+        assert not progress["completed"]
+
+    def test_dedupes_across_batches_unless_failed(
+        self, intake, job_repository, db_manager
+    ):
+        first = intake.start("first")
+        job_id = intake.add_image(first, "boba.jpg", jpeg("red")).job_id
+
+        second = intake.start("second")
+        assert (
+            intake.add_image(second, "boba.jpg", jpeg("red")).status == ENTRY_DUPLICATE
+        )
+
+        with db_manager.get_session_context() as session:
+            session.get(ValuationJob, job_id).status = JOB_FAILED
+        assert intake.add_image(second, "boba.jpg", jpeg("red")).status == ENTRY_QUEUED
+
+    def test_limits(self, job_repository, tmp_path, monkeypatch):
+        from config.settings import settings
+
+        monkeypatch.setattr(settings, "max_upload_size", 2048)
+        intake = BatchIntake(
+            ImageProcessor(str(tmp_path / "uploads")), job_repository, max_files=2
+        )
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr("small.jpg", jpeg("red"))
+            zf.writestr("huge.jpg", jpeg("green") + b"\0" * 10000)
+            zf.writestr("extra.jpg", jpeg("blue"))
+        archive.seek(0)
+
+        batch = intake.start("limits")
+        intake.add_file(batch, "lot.zip", archive)
+        intake.add_file(batch, "broken.zip", io.BytesIO(b"not a zip"))
+
+        assert [entry.status for entry in batch.entries] == [ENTRY_QUEUED] + [
+            ENTRY_REJECTED
+        ] * 3
+        assert "maximum allowed size" in batch.entries[1].error
+        assert "limited to 2 files" in batch.entries[2].error
+        assert "Unreadable archive" in batch.entries[3].error
+
+    def test_progress_counts_valued_jobs(self, intake, job_repository, db_manager):
+        batch = intake.start("progress")
+        job_ids = [
+            intake.add_image(batch, f"{color}.jpg", jpeg(color)).job_id
+            for color in ("red", "blue")
+        ]
+        intake.finish(batch)
+        with db_manager.get_session_context() as session:
+            record = ValuationRecord(image_filename="red.jpg", estimated_value=25.0)
+            session.add(record)
+            session.flush()
+            job = session.get(ValuationJob, job_ids[0])
+            job.status, job.valuation_record_id = JOB_SUCCEEDED, record.id
+
+        progress = job_repository.get_batch_progress(batch.batch_id)
+        assert (
+            progress["finished"],
+            progress["progress"],
+            progress["estimated_value"],
+        ) == (1, 0.5, 25.0)
+        assert job_repository.get_batch_progress(batch.batch_id + 1) is None
+
+    def test_migration_adds_job_columns(self, tmp_path):
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.create_all(db_manager.engine)
+        with db_manager.engine.begin() as conn:
+            # valuation_jobs as created before batches existed
+            conn.execute(text("DROP TABLE valuation_jobs"))
+            conn.execute(
+                text(
+                    "CREATE TABLE valuation_jobs (id INTEGER PRIMARY KEY, image_path VARCHAR(500) NOT NULL, "
+                    "image_filename VARCHAR(255) NOT NULL, status VARCHAR(20) NOT NULL)"
+                )
+            )
+
+        assert 5 in run_migrations(db_manager.engine)
+
+        columns = {
+            column["name"]
+            for column in inspect(db_manager.engine).get_columns("valuation_jobs")
+        }
+        assert {"batch_id", "content_hash"} <= columns
+        indexes = {
+            index["name"]
+            for index in inspect(db_manager.engine).get_indexes("valuation_jobs")
+        }
+        assert {
+            "ix_valuation_jobs_batch_id",
+            "ix_valuation_jobs_content_hash",
+        } <= indexes
+        db_manager.engine.dispose()
@@ -6,6 +6,7 @@ import requests
 
 from src.external.bricklink_client import BrickLinkClient
 from src.models.schemas import MarketData
+from src.utils.rate_limiter import BrickLinkRateLimiter, CircuitBreaker
 
 
 class TestBrickLinkClient:
@@ -405,5 +406,150 @@ class TestBrickLinkClientEdgeCases:
             assert params['new_or_used'] == 'N'
 
 
+class TestBrickLinkClientResilience:
+    """Test retries, circuit breaking and stale responses"""
+
+    @pytest.fixture
+    def breaker(self):
+        return CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+    @pytest.fixture
+    def client(self, breaker):
+        """Client with its own limiter and breaker so tests stay isolated"""
+        limiter = BrickLinkRateLimiter(
+            requests_per_second=1000.0, burst=1000, daily_quota=10000
+        )
+        with patch("src.external.bricklink_client.settings") as mock_settings:
+            mock_settings.bricklink_consumer_key = "test_key"
+            mock_settings.bricklink_consumer_secret = "test_secret"
+            mock_settings.bricklink_token_value = "test_token"
+            mock_settings.bricklink_token_secret = "test_token_secret"
+            mock_settings.bricklink_max_retries = 2
+            mock_settings.bricklink_retry_base_delay = 0.0
+            mock_settings.bricklink_timeout = 10
+            mock_settings.bricklink_base_url = "https://api.bricklink.com/api/store/v1"
+            yield BrickLinkClient(rate_limiter=limiter, circuit_breaker=breaker)
+
+    @staticmethod
+    def _response(status_code, payload):
+        response = requests.Response()
+        response.status_code = status_code
+        response._content = json.dumps(payload).encode()
+        return response
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_retries_timeouts(self, mock_get, client):
+        """Timeouts are retried before succeeding"""
+        mock_get.side_effect = [
+            requests.exceptions.Timeout("slow"),
+            self._response(200, {"data": {"avg_price": 12.0, "times_sold": 20}}),
+        ]
+
+        result = client.get_price_guide("MINIFIG", "sw0001a")
+
+        assert result.current_price == 12.0
+        assert mock_get.call_count == 2
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_throttling_slows_limiter(self, mock_get, client):
+        """A 429 response is retried and halves the request rate"""
+        mock_get.side_effect = [
+            self._response(429, {"meta": {"code": 429}}),
+            self._response(200, {"data": []}),
+        ]
+
+        assert client.search_items("MINIFIG", "Luke") == []
+        assert client.rate_limiter.rate < client.rate_limiter.max_rate
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_breaker_fails_fast_when_open(self, mock_get, client, breaker):
+        """Once open, calls return immediately without hitting the network"""
+        mock_get.side_effect = requests.exceptions.ConnectionError("down")
+
+        with patch("builtins.print"):
+            client.get_price_guide("MINIFIG", "sw0001a")
+            client.get_price_guide("MINIFIG", "sw0001a")
+        assert breaker.is_open
+        calls_before = mock_get.call_count
+
+        with patch("builtins.print"):
+            assert client.get_price_guide("MINIFIG", "sw0002") is None
+        assert mock_get.call_count == calls_before
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_serves_stale_response_when_open(self, mock_get, client, breaker):
+        """The last good response is served while the breaker is open"""
+        mock_get.return_value = self._response(
+            200, {"data": {"avg_price": 30.0, "times_sold": 5}}
+        )
+        assert client.get_price_guide("MINIFIG", "sw0100").current_price == 30.0
+
+        breaker.record_failure()
+        breaker.record_failure()
+        mock_get.reset_mock()
+
+        result = client.get_price_guide("MINIFIG", "sw0100")
+
+        assert result.current_price == 30.0
+        mock_get.assert_not_called()
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_calls_are_timed_by_endpoint_and_outcome(self, mock_get, client, breaker):
+        """Each call lands in the request histogram, stale serves included"""
+        from src.utils.metrics import BRICKLINK_REQUEST_SECONDS, CACHE_REQUESTS
+
+        def count(outcome):
+            return BRICKLINK_REQUEST_SECONDS.count(
+                endpoint="price_guide", outcome=outcome
+            )
+
+        before = {outcome: count(outcome) for outcome in ("ok", "stale")}
+        stale_hits = CACHE_REQUESTS.value(cache="bricklink_stale", result="hit")
+        mock_get.return_value = self._response(
+            200, {"data": {"avg_price": 30.0, "times_sold": 5}}
+        )
+        client.get_price_guide("MINIFIG", "sw0200")
+        breaker.record_failure()
+        breaker.record_failure()
+        client.get_price_guide("MINIFIG", "sw0200")
+
+        assert count("ok") == before["ok"] + 1
+        assert count("stale") == before["stale"] + 1
+        assert (
+            CACHE_REQUESTS.value(cache="bricklink_stale", result="hit")
+            == stale_hits + 1
+        )
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_quota_during_probe_releases_slot(self, mock_get, client, breaker):
+        """A probe stopped by our own daily quota does not wedge the breaker half-open"""
+        from src.utils.rate_limiter import QuotaExceededError
+
+        breaker._state = CircuitBreaker.HALF_OPEN
+        client.rate_limiter.daily_count = client.rate_limiter.daily_quota
+
+        with pytest.raises(QuotaExceededError):
+            client._request(
+                "https://api.bricklink.com/api/store/v1/items/MINIFIG/sw0001a"
+            )
+
+        mock_get.assert_not_called()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+
+    @patch("src.external.bricklink_client.requests.get")
+    def test_unexpected_error_during_probe_reopens(self, mock_get, client, breaker):
+        """Any other exception counts as a failed probe"""
+        breaker._state = CircuitBreaker.HALF_OPEN
+        mock_get.side_effect = ValueError("bad header")
+
+        with pytest.raises(ValueError):
+            client._request(
+                "https://api.bricklink.com/api/store/v1/items/MINIFIG/sw0001a"
+            )
+
+        assert breaker.is_open
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Startup cost of main.py, measured with python -X importtime.
+
+Quick admin commands should only import what they use: the web stack,
+OpenCV, SQLAlchemy, anthropic, reportlab and PIL are loaded when a command
+first needs them.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from main import EnhancedLegoValuationCLI
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = (
+    "cv2",
+    "sqlalchemy",
+    "anthropic",
+    "reportlab",
+    "PIL",
+    "pydantic",
+    "fastapi",
+    "numpy",
+)
+
+
+def import_times(*args: str) -> List[Tuple[str, int]]:
+    """(module, cumulative microseconds) for each import the command makes"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    times = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:") :].split("|")
+            times.append((name.strip(), int(cumulative)))
+    return times
+
+
+def startup_imports(*args: str) -> Dict[str, int]:
+    """Modules imported by the command beyond interpreter startup, with their cumulative microseconds"""
+    interpreter = {name for name, _ in import_times("-c", "pass")}
+    return {
+        name: cumulative
+        for name, cumulative in import_times(*args)
+        if name not in interpreter
+    }
+
+
+class TestCLIStartup:
+    """Test quick commands stay clear of the heavy imports"""
+
+    def test_components_are_built_on_first_use(self):
+        cli = EnhancedLegoValuationCLI()
+
+        assert vars(cli) == {}
+        assert cli.minifigure_database is cli.minifigure_database
+        assert set(vars(cli)) == {"minifigure_database"}
+
+    def test_import_main(self):
+        imported = startup_imports("-c", "import main")
+
+        assert not [name for name in imported if name.split(".")[0] in HEAVY_MODULES]
+
+    def test_stats_command(self):
+        imported = startup_imports("main.py", "stats")
+
+        assert "src.core.real_data_database_builder" in imported
+        assert not [name for name in imported if name.split(".")[0] in HEAVY_MODULES]
@@ -0,0 +1,78 @@
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+
+from src.core.data_persistence import DataPersistenceManager
+from src.database.repository import ValuationRepository
+from .conftest import make_report
+
+
+class TestBackupRestore:
+    """Test restoring emergency saves into the main database"""
+
+    @pytest.fixture
+    def persistence(self, db_manager, tmp_path):
+        return DataPersistenceManager(db_manager, backup_dir=str(tmp_path / "backups"))
+
+    def test_restore_emergency_saves(self, persistence):
+        backup_ids = [persistence._emergency_save(make_report(i)) for i in range(5)]
+        assert all(backup_id > 0 for backup_id in backup_ids)
+
+        valuation_ids = persistence.restore_backups()
+
+        assert len(valuation_ids) == 5
+        repo = ValuationRepository(persistence.db_manager)
+        assert repo.get_valuation(valuation_ids[2])["image_filename"] == "figure2.jpg"
+        # Already restored backups are not restored again
+        assert persistence.restore_backups() == []
+        assert persistence.get_backup_status()["emergency_backups"] == 0
+
+    def test_restore_single_backup(self, persistence):
+        valuation_id = persistence.save_valuation_with_backup(make_report(1))
+        with sqlite3.connect(persistence.backup_db_path) as conn:
+            backup_id, data = conn.execute(
+                "SELECT id, data FROM valuation_backups"
+            ).fetchone()
+        assert json.loads(data)["id"] == valuation_id
+        emergency_id = persistence._emergency_save(make_report(2))
+
+        # Active backups mirror valuations already saved, so only emergency saves restore
+        assert not persistence.restore_from_backup(backup_id)
+        assert persistence.restore_from_backup(emergency_id)
+        assert not persistence.restore_from_backup(emergency_id)
+        assert not persistence.restore_from_backup(9999)
+        assert (
+            ValuationRepository(persistence.db_manager).get_statistics()[
+                "total_valuations"
+            ]
+            == 2
+        )
+
+    def test_failed_chunk_keeps_earlier_chunks_marked(self, persistence):
+        """Chunks committed before a failure are marked restored and not restored again"""
+        for i in range(5):
+            persistence._emergency_save(make_report(i))
+        save_bulk = ValuationRepository.save_valuations_bulk
+        calls = []
+
+        def fail_second_chunk(repo, reports, chunk_size=500):
+            calls.append(len(reports))
+            if len(calls) == 2:
+                raise RuntimeError("disk full")
+            return save_bulk(repo, reports, chunk_size=chunk_size)
+
+        with patch.object(
+            ValuationRepository, "save_valuations_bulk", fail_second_chunk
+        ):
+            valuation_ids = persistence.restore_backups(chunk_size=2)
+
+        assert len(valuation_ids) == 2
+        assert persistence.get_backup_status()["emergency_backups"] == 3
+        assert len(persistence.restore_backups()) == 3
+        assert (
+            ValuationRepository(persistence.db_manager).get_statistics()[
+                "total_valuations"
+            ]
+            == 5
+        )
@@ -9,6 +9,7 @@ from unittest.mock import Mock, patch
 from src.database.database import DatabaseManager
 from src.database.models import Base, ValuationRecord, InventoryItem, SaleRecord
 from src.database.repository import ValuationRepository
+from .conftest import make_report
 from src.models.schemas import (
     ValuationReport, IdentificationResult, ValuationResult,
     LegoItem, ItemType, ItemCondition, RecommendationCategory, 
@@ -271,10 +272,61 @@ class TestValuationRepository:
             repository.save_valuation(sample_report)
         
         stats = repository.get_statistics()
-        
-        assert stats['total_valuations'] == 3
-        assert stats['average_value'] == 50.0
-        assert stats['total_value'] == 150.0
+
+        assert stats["total_valuations"] == 3
+        assert stats["average_value"] == 50.0
+        assert stats["total_value"] == 150.0
+        assert stats["highest_value"] == 50.0
+        assert stats["resale_count"] == 3
+        assert stats["museum_count"] == stats["collection_count"] == 0
+
+    def test_summaries_are_single_queries(self, test_db, repository, sample_report):
+        """Each summary is one aggregate statement, not one query per metric"""
+        from sqlalchemy import event
+        from src.database.repository import InventoryRepository, SaleRepository
+
+        repository.save_valuation(sample_report)
+        inventory = InventoryRepository(test_db)
+        inventory.add_item(
+            {"item_name": "A", "estimated_value": 20.0, "status": "in_inventory"}
+        )
+        inventory.add_item(
+            {"item_name": "B", "estimated_value": 40.0, "status": "sold"}
+        )
+        sales = SaleRepository(test_db)
+        sales.record_sale(
+            {
+                "sale_price": 40.0,
+                "platform_fees": 5.0,
+                "sold_date": datetime(2024, 1, 1),
+            }
+        )
+
+        statements = []
+        capture = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(test_db.engine, "before_cursor_execute", capture)
+        try:
+            stats = repository.get_statistics()
+            summary = inventory.get_inventory_summary()
+            sale_stats = sales.get_sales_statistics()
+        finally:
+            event.remove(test_db.engine, "before_cursor_execute", capture)
+
+        assert len(statements) == 3
+        assert stats["total_valuations"] == 1
+        assert summary == {
+            "total_items": 2,
+            "total_value": 60.0,
+            "available_items": 1,
+            "average_value": 30.0,
+            "highest_value": 40.0,
+        }
+        assert sale_stats == {
+            "total_sales": 1,
+            "total_revenue": 40.0,
+            "total_profit": 35.0,
+            "average_sale_price": 40.0,
+        }
     
     def test_save_market_data(self, repository):
         """Test saving market data"""
@@ -451,6 +503,56 @@ class TestDatabaseManager:
             assert sorted(values) == [100.0, 200.0, 300.0]
 
 
+    def test_file_database_engine_configuration(self, tmp_path):
+        """File databases get a real pool and WAL-mode connections"""
+        from sqlalchemy import text
+        from sqlalchemy.pool import QueuePool
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'pool.db'}")
+
+        assert isinstance(db_manager.engine.pool, QueuePool)
+        with db_manager.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        db_manager.close_all_sessions()
+
+    def test_memory_database_shares_connection(self):
+        """In-memory databases keep one connection so every session sees the schema"""
+        from sqlalchemy.pool import StaticPool
+
+        db_manager = DatabaseManager("sqlite:///:memory:")
+
+        assert isinstance(db_manager.engine.pool, StaticPool)
+
+    def test_concurrent_writers_threads(self, tmp_path):
+        """Writers on separate pooled connections do not corrupt each other"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'concurrent.db'}")
+        db_manager.init_db()
+
+        def write(i):
+            with db_manager.get_session_context() as session:
+                session.add(
+                    ValuationRecord(
+                        image_filename=f"thread{i}.jpg",
+                        identification_data={"thread": i},
+                        confidence_score=0.9,
+                        estimated_value=float(i),
+                    )
+                )
+                session.flush()
+                return session.query(ValuationRecord).count()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(write, range(40)))
+
+        with db_manager.get_session_context() as session:
+            assert session.query(ValuationRecord).count() == 40
+        db_manager.close_all_sessions()
+
+
 class TestDatabaseIntegration:
     """Integration tests for database operations"""
     
@@ -526,4 +628,327 @@ class TestDatabaseIntegration:
 
 
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
\ No newline at end of file
+    pytest.main([__file__, "-v"])
+
+
+class TestAsyncRepositories:
+    """Test the async read path used by the FastAPI endpoints"""
+
+    @pytest.fixture
+    def db_path(self, tmp_path):
+        """File database seeded through the sync engine"""
+        db_path = tmp_path / "async.db"
+        db_manager = DatabaseManager(f"sqlite:///{db_path}")
+        db_manager.init_db()
+        with db_manager.get_session_context() as session:
+            for i in range(5):
+                session.add(
+                    ValuationRecord(
+                        image_filename=f"async{i}.jpg",
+                        identification_data={},
+                        confidence_score=0.8,
+                        estimated_value=10.0 * (i + 1),
+                        created_at=datetime(2024, 1, i + 1),
+                    )
+                )
+            session.add_all(
+                [
+                    InventoryItem(
+                        item_name="A", estimated_value=20.0, status="in_inventory"
+                    ),
+                    InventoryItem(item_name="B", estimated_value=40.0, status="sold"),
+                ]
+            )
+        db_manager.close_all_sessions()
+        return db_path
+
+    @pytest.mark.asyncio
+    async def test_async_valuation_reads(self, db_path):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from src.database.database import create_async_database_engine
+        from src.database.repository import AsyncValuationRepository
+
+        async_engine = create_async_database_engine(f"sqlite:///{db_path}")
+        try:
+            async with async_sessionmaker(
+                async_engine, expire_on_commit=False
+            )() as session:
+                repo = AsyncValuationRepository(session)
+                page = await repo.list_valuation_records(skip=1, limit=2)
+                record = await repo.get_valuation_record(page[0].id)
+                missing = await repo.get_valuation_record(999)
+        finally:
+            await async_engine.dispose()
+
+        assert [r.image_filename for r in page] == ["async3.jpg", "async2.jpg"]
+        assert record.estimated_value == 40.0
+        assert missing is None
+
+    @pytest.mark.asyncio
+    async def test_async_inventory_summary(self, db_path):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from src.database.database import create_async_database_engine
+        from src.database.repository import AsyncInventoryRepository
+
+        async_engine = create_async_database_engine(f"sqlite:///{db_path}")
+        try:
+            async with async_sessionmaker(
+                async_engine, expire_on_commit=False
+            )() as session:
+                repo = AsyncInventoryRepository(session)
+                items = await repo.list_inventory(limit=1)
+                summary = await repo.get_inventory_summary()
+        finally:
+            await async_engine.dispose()
+
+        assert len(items) == 1
+        assert summary == {
+            "total_items": 2,
+            "total_value": 60.0,
+            "available_items": 1,
+            "average_value": 30.0,
+            "highest_value": 40.0,
+        }
+
+    def test_async_database_url(self):
+        from src.database.database import get_async_database_url
+
+        assert (
+            get_async_database_url("sqlite:///./data/x.db")
+            == "sqlite+aiosqlite:///./data/x.db"
+        )
+        assert (
+            get_async_database_url("postgresql://u:p@host/db")
+            == "postgresql+asyncpg://u:p@host/db"
+        )
+        with pytest.raises(ValueError):
+            get_async_database_url("mysql://u:p@host/db")
+
+    @pytest.mark.asyncio
+    async def test_keyset_pages(self, db_path):
+        """Walking next_cursor visits every row once, including created_at ties"""
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        from src.database.database import create_async_database_engine
+        from src.database.repository import AsyncValuationRepository
+
+        db_manager = DatabaseManager(f"sqlite:///{db_path}")
+        with db_manager.get_session_context() as session:
+            for i in range(3):
+                session.add(
+                    ValuationRecord(
+                        image_filename=f"tie{i}.jpg", created_at=datetime(2024, 1, 3)
+                    )
+                )
+        db_manager.close_all_sessions()
+
+        async_engine = create_async_database_engine(f"sqlite:///{db_path}")
+        try:
+            async with async_sessionmaker(
+                async_engine, expire_on_commit=False
+            )() as session:
+                repo = AsyncValuationRepository(session)
+                seen, cursor, pages = [], None, 0
+                while True:
+                    rows, cursor = await repo.list_valuation_page(
+                        limit=3, cursor=cursor
+                    )
+                    seen.extend(row["id"] for row in rows)
+                    pages += 1
+                    if cursor is None:
+                        break
+                total = await repo.count_valuations()
+        finally:
+            await async_engine.dispose()
+
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == total == 8
+        assert "identification_data" not in rows[0]
+
+    def test_invalid_cursor(self):
+        from src.database.repository import decode_cursor, encode_cursor
+
+        created_at = datetime(2024, 1, 3, 12, 30)
+        assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+        for bad in ("not-a-cursor", "", "!!!!"):
+            with pytest.raises(ValueError):
+                decode_cursor(bad)
+
+
+class TestValuationItems:
+    """Test the normalised valuation_items rows written with each valuation"""
+
+    def _report(self, *items, value=10.0):
+        """Report whose individual valuations are priced at value per item"""
+        from src.models.schemas import ItemValuation
+
+        lego_items = [
+            LegoItem(
+                item_number=number,
+                name=name,
+                item_type=ItemType.MINIFIGURE,
+                condition=ItemCondition.USED_COMPLETE,
+                year_released=year,
+                theme=theme,
+            )
+            for number, name, theme, year in items
+        ]
+        return ValuationReport(
+            image_filename="items.jpg",
+            upload_timestamp=datetime.now(),
+            identification=IdentificationResult(
+                confidence_score=0.9,
+                identified_items=lego_items,
+                description="",
+                condition_assessment="",
+            ),
+            valuation=ValuationResult(
+                estimated_value=value * len(lego_items),
+                confidence_score=0.8,
+                recommendation=RecommendationCategory.RESALE,
+                reasoning="",
+                suggested_platforms=[],
+                individual_valuations=[
+                    ItemValuation(
+                        item=item,
+                        estimated_individual_value_usd=value,
+                        confidence_score=0.7,
+                        market_data=MarketData(current_price=value, times_sold=12),
+                    )
+                    for item in lego_items
+                ],
+            ),
+        )
+
+    def test_items_saved_with_valuation(self, db_manager, repository):
+        from src.database.models import ValuationItem
+
+        valuation_id = repository.save_valuation(
+            self._report(
+                ("sw0001a", "Luke Skywalker", "Star Wars", 1999),
+                ("sw0002", "Boba Fett", "Star Wars", 2000),
+            )
+        )
+
+        with db_manager.get_session_context() as session:
+            items = (
+                session.query(ValuationItem)
+                .filter_by(valuation_record_id=valuation_id)
+                .order_by(ValuationItem.position)
+                .all()
+            )
+            assert [
+                (i.position, i.item_number, i.theme, i.year_released) for i in items
+            ] == [
+                (0, "sw0001a", "Star Wars", 1999),
+                (1, "sw0002", "Star Wars", 2000),
+            ]
+            assert items[1].estimated_value_usd == 10.0
+            assert items[1].market_price == 10.0
+            assert items[1].times_sold == 12
+            assert items[1].item_type == "minifigure"
+
+        repository.delete_valuation(valuation_id)
+        with db_manager.get_session_context() as session:
+            assert session.query(ValuationItem).count() == 0
+
+    def test_analytical_queries(self, repository):
+        first = repository.save_valuation(
+            self._report(
+                ("sw0001a", "Luke Skywalker", "Star Wars", 1999),
+                ("sh0016", "Batman", "Super Heroes", 2012),
+            )
+        )
+        second = repository.save_valuation(
+            self._report(
+                ("sw0001a", "Luke Skywalker", "Star Wars", 1999),
+                value=30.0,
+            )
+        )
+
+        containing = repository.get_valuations_with_item("sw0001a")
+        by_theme = repository.get_value_by_theme()
+
+        assert {row["id"] for row in containing} == {first, second}
+        assert repository.get_valuations_with_item("sh0016")[0]["id"] == first
+        assert by_theme == [
+            {
+                "theme": "Star Wars",
+                "item_count": 2,
+                "valuation_count": 2,
+                "total_value": 40.0,
+            },
+            {
+                "theme": "Super Heroes",
+                "item_count": 1,
+                "valuation_count": 1,
+                "total_value": 10.0,
+            },
+        ]
+
+
+class TestBulkInserts:
+    """Test chunked bulk insert paths"""
+
+    def test_save_valuations_bulk(self, db_manager):
+        from sqlalchemy import event
+        from src.database.models import ValuationItem
+
+        repository = ValuationRepository(db_manager)
+        commits = []
+        count_commit = lambda conn: commits.append(1)
+        event.listen(db_manager.engine, "commit", count_commit)
+        try:
+            ids = repository.save_valuations_bulk(
+                [make_report(i) for i in range(1200)], chunk_size=500
+            )
+        finally:
+            event.remove(db_manager.engine, "commit", count_commit)
+
+        assert len(ids) == len(set(ids)) == 1200
+        assert len(commits) == 3
+        assert repository.get_valuation(ids[700])["image_filename"] == "figure700.jpg"
+        assert repository.get_statistics()["total_valuations"] == 1200
+        assert repository.get_valuations_with_item("sw0700")[0]["id"] == ids[700]
+        with db_manager.get_session_context() as session:
+            assert session.query(ValuationItem).count() == 1200
+        assert repository.save_valuations_bulk([]) == []
+
+    def test_add_items_bulk(self, db_manager):
+        from src.database.repository import InventoryRepository
+
+        repository = InventoryRepository(db_manager)
+        ids = repository.add_items_bulk(
+            [
+                {
+                    "item_name": f"Item {i}",
+                    "estimated_value": float(i),
+                    "status": "in_inventory",
+                }
+                for i in range(7)
+            ]
+            + [{"item_name": "Sold", "status": "sold"}],
+            chunk_size=3,
+        )
+
+        assert len(ids) == 8
+        with db_manager.get_session_context() as session:
+            assert session.get(InventoryItem, ids[5]).item_name == "Item 5"
+            assert session.get(InventoryItem, ids[7]).created_at is not None
+        assert repository.get_inventory_summary()["available_items"] == 7
+
+    def test_create_from_valuation(self, db_manager):
+        from src.database.repository import InventoryRepository
+
+        valuation_id = ValuationRepository(db_manager).save_valuation(make_report(3))
+        record = Mock(
+            id=valuation_id, image_filename="figure3.jpg", estimated_value=13.0
+        )
+
+        # As in the API, the repository works on a request session
+        with db_manager.get_session_context() as session:
+            item = InventoryRepository(session).create_from_valuation(
+                record, location="Shelf A"
+            )
+
+            assert item.valuation_record_id == valuation_id
+            assert item.location == "Shelf A"
@@ -189,6 +189,52 @@ class TestImageMatcher:
             assert 'item_number' in result
             assert 'name' in result
 
+    def test_index_extracts_each_reference_image_once(self, tmp_path):
+        """Test reference features are cached and refreshed as minifigures are added"""
+        import sqlite3
+        from PIL import Image
+
+        db_path = tmp_path / "minifigures.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "CREATE TABLE minifigures (id INTEGER PRIMARY KEY, item_number TEXT, name TEXT, "
+            "theme TEXT, year_released INTEGER, image_path TEXT)"
+        )
+        for color in ["red", "blue", "green"]:
+            Image.new("RGB", (32, 32), color).save(tmp_path / f"{color}.png")
+        for n, color in enumerate(["red", "blue"], start=1):
+            conn.execute(
+                "INSERT INTO minifigures VALUES (?, ?, ?, 'Test', 2020, ?)",
+                (n, f"tst{n:03d}", color, str(tmp_path / f"{color}.png")),
+            )
+        conn.commit()
+
+        matcher = ImageMatcher(str(db_path))
+        with patch.object(
+            matcher, "extract_features", wraps=matcher.extract_features
+        ) as extract:
+            assert [minifig["name"] for minifig, _ in matcher.load_index()] == [
+                "red",
+                "blue",
+            ]
+            matcher.find_matches(str(tmp_path / "red.png"))
+            assert extract.call_count == 3  # Two references, one query
+
+            conn.execute(
+                "INSERT INTO minifigures VALUES (3, 'tst003', 'green', 'Test', 2020, ?)",
+                (str(tmp_path / "green.png"),),
+            )
+            conn.execute("DELETE FROM minifigures WHERE id = 1")
+            conn.commit()
+            entries = matcher.load_index()
+        conn.close()
+
+        assert extract.call_count == 4
+        assert [minifig["name"] for minifig, _ in entries] == ["blue", "green"]
+        assert not any(
+            name.endswith("_keypoints") for _, features in entries for name in features
+        )
+
 
 class TestMockDatabaseBuilder:
     """Test the mock database builder"""
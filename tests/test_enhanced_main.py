@@ -126,6 +126,13 @@ class TestRealDataDatabaseBuilder:
 
 class TestMainCLIArguments:
     """Test the main CLI argument parsing"""
+
+    @pytest.fixture(autouse=True)
+    def cli_metrics_path(self, tmp_path, monkeypatch):
+        """Keep these in-process runs out of the real CLI metrics totals"""
+        from config.settings import settings
+
+        monkeypatch.setattr(settings, "cli_metrics_path", str(tmp_path / "cli.json"))
     
     def test_process_command_enhanced_mode(self):
         """Test process command with enhanced mode (default)"""
@@ -0,0 +1,114 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+
+from src.core.load_generator import LoadTestResult, build_item_pool
+from src.external.fake_bricklink import FakeBrickLinkConfig, FixtureStore, create_app
+
+
+def make_client(**overrides):
+    config = FakeBrickLinkConfig(latency_ms=0, latency_jitter_ms=0, seed=1, **overrides)
+    return TestClient(create_app(config))
+
+
+class TestFakeBrickLinkServer:
+    """Test the local BrickLink stand-in"""
+
+    def test_price_guide_shape(self):
+        """Synthetic price guides look like BrickLink and are deterministic"""
+        client = make_client()
+        params = {"guide_type": "stock", "new_or_used": "U", "currency_code": "USD"}
+
+        first = client.get("/items/MINIFIG/sw0001a/price", params=params).json()
+        second = client.get("/items/MINIFIG/sw0001a/price", params=params).json()
+
+        assert first["meta"]["code"] == 200
+        assert first["data"]["avg_price"] > 0
+        assert "times_sold" in first["data"]
+        assert first == second
+
+    def test_item_and_search_endpoints(self):
+        client = make_client()
+
+        item = client.get("/items/SET/75159-1").json()["data"]
+        results = client.get("/items/MINIFIG", params={"name": "Luke"}).json()["data"]
+
+        assert item["no"] == "75159-1"
+        assert len(results) == 5
+        assert all("Luke" in r["name"] for r in results)
+
+    def test_error_and_rate_limit_responses(self):
+        assert (
+            make_client(error_rate=1.0).get("/items/MINIFIG/sw0001a/price").status_code
+            == 500
+        )
+
+        response = make_client(rate_limit_rate=1.0).get("/items/MINIFIG/sw0001a/price")
+        assert response.status_code == 429
+        assert response.json()["meta"]["code"] == 429
+
+    def test_requests_per_second_cap(self):
+        """Requests over the hard cap are throttled and counted"""
+        client = make_client(requests_per_second=2)
+
+        codes = [client.get("/items/MINIFIG/sw0001a").status_code for _ in range(3)]
+
+        assert codes == [200, 200, 429]
+        assert client.get("/_fake/stats").json()["throttled"] == 1
+
+    def test_replay_serves_recorded_responses(self, tmp_path):
+        """Replay mode returns fixtures and falls back to synthetic data on a miss"""
+        fixtures_path = tmp_path / "fixtures.json"
+        key = FixtureStore.make_key(
+            "/items/MINIFIG/sw0001a/price", {"new_or_used": "U"}
+        )
+        recorded = {
+            "meta": {"code": 200},
+            "data": {"avg_price": 12.34, "times_sold": 9},
+        }
+        fixtures_path.write_text(
+            json.dumps({key: {"status_code": 200, "body": recorded}})
+        )
+
+        client = make_client(mode="replay", fixtures_path=str(fixtures_path))
+
+        hit = client.get(
+            "/items/MINIFIG/sw0001a/price", params={"new_or_used": "U"}
+        ).json()
+        miss = client.get(
+            "/items/MINIFIG/sw0002/price", params={"new_or_used": "U"}
+        ).json()
+        stats = client.get("/_fake/stats").json()
+
+        assert hit == recorded
+        assert miss["data"]["item"]["no"] == "sw0002"
+        assert stats["replayed"] == 1
+        assert stats["replay_misses"] == 1
+
+    def test_unknown_mode_rejected(self):
+        with pytest.raises(ValueError):
+            create_app(FakeBrickLinkConfig(mode="proxy"))
+
+
+class TestLoadGenerator:
+    """Test load generator helpers"""
+
+    def test_item_pool_is_reproducible(self):
+        first = build_item_pool(20, seed=3)
+        second = build_item_pool(20, seed=3)
+
+        assert len(first) == 20
+        assert [i.model_dump() for i in first] == [i.model_dump() for i in second]
+
+    def test_percentiles(self):
+        result = LoadTestResult(
+            scenario="valuation",
+            requests=100,
+            errors=0,
+            duration=2.0,
+            latencies=[i / 100 for i in range(1, 101)],
+        )
+
+        assert result.throughput == 50.0
+        assert result.percentile(50) == 0.5
+        assert result.percentile(99) == 0.99
@@ -1,3 +1,4 @@
+import hashlib
 import pytest
 import tempfile
 import shutil
@@ -109,7 +110,53 @@ class TestImageProcessor:
         assert Path(file_path2).exists()
         assert upload1.filename != upload2.filename
         assert file_path1 != file_path2
-    
+
+    def test_save_image_stream_writes_in_chunks(
+        self, image_processor, sample_image_bytes
+    ):
+        """Test streamed saves read bounded chunks and hash the content"""
+
+        class ChunkRecorder(io.BytesIO):
+            reads = []
+
+            def read(self, size=-1):
+                self.reads.append(size)
+                return super().read(size)
+
+        stream = ChunkRecorder(sample_image_bytes)
+        file_path, image_upload = image_processor.save_image_stream(
+            stream, "boba.jpg", chunk_size=256
+        )
+
+        assert Path(file_path).read_bytes() == sample_image_bytes
+        assert image_upload.size == len(sample_image_bytes)
+        assert (
+            image_upload.content_hash == hashlib.sha256(sample_image_bytes).hexdigest()
+        )
+        assert set(stream.reads) == {256}
+
+    def test_save_image_stream_enforces_size_while_writing(
+        self, image_processor, large_image_bytes, temp_upload_dir
+    ):
+        """Test oversized streams fail part way and leave no file behind"""
+        with pytest.raises(ValueError, match="File size exceeds"):
+            image_processor.save_image_stream(
+                io.BytesIO(large_image_bytes), "large.jpg"
+            )
+
+        assert list(Path(temp_upload_dir).iterdir()) == []
+
+    def test_save_image_stream_rejects_type_from_first_chunk(
+        self, image_processor, temp_upload_dir
+    ):
+        """Test non-images are rejected before anything is written"""
+        with pytest.raises(ValueError, match="not supported"):
+            image_processor.save_image_stream(
+                io.BytesIO(b"plain text " * 10000), "notes.jpg"
+            )
+
+        assert list(Path(temp_upload_dir).iterdir()) == []
+
     def test_optimize_image_for_ai(self, image_processor, temp_upload_dir):
         """Test image optimization for AI processing"""
         # Create a large image to test resizing
@@ -0,0 +1,284 @@
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+from PIL import Image
+
+from src.core.job_worker import (
+    JobWorkerPool,
+    STAGE_REPORT_READY,
+    ValuationPipeline,
+    preload_matcher,
+)
+from src.utils.preprocessed_image import PreprocessedImage
+from src.database.models import ValuationJob, ValuationRecord
+from src.database.repository import JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JOB_SUCCEEDED
+from src.models.schemas import (
+    IdentificationResult,
+    ItemCondition,
+    ItemType,
+    LegoItem,
+    RecommendationCategory,
+    ValuationResult,
+)
+
+
+def identification():
+    return IdentificationResult(
+        confidence_score=0.9,
+        identified_items=[
+            LegoItem(
+                item_number="sw0002",
+                name="Boba Fett",
+                item_type=ItemType.MINIFIGURE,
+                condition=ItemCondition.USED_COMPLETE,
+            )
+        ],
+        description="Boba Fett",
+        condition_assessment="Good",
+    )
+
+
+def valuation():
+    return ValuationResult(
+        estimated_value=40.0,
+        confidence_score=0.8,
+        recommendation=RecommendationCategory.RESALE,
+        reasoning="Popular figure",
+        suggested_platforms=[],
+    )
+
+
+class TestJobWorkers:
+    """Test the durable valuation job queue and its worker pool"""
+
+    @pytest.fixture
+    def image_path(self, tmp_path):
+        path = tmp_path / "opt_boba.jpg"
+        Image.new("RGB", (64, 48), color="red").save(path, "JPEG")
+        return str(path)
+
+    @pytest.fixture
+    def pipeline(self, db_manager, tmp_path):
+        identifier = Mock(identify_lego_items=AsyncMock(return_value=identification()))
+        valuation_engine = Mock(evaluate_item=AsyncMock(return_value=valuation()))
+        report_generator = Mock(
+            generate_pdf=Mock(return_value=str(tmp_path / "report.pdf"))
+        )
+        return ValuationPipeline(
+            identifier, valuation_engine, report_generator, db_manager
+        )
+
+    def pool(self, db_manager, pipeline, **kwargs):
+        return JobWorkerPool(
+            db_manager,
+            pipeline,
+            **{
+                "workers": 2,
+                "visibility_timeout": 60,
+                "poll_interval": 0.05,
+                "retry_base_delay": 30,
+                **kwargs,
+            },
+        )
+
+    def test_job_runs_through_pipeline(
+        self, db_manager, job_repository, pipeline, image_path
+    ):
+        job_id = job_repository.enqueue(image_path, "boba.jpg", "Attic find")
+
+        assert asyncio.run(self.pool(db_manager, pipeline).run_until_empty()) == 1
+
+        job = job_repository.get_job(job_id)
+        assert job["status"] == JOB_SUCCEEDED
+        assert job["stage"] == STAGE_REPORT_READY
+        assert job["attempts"] == 1
+        assert job["report_path"].endswith("report.pdf")
+        with db_manager.get_session_context() as session:
+            record = session.get(ValuationRecord, job["valuation_record_id"])
+            assert record.notes == "Attic find"
+            assert record.estimated_value == 40.0
+        # The identifier gets the upload decoded once by the pipeline
+        image = pipeline.identifier.identify_lego_items.await_args.args[0]
+        assert isinstance(image, PreprocessedImage)
+        assert (image.path, image.size) == (job["image_path"], (64, 48))
+        stages = {stage["name"]: stage for stage in pipeline.stats()}
+        assert list(stages) == ["decode", "identify", "price", "save", "report"]
+        assert all(
+            stage["processed"] == 1 and stage["queue_depth"] == 0
+            for stage in stages.values()
+        )
+
+    def test_match_stage_for_identifiers_taking_matches(self, db_manager):
+        class MatchingIdentifier:
+            async def identify_lego_items(self, image_path):
+                return identification()
+
+            async def identify_from_matches(self, image_path, matches):
+                return identification()
+
+        pipeline = ValuationPipeline(MatchingIdentifier(), Mock(), Mock(), db_manager)
+
+        assert [stage.name for stage in pipeline.stages.stages] == [
+            "decode",
+            "match",
+            "identify",
+            "price",
+            "save",
+            "report",
+        ]
+        # Spawned match processes load the reference index as they start
+        assert pipeline.stages.stages[1].initializer is preload_matcher
+
+    def test_missing_upload_fails_job(self, db_manager, job_repository, pipeline):
+        job_id = job_repository.enqueue(
+            "/nonexistent/upload.jpg", "upload.jpg", max_attempts=1
+        )
+
+        asyncio.run(self.pool(db_manager, pipeline).run_until_empty())
+
+        job = job_repository.get_job(job_id)
+        assert job["status"] == JOB_FAILED
+        assert "upload.jpg" in job["last_error"]
+        pipeline.identifier.identify_lego_items.assert_not_awaited()
+
+    def test_stop_releases_running_jobs(
+        self, db_manager, job_repository, pipeline, image_path
+    ):
+        started = None
+
+        async def identify(image):
+            started.set()
+            await asyncio.Event().wait()
+
+        pipeline.identifier.identify_lego_items.side_effect = identify
+        job_id = job_repository.enqueue(image_path, "boba.jpg")
+
+        async def run():
+            nonlocal started
+            started = asyncio.Event()
+            pool = self.pool(db_manager, pipeline)
+            await pool.start()
+            await asyncio.wait_for(started.wait(), timeout=5)
+            await pool.stop(drain_timeout=0.1)
+
+        asyncio.run(run())
+
+        # Handed back for the next worker without using up an attempt
+        job = job_repository.get_job(job_id)
+        assert (job["status"], job["attempts"]) == (JOB_QUEUED, 0)
+        assert job_repository.lease("worker-2", 60)["id"] == job_id
+
+    def test_lease_is_exclusive(self, job_repository):
+        job_repository.enqueue("/tmp/a.jpg", "a.jpg")
+
+        assert job_repository.lease("worker-1", 60)["status"] == JOB_RUNNING
+        assert job_repository.lease("worker-2", 60) is None
+
+    def test_expired_lease_is_taken_over(self, db_manager, job_repository):
+        job_id = job_repository.enqueue("/tmp/a.jpg", "a.jpg")
+        job_repository.lease("worker-1", 60)
+        with db_manager.get_session_context() as session:
+            session.get(
+                ValuationJob, job_id
+            ).lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+
+        job = job_repository.lease("worker-2", 60)
+        assert job["id"] == job_id
+        assert job["attempts"] == 2
+        # The first worker no longer owns the job
+        assert not job_repository.extend_lease(job_id, "worker-1", 60)
+        assert not job_repository.complete(job_id, "worker-1", STAGE_REPORT_READY)
+        assert job_repository.complete(job_id, "worker-2", STAGE_REPORT_READY)
+
+    def test_failures_retry_with_backoff_then_fail(
+        self, db_manager, job_repository, pipeline, image_path
+    ):
+        pipeline.valuation_engine.evaluate_item.side_effect = RuntimeError(
+            "BrickLink down"
+        )
+        job_id = job_repository.enqueue(image_path, "a.jpg", max_attempts=2)
+        pool = self.pool(db_manager, pipeline)
+
+        asyncio.run(pool.run_until_empty())
+        job = job_repository.get_job(job_id)
+        assert job["status"] == JOB_QUEUED
+        assert job["last_error"] == "BrickLink down"
+        # Backing off, so not due yet
+        assert job_repository.lease("worker-1", 60) is None
+
+        with db_manager.get_session_context() as session:
+            session.get(ValuationJob, job_id).available_at = datetime.utcnow()
+        asyncio.run(pool.run_until_empty())
+        assert job_repository.get_job(job_id)["status"] == JOB_FAILED
+
+    def test_retry_after_save_only_renders_report(
+        self, db_manager, job_repository, pipeline, image_path
+    ):
+        pipeline.report_generator.generate_pdf.side_effect = [
+            OSError("disk full"),
+            "/tmp/report.pdf",
+        ]
+        job_id = job_repository.enqueue(image_path, "a.jpg")
+        pool = self.pool(db_manager, pipeline, retry_base_delay=0)
+
+        asyncio.run(pool.run_until_empty())
+
+        job = job_repository.get_job(job_id)
+        assert job["status"] == JOB_SUCCEEDED
+        assert job["attempts"] == 2
+        assert pipeline.identifier.identify_lego_items.await_count == 1
+        with db_manager.get_session_context() as session:
+            assert session.query(ValuationRecord).count() == 1
+
+    def test_pool_processes_enqueued_jobs(
+        self, db_manager, job_repository, pipeline, image_path
+    ):
+        async def run():
+            pool = self.pool(db_manager, pipeline)
+            await pool.start()
+            job_ids = [job_repository.enqueue(image_path, f"{n}.jpg") for n in range(3)]
+            pool.notify()
+            for _ in range(100):
+                if all(
+                    job_repository.get_job(job_id)["status"] == JOB_SUCCEEDED
+                    for job_id in job_ids
+                ):
+                    break
+                await asyncio.sleep(0.05)
+            await pool.stop()
+            return job_ids
+
+        job_ids = asyncio.run(run())
+        assert [job_repository.get_job(job_id)["status"] for job_id in job_ids] == [
+            JOB_SUCCEEDED
+        ] * 3
+        assert job_repository.count_by_status() == {JOB_SUCCEEDED: 3}
+
+    def test_progress_events(self, db_manager, job_repository, pipeline, image_path):
+        job_id = job_repository.enqueue(image_path, "boba.jpg")
+        pool = self.pool(db_manager, pipeline)
+
+        async def run():
+            with pool.events.subscribe(job_id) as queue:
+                await pool.run_until_empty()
+                return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        events = asyncio.run(run())
+        assert [(e["event"], e["status"], e["stage"]) for e in events] == [
+            ("status", JOB_RUNNING, None),
+            ("stage", JOB_RUNNING, "identified"),
+            ("stage", JOB_RUNNING, "priced"),
+            ("stage", JOB_RUNNING, "saved"),
+            ("status", JOB_SUCCEEDED, STAGE_REPORT_READY),
+        ]
+        assert events[1]["items"] == [
+            {"item_number": "sw0002", "name": "Boba Fett", "theme": None}
+        ]
+        assert events[2]["estimated_value"] == 40.0
+        assert (
+            events[3]["valuation_id"]
+            == events[4]["valuation_id"]
+            == job_repository.get_job(job_id)["valuation_record_id"]
+        )
+        assert pool.events._subscribers == {}
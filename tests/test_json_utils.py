@@ -0,0 +1,90 @@
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+
+from sqlalchemy import text
+
+from src.database.models import ValuationRecord
+from src.database.repository import ValuationRepository
+from src.models.schemas import (
+    IdentificationResult,
+    ItemCondition,
+    ItemType,
+    LegoItem,
+    MarketData,
+    RecommendationCategory,
+    ValuationReport,
+    ValuationResult,
+)
+from src.utils import json_utils
+
+
+PAYLOAD = {
+    "created_at": datetime(2024, 1, 15, 14, 30, 22),
+    "condition": ItemCondition.USED_COMPLETE,
+    "market_data": MarketData(current_price=12.5),
+    1: "non-string key",
+}
+
+
+class TestJsonUtils:
+    """Test orjson encoding and the standard-library fallback"""
+
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_encodes_api_types(self, orjson_available):
+        if orjson_available and not json_utils.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
+        with patch.object(json_utils, "ORJSON_AVAILABLE", orjson_available):
+            decoded = json_utils.loads(json_utils.dumps(PAYLOAD))
+
+        assert decoded["created_at"] == "2024-01-15T14:30:22"
+        assert decoded["condition"] == "used_complete"
+        assert decoded["market_data"]["current_price"] == 12.5
+        assert decoded["1"] == "non-string key"
+
+    def test_unknown_types_raise(self):
+        with pytest.raises(TypeError):
+            json_utils.dumps({"value": object()})
+
+    def test_json_columns_round_trip_datetimes(self, db_manager):
+        """Market data with a last sold date is stored (the stdlib encoder rejected it)"""
+        sold = datetime(2024, 2, 1, 9, 0)
+        report = ValuationReport(
+            image_filename="json.jpg",
+            upload_timestamp=datetime.now(),
+            identification=IdentificationResult(
+                confidence_score=0.9,
+                identified_items=[
+                    LegoItem(
+                        item_number="sw0001a",
+                        item_type=ItemType.MINIFIGURE,
+                        condition=ItemCondition.NEW,
+                    )
+                ],
+                description="",
+                condition_assessment="",
+            ),
+            valuation=ValuationResult(
+                estimated_value=10.0,
+                confidence_score=0.8,
+                recommendation=RecommendationCategory.RESALE,
+                reasoning="",
+                suggested_platforms=[],
+                market_data=MarketData(current_price=10.0, last_sold_date=sold),
+            ),
+        )
+
+        valuation_id = ValuationRepository(db_manager).save_valuation(report)
+
+        with db_manager.get_session_context() as session:
+            record = session.get(ValuationRecord, valuation_id)
+            assert record.market_data["last_sold_date"] == sold.isoformat()
+            assert (
+                record.identification_data["identified_items"][0]["condition"] == "new"
+            )
+            stored = session.execute(
+                text("SELECT market_data FROM valuation_records WHERE id = :id"),
+                {"id": valuation_id},
+            ).scalar_one()
+        assert json.loads(stored)["current_price"] == 10.0
@@ -0,0 +1,151 @@
+import json
+import pytest
+
+from src.utils import metrics
+from src.utils.metrics import Registry, accumulate, load, slower_than_usual
+
+
+class TestMetrics:
+    """Test the metrics registry and its Prometheus text rendering"""
+
+    def test_renders_text_exposition_format(self):
+        registry = Registry()
+        registry.counter(
+            "lego_cache_requests_total", "Cache lookups", ["cache", "result"]
+        ).inc(cache="identification", result="hit")
+        registry.gauge("lego_pipeline_queue_depth", "Waiting jobs", ["stage"]).set(
+            3, stage='say "hi"\n'
+        )
+        histogram = registry.histogram(
+            "lego_db_write_seconds", "Database writes", buckets=(0.1, 1.0)
+        )
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value)
+
+        assert registry.render().splitlines() == [
+            "# HELP lego_cache_requests_total Cache lookups",
+            "# TYPE lego_cache_requests_total counter",
+            'lego_cache_requests_total{cache="identification",result="hit"} 1',
+            "# HELP lego_db_write_seconds Database writes",
+            "# TYPE lego_db_write_seconds histogram",
+            'lego_db_write_seconds_bucket{le="0.1"} 1',
+            'lego_db_write_seconds_bucket{le="1"} 2',
+            'lego_db_write_seconds_bucket{le="+Inf"} 3',
+            "lego_db_write_seconds_sum 5.55",
+            "lego_db_write_seconds_count 3",
+            "# HELP lego_pipeline_queue_depth Waiting jobs",
+            "# TYPE lego_pipeline_queue_depth gauge",
+            'lego_pipeline_queue_depth{stage="say \\"hi\\"\\n"} 3',
+        ]
+
+    def test_labels_and_kinds_are_checked(self):
+        registry = Registry()
+        counter = registry.counter("lego_waits_total", "Waits", ["limiter"])
+
+        assert registry.counter("lego_waits_total", "Waits", ["limiter"]) is counter
+        with pytest.raises(ValueError):
+            counter.inc(stage="identify")
+        with pytest.raises(ValueError):
+            counter.inc(-1, limiter="bricklink")
+        with pytest.raises(ValueError):
+            registry.gauge("lego_waits_total", "Waits")
+
+    def test_time_decorates_and_counts_failures(self):
+        histogram = Registry().histogram("lego_render_seconds", "Renders", ["format"])
+
+        @histogram.time(format="pdf")
+        def render(fail=False):
+            if fail:
+                raise OSError("disk full")
+            return "report.pdf"
+
+        assert render() == "report.pdf"
+        with pytest.raises(OSError):
+            render(fail=True)
+        assert histogram.count(format="pdf") == 2
+
+    def test_collectors_run_before_render(self):
+        registry = Registry()
+        depth = registry.gauge("lego_queue_depth", "Depth")
+        registry.add_collector(lambda: depth.set(7))
+
+        assert "lego_queue_depth 7" in registry.render()
+
+
+class TestCLIMetrics:
+    """Test metrics totalled across CLI runs"""
+
+    def run(self, seconds, runs=1):
+        registry = Registry()
+        stage = registry.histogram("lego_pipeline_stage_seconds", "Stages", ["stage"])
+        for _ in range(runs):
+            stage.observe(seconds, stage="identify")
+        registry.counter(
+            "lego_cache_requests_total", "Cache lookups", ["cache", "result"]
+        ).inc(
+            runs,
+            cache="price_table",
+            result="miss",
+        )
+        registry.gauge("lego_pipeline_queue_depth", "Waiting jobs", ["stage"]).set(
+            2, stage="identify"
+        )
+        return registry
+
+    def test_runs_accumulate(self, tmp_path):
+        path = tmp_path / "metrics" / "cli.json"
+
+        assert not accumulate(path, self.run(1.0, runs=2)).has_samples()
+        previous = accumulate(path, self.run(3.0))
+
+        assert previous.get("lego_pipeline_stage_seconds").count(stage="identify") == 2
+        totals = load(path)
+        assert totals.get("lego_pipeline_stage_seconds").count(stage="identify") == 3
+        assert (
+            totals.get("lego_cache_requests_total").value(
+                cache="price_table", result="miss"
+            )
+            == 3
+        )
+        assert (
+            totals.get("lego_pipeline_queue_depth") is None
+        )  # Gauges die with the run
+        assert (
+            'lego_pipeline_stage_seconds_count{stage="identify"} 3'
+            in (tmp_path / "metrics" / "cli.prom").read_text()
+        )
+        assert (
+            json.loads(path.read_text())["lego_pipeline_stage_seconds"]["kind"]
+            == "histogram"
+        )
+
+    def test_slower_than_usual(self, tmp_path):
+        history = self.run(1.0, runs=metrics.REGRESSION_MIN_OBSERVATIONS)
+
+        assert slower_than_usual(history, self.run(1.2)) == []
+        assert slower_than_usual(history, self.run(2.0)) == [
+            ("lego_pipeline_stage_seconds", {"stage": "identify"}, 2.0, 1.0),
+        ]
+        # Too little history to judge
+        assert slower_than_usual(self.run(1.0), self.run(2.0)) == []
+
+    def test_cli_run_is_recorded(self, tmp_path, monkeypatch, capsys):
+        from config.settings import settings
+        from main import record_run_metrics
+
+        path = tmp_path / "cli.json"
+        monkeypatch.setattr(settings, "cli_metrics_path", str(path))
+        metrics.REGISTRY.clear()
+        metrics.DB_WRITE_SECONDS.observe(0.01, operation="save_valuation")
+
+        record_run_metrics("process", started=0.0)
+
+        totals = load(path)
+        assert totals.get("lego_cli_run_seconds").count(command="process") == 1
+        assert (
+            totals.get("lego_db_write_seconds").count(operation="save_valuation") == 1
+        )
+
+        metrics.REGISTRY.clear()
+        record_run_metrics("list", started=0.0)
+        assert load(path).get("lego_cli_run_seconds").count(command="list") == 0
@@ -0,0 +1,382 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import event, inspect, text
+
+from src.database.database import DatabaseManager
+from src.database.migrations import (
+    MIGRATIONS,
+    Migration,
+    get_applied_versions,
+    run_migrations,
+)
+from src.database.models import Base
+from src.database.repository import (
+    InventoryRepository,
+    ValuationRepository,
+    encode_cursor,
+)
+
+
+HOT_INDEXES = {
+    "valuation_records": {
+        "ix_valuation_records_created_at",
+        "ix_valuation_records_recommendation_created",
+        "ix_valuation_records_estimated_value",
+    },
+    "inventory_items": {
+        "ix_inventory_items_status_created",
+        "ix_inventory_items_created_at",
+        "ix_inventory_items_status_price_update",
+        "ix_inventory_items_item_number",
+    },
+    "sale_records": {
+        "ix_sale_records_inventory_item_id",
+        "ix_sale_records_sold_date",
+    },
+}
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+class TestMigrations:
+    """Test the built-in schema migrator"""
+
+    def test_init_db_records_migrations(self, tmp_path):
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+        db_manager.init_db()
+
+        assert get_applied_versions(db_manager.engine) == [
+            m.version for m in MIGRATIONS
+        ]
+        for table, expected in HOT_INDEXES.items():
+            assert expected <= index_names(db_manager.engine, table)
+
+    def test_existing_database_gets_indexes(self, tmp_path):
+        """A database created before the indexes existed is upgraded in place"""
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.create_all(bind=db_manager.engine)
+        with db_manager.engine.begin() as conn:
+            for names in HOT_INDEXES.values():
+                for name in names:
+                    conn.execute(text(f"DROP INDEX {name}"))
+
+        assert run_migrations(db_manager.engine) == [m.version for m in MIGRATIONS]
+        for table, expected in HOT_INDEXES.items():
+            assert expected <= index_names(db_manager.engine, table)
+
+    def test_migrations_are_idempotent(self, tmp_path):
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+        db_manager.init_db()
+
+        assert run_migrations(db_manager.engine) == []
+        db_manager.reset_database()
+        assert get_applied_versions(db_manager.engine) == [
+            m.version for m in MIGRATIONS
+        ]
+
+    def test_failed_migration_is_not_recorded(self, tmp_path):
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+        db_manager.init_db()
+        broken = Migration(
+            99,
+            "broken",
+            [
+                "CREATE INDEX ix_broken ON valuation_records (created_at)",
+                "CREATE INDEX ix_broken_missing ON no_such_table (id)",
+            ],
+        )
+
+        with pytest.raises(Exception):
+            run_migrations(db_manager.engine, MIGRATIONS + [broken])
+
+        assert 99 not in get_applied_versions(db_manager.engine)
+        assert "ix_broken" not in index_names(db_manager.engine, "valuation_records")
+
+    def test_backfill_valuation_items(self, tmp_path):
+        """Records saved before valuation_items existed get their items extracted"""
+        from src.database.models import ValuationItem, ValuationRecord
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'legacy.db'}")
+        db_manager.init_db()
+        with db_manager.get_session_context() as session:
+            session.add_all(
+                [
+                    ValuationRecord(
+                        image_filename="a.jpg",
+                        identification_data={
+                            "identified_items": [
+                                {
+                                    "item_number": "sw0002",
+                                    "name": "Boba Fett",
+                                    "theme": "Star Wars",
+                                    "year_released": 2000,
+                                },
+                                {"item_number": "sw0001a", "name": "Luke Skywalker"},
+                            ]
+                        },
+                    ),
+                    ValuationRecord(
+                        image_filename="b.jpg", identification_data="not json"
+                    ),
+                    ValuationRecord(image_filename="c.jpg", identification_data=None),
+                ]
+            )
+        with db_manager.engine.begin() as conn:
+            conn.execute(text("DELETE FROM schema_migrations WHERE version = 3"))
+
+        assert run_migrations(db_manager.engine) == [3]
+        with db_manager.get_session_context() as session:
+            items = session.query(ValuationItem).order_by(ValuationItem.position).all()
+            assert [(i.item_number, i.theme, i.year_released) for i in items] == [
+                ("sw0002", "Star Wars", 2000),
+                ("sw0001a", None, None),
+            ]
+            assert items[0].estimated_value_usd is None
+
+    def test_null_created_at_is_backfilled(self, tmp_path):
+        """Legacy rows without created_at get one, so keyset cursors can be encoded"""
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.create_all(bind=db_manager.engine)
+        with db_manager.engine.begin() as conn:
+            # valuation_records as created before created_at was NOT NULL
+            conn.execute(
+                text("ALTER TABLE valuation_records RENAME TO valuation_records_new")
+            )
+            conn.execute(
+                text(
+                    "CREATE TABLE valuation_records AS SELECT * FROM valuation_records_new"
+                )
+            )
+            conn.execute(text("DROP TABLE valuation_records_new"))
+            conn.execute(
+                text(
+                    "INSERT INTO valuation_records (id, image_filename, upload_timestamp, created_at) VALUES "
+                    "(1, 'a.jpg', '2024-01-02 00:00:00.000000', NULL), (2, 'b.jpg', NULL, NULL), "
+                    "(3, 'c.jpg', NULL, '2024-01-03 00:00:00.000000')"
+                )
+            )
+
+        assert 7 in run_migrations(db_manager.engine)
+
+        repo = ValuationRepository(db_manager)
+        page, cursor = repo.list_valuation_page(limit=2)
+        assert [row["id"] for row in page] == [3, 1]
+        assert page[1]["created_at"] == datetime(2024, 1, 2)
+        page, cursor = repo.list_valuation_page(limit=2, cursor=cursor)
+        assert [(row["id"], row["created_at"]) for row in page] == [
+            (2, datetime(1970, 1, 1))
+        ]
+        assert cursor is None
+
+    def test_inventory_version_counts_writes(self, tmp_path):
+        """Every write to inventory_items bumps its change counter"""
+        from src.database.models import InventoryItem
+
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'test.db'}")
+        db_manager.init_db()
+
+        def version():
+            with db_manager.engine.connect() as conn:
+                return conn.execute(
+                    text(
+                        "SELECT version FROM table_versions WHERE table_name = 'inventory_items'"
+                    )
+                ).scalar_one()
+
+        versions = [version()]
+        with db_manager.get_session_context() as session:
+            session.add(InventoryItem(item_name="Boba Fett", item_type="minifigure"))
+        versions.append(version())
+        with db_manager.engine.begin() as conn:
+            conn.execute(text("UPDATE inventory_items SET status = 'on_display'"))
+        versions.append(version())
+        with db_manager.engine.begin() as conn:
+            conn.execute(text("DELETE FROM inventory_items"))
+        versions.append(version())
+
+        assert versions == list(range(versions[0], versions[0] + 4))
+        # Seeded from the clock, so a rebuilt database does not reuse old versions
+        assert versions[0] > 1_600_000_000
+
+
+class TestHotQueryPlans:
+    """Repository hot queries must not full-scan large tables"""
+
+    ROWS = 100_000
+
+    @pytest.fixture(scope="class")
+    def db_manager(self, tmp_path_factory):
+        db_manager = DatabaseManager(
+            f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+        )
+        db_manager.init_db()
+
+        rng = random.Random(42)
+        start = datetime(2020, 1, 1)
+        categories = ["museum", "resale", "collection"]
+        statuses = ["in_inventory", "listed", "sold", "reserved", "on_display"]
+        valuations = [
+            {
+                "image_filename": f"img{i}.jpg",
+                "estimated_value": rng.uniform(1, 500),
+                "recommendation_category": rng.choice(categories),
+                "reasoning": "",
+                "created_at": start + timedelta(minutes=i),
+            }
+            for i in range(self.ROWS)
+        ]
+        items = [
+            {
+                "item_number": f"sw{i % 5000:04d}",
+                "item_name": f"Item {i}",
+                "status": rng.choice(statuses),
+                "estimated_value": rng.uniform(1, 500),
+                "last_price_update": start + timedelta(hours=rng.randint(0, 20000))
+                if i % 4
+                else None,
+                "created_at": start + timedelta(minutes=i),
+            }
+            for i in range(self.ROWS)
+        ]
+        with db_manager.engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO valuation_records (image_filename, estimated_value, "
+                    "recommendation_category, reasoning, created_at) VALUES "
+                    "(:image_filename, :estimated_value, :recommendation_category, :reasoning, :created_at)"
+                ),
+                valuations,
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO inventory_items (item_number, item_name, status, estimated_value, "
+                    "last_price_update, created_at) VALUES "
+                    "(:item_number, :item_name, :status, :estimated_value, :last_price_update, :created_at)"
+                ),
+                items,
+            )
+            conn.execute(text("ANALYZE"))
+        return db_manager
+
+    def query_plans(self, db_manager, call):
+        """Run a repository call and return (statement, EXPLAIN QUERY PLAN details) per SELECT"""
+        captured = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                captured.append((statement, parameters))
+
+        event.listen(db_manager.engine, "before_cursor_execute", capture)
+        try:
+            call()
+        finally:
+            event.remove(db_manager.engine, "before_cursor_execute", capture)
+
+        assert captured
+        raw = db_manager.engine.raw_connection()
+        try:
+            return [
+                (
+                    statement,
+                    [
+                        row[3]
+                        for row in raw.cursor().execute(
+                            f"EXPLAIN QUERY PLAN {statement}", parameters
+                        )
+                    ],
+                )
+                for statement, parameters in captured
+            ]
+        finally:
+            raw.close()
+
+    def assert_no_full_scan(self, plans):
+        """Every access to a large table is an index SEARCH, or an index walk in
+        ORDER BY order that stops after LIMIT rows"""
+        for statement, plan in plans:
+            for detail in plan:
+                for table in ("valuation_records", "inventory_items"):
+                    if not detail.startswith(f"SCAN {table}"):
+                        continue
+                    assert " USING " in detail, f"Full table scan: {detail}"
+                    assert "LIMIT" in statement.upper(), f"Unbounded scan: {detail}"
+                    assert not any(
+                        "TEMP B-TREE" in d for d in plan
+                    ), f"Scan is sorted before the LIMIT applies: {detail}"
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            lambda repo: repo.list_valuations(limit=50),
+            lambda repo: repo.get_valuations_by_recommendation("museum"),
+            lambda repo: repo.get_high_value_items(min_value=450),
+            lambda repo: repo.get_valuations_by_date_range(
+                datetime(2020, 1, 2), datetime(2020, 1, 3)
+            ),
+            lambda repo: repo.list_valuation_page(
+                limit=50, cursor=encode_cursor(datetime(2020, 1, 20), 25000)
+            ),
+        ],
+    )
+    def test_valuation_queries(self, db_manager, query):
+        repo = ValuationRepository(db_manager)
+        self.assert_no_full_scan(self.query_plans(db_manager, lambda: query(repo)))
+
+    def test_deep_keyset_page_seeks(self, db_manager):
+        """A deep cursor page seeks into the index instead of skipping rows"""
+        repo = ValuationRepository(db_manager)
+        cursor = encode_cursor(datetime(2020, 1, 20), 25000)
+
+        plans = self.query_plans(
+            db_manager, lambda: repo.list_valuation_page(limit=50, cursor=cursor)
+        )
+
+        assert any(
+            detail.startswith("SEARCH valuation_records USING")
+            for detail in plans[0][1]
+        )
+
+    @pytest.mark.parametrize(
+        "query",
+        [
+            lambda repo: repo.get_available_items(),
+            lambda repo: repo.list_inventory(limit=50),
+            lambda repo: repo.get_stale_items(datetime(2021, 1, 1), limit=100),
+        ],
+    )
+    def test_inventory_queries(self, db_manager, query):
+        repo = InventoryRepository(db_manager)
+        self.assert_no_full_scan(self.query_plans(db_manager, lambda: query(repo)))
+
+    # Summary statistics aggregate the whole table, so they are the one place a
+    # full scan is expected; each must stay a single pass per table
+    @pytest.mark.parametrize(
+        "repository, query, table",
+        [
+            (
+                ValuationRepository,
+                lambda repo: repo.get_statistics(),
+                "valuation_records",
+            ),
+            (
+                InventoryRepository,
+                lambda repo: repo.get_inventory_summary(),
+                "inventory_items",
+            ),
+        ],
+    )
+    def test_aggregate_queries_scan_once(self, db_manager, repository, query, table):
+        repo = repository(db_manager)
+
+        plans = self.query_plans(db_manager, lambda: query(repo))
+
+        scans = [
+            detail
+            for _, plan in plans
+            for detail in plan
+            if detail.startswith(f"SCAN {table}")
+        ]
+        assert len(scans) == 1, scans
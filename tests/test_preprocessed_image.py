@@ -0,0 +1,98 @@
+import io
+import pickle
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.core.enhanced_identifier import ImageQualityAssessment
+from src.utils.image_processor import ImageProcessor
+from src.utils.preprocessed_image import PreprocessedImage, image_location, preprocess
+
+
+def encode(img, fmt):
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+class TestPreprocessedImage:
+    """Test the decode-once image shared by the valuation pipeline"""
+
+    def test_converts_and_shrinks_for_ai(self):
+        data = encode(Image.new("RGBA", (2048, 1024), (255, 0, 0, 128)), "PNG")
+
+        image = PreprocessedImage.from_bytes(data)
+
+        assert image.size == (1024, 512)
+        assert image.pixels.shape == (512, 1024, 3)
+        assert list(image.pixels[0, 0]) == [0, 0, 255]  # BGR, as OpenCV expects
+        assert Image.open(io.BytesIO(image.jpeg_bytes)).format == "JPEG"
+        assert (
+            image.content_hash
+            != PreprocessedImage.from_bytes(data + b"\0").content_hash
+        )
+
+    def test_ai_ready_jpeg_keeps_its_bytes(self):
+        data = encode(Image.new("RGB", (200, 100), "blue"), "JPEG")
+
+        assert PreprocessedImage.from_bytes(data).jpeg_bytes == data
+        assert PreprocessedImage.from_bytes(data, reencode=True).jpeg_bytes != data
+
+    def test_colour_variants_are_cached_and_not_pickled(self):
+        pytest.importorskip("cv2")
+        image = PreprocessedImage.from_bytes(
+            encode(Image.new("RGB", (32, 32), "green"), "PNG")
+        )
+
+        assert image.gray is image.gray
+        assert image.gray.shape == (32, 32)
+        assert image.hsv[0, 0, 0] == 60  # OpenCV hue for green
+        assert image.base64() is image.base64()
+
+        restored = pickle.loads(pickle.dumps(image))
+        assert (
+            restored._gray is None
+            and restored._hsv is None
+            and restored._base64 is None
+        )
+        assert np.array_equal(restored.pixels, image.pixels)
+
+    def test_without_jpeg_pickles_only_pixels(self):
+        image = PreprocessedImage.from_bytes(
+            encode(Image.new("RGB", (64, 64), "green"), "PNG"), path="up.png"
+        )
+
+        light = image.without_jpeg()
+        restored = pickle.loads(pickle.dumps(light))
+
+        assert len(pickle.dumps(light)) < len(pickle.dumps(image))
+        assert restored.jpeg_bytes == b""
+        assert np.array_equal(restored.pixels, image.pixels)
+        assert (restored.path, restored.content_hash) == ("up.png", image.content_hash)
+
+    def test_preprocess_saves_optimized_upload(self, tmp_path):
+        processor = ImageProcessor(upload_dir=str(tmp_path))
+        source = tmp_path / "figure.png"
+        Image.new("RGB", (1500, 1500), "white").save(source)
+
+        image = processor.preprocess(str(source))
+
+        assert image.path == str(tmp_path / "optimized" / "opt_figure.png")
+        assert (
+            tmp_path / "optimized" / "opt_figure.png"
+        ).read_bytes() == image.jpeg_bytes
+        assert preprocess(image) is image
+        assert preprocess(image.path).size == image.size == (1024, 1024)
+        assert image_location(image) == image_location(image.path) == image.path
+
+    def test_quality_assessment_matches_path(self, tmp_path):
+        path = tmp_path / "figure.jpg"
+        Image.new("RGB", (800, 600), (90, 120, 200)).save(path, "JPEG")
+
+        from_path = ImageQualityAssessment.assess_quality(str(path))
+        from_image = ImageQualityAssessment.assess_quality(PreprocessedImage.open(path))
+
+        assert from_image["resolution"] == from_path["resolution"] == "800x600"
+        assert from_image["brightness_score"] == pytest.approx(
+            from_path["brightness_score"], abs=0.01
+        )
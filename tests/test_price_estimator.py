@@ -0,0 +1,111 @@
+import itertools
+import time
+import pytest
+
+from src.core.enhanced_market_data import EnhancedMarketDataAggregator
+from src.core.price_estimator import HeuristicPriceEstimator
+from src.models.schemas import ItemCondition, ItemType, LegoItem
+
+
+def reference_estimate(item, current_year):
+    """The original per-item rules, kept here to pin the vectorised tables"""
+    base_price = {"minifigure": 5.0, "set": 20.0}.get(item.item_type.value, 2.0)
+    base_price *= {
+        "Star Wars": 2.0,
+        "Super Heroes": 1.8,
+        "Ninjago": 1.5,
+        "Friends": 1.2,
+        "City": 1.0,
+        "Creator": 0.8,
+    }.get(item.theme, 1.0)
+    if item.year_released:
+        age = current_year - item.year_released
+        if age > 20:
+            base_price *= 2.0
+        elif age > 10:
+            base_price *= 1.5
+        elif age > 5:
+            base_price *= 1.2
+    base_price *= {
+        "new": 1.0,
+        "used_complete": 0.8,
+        "used_incomplete": 0.4,
+        "damaged": 0.2,
+    }[item.condition.value]
+    return base_price
+
+
+@pytest.fixture
+def items():
+    themes = [None, "Star Wars", "City", "Creator", "Castle"]
+    years = [None, 2025, 2019, 2014, 2005, 1980, 2030]
+    return [
+        LegoItem(
+            item_type=item_type, condition=condition, theme=theme, year_released=year
+        )
+        for item_type, condition, theme, year in itertools.product(
+            ItemType, ItemCondition, themes, years
+        )
+    ]
+
+
+class TestHeuristicPriceEstimator:
+    """Test batch estimates against the per-item rules"""
+
+    def test_batch_matches_reference(self, items):
+        estimator = HeuristicPriceEstimator(current_year=2025)
+
+        batch = estimator.estimate_items(items)
+
+        assert len(batch) == len(items)
+        expected = [reference_estimate(item, 2025) for item in items]
+        assert batch.characteristic.tolist() == pytest.approx(expected)
+        assert batch.ebay_6m.tolist() == pytest.approx([e * 0.95 for e in expected])
+        assert batch.local_market.tolist() == pytest.approx(
+            [e * 0.85 for e in expected]
+        )
+
+    def test_single_item_matches_batch(self, items):
+        estimator = HeuristicPriceEstimator(current_year=2025)
+
+        batch = estimator.estimate_items(items)
+
+        assert [estimator.estimate_item(item) for item in items] == pytest.approx(
+            batch.characteristic.tolist()
+        )
+
+    def test_estimate_columns_from_raw_rows(self):
+        """Inventory rows carry plain strings rather than enums"""
+        estimator = HeuristicPriceEstimator(current_year=2025)
+
+        batch = estimator.estimate_columns(
+            ["minifigure", "set", None],
+            ["Star Wars", None, "City"],
+            [1999, None, 2024],
+            ["new", "damaged", None],
+        )
+
+        assert batch.characteristic.tolist() == pytest.approx([20.0, 4.0, 2.0])
+
+    def test_large_batch_is_fast(self):
+        estimator = HeuristicPriceEstimator(current_year=2025)
+        n = 50_000
+
+        start = time.perf_counter()
+        batch = estimator.estimate_columns(
+            ["minifigure"] * n, ["Star Wars"] * n, [2000] * n, ["used_complete"] * n
+        )
+        elapsed = time.perf_counter() - start
+
+        assert len(batch) == n
+        assert elapsed < 1.0
+
+    def test_aggregator_uses_estimator(self, items):
+        aggregator = EnhancedMarketDataAggregator()
+        aggregator.estimator = HeuristicPriceEstimator(current_year=2025)
+
+        batch = aggregator.estimate_prices_batch(items)
+
+        assert aggregator._estimate_price_from_characteristics(
+            items[0]
+        ) == pytest.approx(batch.characteristic[0])
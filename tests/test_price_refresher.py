@@ -0,0 +1,188 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, AsyncMock
+
+from src.core.price_refresher import InventoryPriceRefresher
+from src.database.database import DatabaseManager
+from src.database.models import InventoryItem, SaleRecord
+from src.database.repository import InventoryRepository
+from src.models.schemas import MarketData
+
+
+class TestInventoryPriceRefresher:
+    """Test stale inventory selection and bulk re-pricing"""
+
+    @pytest.fixture
+    def db_manager(self):
+        """Create in-memory database with a mix of fresh and stale items"""
+        db_manager = DatabaseManager("sqlite:///:memory:")
+        db_manager.init_db()
+
+        now = datetime.utcnow()
+        with db_manager.get_session_context() as session:
+            session.add_all(
+                [
+                    InventoryItem(
+                        item_number="sw0001a",
+                        item_name="Luke",
+                        item_type="minifigure",
+                        condition="used_complete",
+                        estimated_value=50.0,
+                        last_price_update=now - timedelta(days=3),
+                        status="in_inventory",
+                    ),
+                    InventoryItem(
+                        item_number="sw0002",
+                        item_name="Vader",
+                        item_type="minifigure",
+                        condition="new",
+                        estimated_value=200.0,
+                        last_price_update=now - timedelta(days=2),
+                        status="in_inventory",
+                    ),
+                    InventoryItem(
+                        item_number="cty0001",
+                        item_name="Worker",
+                        item_type="minifigure",
+                        condition="used_complete",
+                        estimated_value=5.0,
+                        last_price_update=None,
+                        status="in_inventory",
+                    ),
+                    InventoryItem(
+                        item_number="fresh01",
+                        item_name="Fresh",
+                        item_type="minifigure",
+                        condition="used_complete",
+                        estimated_value=500.0,
+                        last_price_update=now,
+                        status="in_inventory",
+                    ),
+                    InventoryItem(
+                        item_number="sold01",
+                        item_name="Sold",
+                        item_type="minifigure",
+                        condition="used_complete",
+                        estimated_value=500.0,
+                        last_price_update=None,
+                        status="sold",
+                    ),
+                    InventoryItem(
+                        item_number=None,
+                        item_name="Unknown",
+                        item_type="unknown",
+                        estimated_value=900.0,
+                        status="in_inventory",
+                    ),
+                ]
+            )
+        return db_manager
+
+    @pytest.fixture
+    def bricklink_client(self):
+        client = Mock()
+        client.get_price_guide_async = AsyncMock(
+            side_effect=lambda item_type, item_no, condition: MarketData(
+                current_price={"sw0001a": 42.0, "sw0002": 180.0}.get(item_no)
+            )
+        )
+        return client
+
+    def test_select_stale_items_priority_order(self, db_manager, bricklink_client):
+        """Never-priced items come first, then by value; fresh and sold rows are skipped"""
+        refresher = InventoryPriceRefresher(
+            db_manager, bricklink_client, max_age_hours=24
+        )
+
+        items = refresher.select_stale_items()
+
+        assert [item["item_number"] for item in items] == [
+            "cty0001",
+            "sw0002",
+            "sw0001a",
+        ]
+
+    def test_turnover_breaks_ties(self, db_manager, bricklink_client):
+        """Items with more sales of the same number are refreshed first on equal value"""
+        stale = datetime.utcnow() - timedelta(days=5)
+        with db_manager.get_session_context() as session:
+            fast = InventoryItem(
+                item_number="fast01",
+                item_type="minifigure",
+                estimated_value=75.0,
+                last_price_update=stale,
+                status="in_inventory",
+            )
+            slow = InventoryItem(
+                item_number="slow01",
+                item_type="minifigure",
+                estimated_value=75.0,
+                last_price_update=stale,
+                status="in_inventory",
+            )
+            sold = InventoryItem(
+                item_number="fast01", item_type="minifigure", status="sold"
+            )
+            session.add_all([fast, slow, sold])
+            session.flush()
+            session.add(
+                SaleRecord(
+                    inventory_item_id=sold.id,
+                    sale_price=80.0,
+                    sold_date=datetime.utcnow(),
+                )
+            )
+
+        refresher = InventoryPriceRefresher(
+            db_manager, bricklink_client, max_age_hours=24
+        )
+        numbers = [item["item_number"] for item in refresher.select_stale_items()]
+
+        assert numbers.index("fast01") < numbers.index("slow01")
+
+    @pytest.mark.asyncio
+    async def test_refresh_once_updates_prices(self, db_manager, bricklink_client):
+        """Priced rows get a new market price; rows without data only get a timestamp"""
+        refresher = InventoryPriceRefresher(
+            db_manager,
+            bricklink_client,
+            max_age_hours=24,
+            batch_size=2,
+            batch_interval=0,
+        )
+
+        stats = await refresher.refresh_once()
+
+        assert stats.selected == 3
+        assert stats.batches == 2
+        assert stats.priced == 2
+        assert stats.no_data == 1
+        bricklink_client.get_price_guide_async.assert_any_call("MINIFIG", "sw0002", "N")
+
+        with db_manager.get_session_context() as session:
+            rows = {i.item_number: i for i in session.query(InventoryItem).all()}
+            assert rows["sw0001a"].current_market_price == 42.0
+            assert rows["sw0002"].current_market_price == 180.0
+            assert rows["cty0001"].current_market_price is None
+            assert rows["cty0001"].last_price_update is not None
+
+        # Everything is fresh now
+        assert refresher.select_stale_items() == []
+
+    @pytest.mark.asyncio
+    async def test_failed_requests_are_left_stale(self, db_manager):
+        """A failed request does not stamp the row so it is retried next run"""
+        client = Mock()
+        client.get_price_guide_async = AsyncMock(return_value=None)
+        refresher = InventoryPriceRefresher(
+            db_manager, client, max_age_hours=24, batch_interval=0
+        )
+
+        stats = await refresher.refresh_once()
+
+        assert stats.failed == 3
+        assert len(refresher.select_stale_items()) == 3
+
+    def test_bulk_update_prices_empty(self, db_manager):
+        """No updates is a no-op"""
+        assert InventoryRepository(db_manager).bulk_update_prices([]) == 0
@@ -0,0 +1,192 @@
+import sqlite3
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+from src.core.price_table import PriceTable
+from src.core.valuation_engine import ValuationEngine
+from src.models.schemas import ItemCondition, ItemType, LegoItem, MarketData
+
+
+CSV_EXPORT = """Item Type,Item No,Condition,Currency,Avg Price,Min Price,Max Price,Times Sold
+MINIFIG,sw0001a,U,USD,12.50,8.00,20.00,140
+MINIFIG,sw0001a,N,USD,25.00,18.00,40.00,30
+SET,75159,N,USD,$310.00,250.00,400.00,12
+MINIFIG,,U,USD,1.00,,,
+MINIFIG,cty0001,X,USD,1.00,,,
+"""
+
+XML_EXPORT = """<INVENTORY>
+  <ITEM><ITEMTYPE>M</ITEMTYPE><ITEMID>hp001</ITEMID><CONDITION>U</CONDITION>
+        <AVGPRICE>4.20</AVGPRICE><TIMESSOLD>55</TIMESSOLD></ITEM>
+  <ITEM><ITEMTYPE>M</ITEMTYPE><ITEMID>hp002</ITEMID><CONDITION>N</CONDITION>
+        <AVGPRICE>not a price</AVGPRICE></ITEM>
+</INVENTORY>
+"""
+
+
+class TestPriceTable:
+    """Test offline price-guide import and lookups"""
+
+    @pytest.fixture
+    def price_table(self, tmp_path):
+        return PriceTable(str(tmp_path / "minifigure_database.db"), max_age_hours=24)
+
+    def test_missing_database_is_a_miss(self, price_table, tmp_path):
+        """Lookups never create the database or the table"""
+        assert price_table.get_market_data("MINIFIG", "sw0001a", "U") is None
+        assert not (tmp_path / "minifigure_database.db").exists()
+
+    def test_import_csv(self, price_table, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT)
+
+        stats = price_table.import_file(str(path))
+
+        assert stats.imported == 3
+        assert stats.skipped == 2
+        market_data = price_table.get_market_data("MINIFIG", "sw0001a", "U")
+        assert market_data.current_price == 12.5
+        assert market_data.times_sold == 140
+        assert market_data.availability == "common"
+        # Set numbers are stored with their variant suffix
+        assert price_table.get_market_data("SET", "75159", "N").current_price == 310.0
+
+    def test_import_xml(self, price_table, tmp_path):
+        path = tmp_path / "export.xml"
+        path.write_text(XML_EXPORT)
+
+        stats = price_table.import_file(str(path))
+
+        assert stats.imported == 1
+        assert stats.skipped == 1
+        assert price_table.get_market_data("MINIFIG", "hp001", "U").current_price == 4.2
+
+    def test_reimport_replaces_rows(self, price_table, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT)
+        price_table.import_file(str(path))
+        path.write_text("Item No,Condition,Avg Price\nsw0001a,U,15.00\n")
+
+        price_table.import_file(str(path))
+
+        assert price_table.count() == 3
+        assert (
+            price_table.get_market_data("MINIFIG", "sw0001a", "U").current_price == 15.0
+        )
+
+    def test_write_through_keeps_imported_columns(self, price_table, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(
+            "Item No,Condition,Avg Price,Min Price,Max Price,Times Sold,Total Quantity\n"
+            "sw0001a,U,12.50,8.00,20.00,140,175\n"
+        )
+        price_table.import_file(str(path))
+
+        price_table.store_market_data(
+            "MINIFIG", "sw0001a", "U", MarketData(current_price=14.0, times_sold=150)
+        )
+
+        row = price_table.lookup("MINIFIG", "sw0001a", "U")
+        assert row["avg_price"] == 14.0
+        assert row["times_sold"] == 150
+        assert row["min_price"] == 8.0
+        assert row["max_price"] == 20.0
+        assert row["total_quantity"] == 175
+
+    def test_stale_rows_are_misses(self, price_table, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT)
+        price_table.import_file(str(path))
+        old = (datetime.utcnow() - timedelta(hours=48)).isoformat(sep=" ")
+        with sqlite3.connect(price_table.db_path) as conn:
+            conn.execute("UPDATE price_guide SET updated_at = ?", (old,))
+
+        assert price_table.get_market_data("MINIFIG", "sw0001a", "U") is None
+        assert (
+            price_table.lookup("MINIFIG", "sw0001a", "U", include_stale=True)[
+                "avg_price"
+            ]
+            == 12.5
+        )
+
+    def test_detailed_pricing(self, price_table, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT)
+        price_table.import_file(str(path))
+
+        pricing = price_table.get_detailed_pricing("MINIFIG", "sw0001a")
+
+        assert pricing.sealed_new_usd == 25.0
+        assert pricing.used_complete_usd == 12.5
+        assert pricing.used_incomplete_usd == pytest.approx(8.75)
+        # Only one condition imported
+        assert price_table.get_detailed_pricing("SET", "75159") is None
+
+    def test_unsupported_format(self, price_table, tmp_path):
+        with pytest.raises(ValueError):
+            price_table.import_file(str(tmp_path / "export.json"))
+
+
+class TestValuationEnginePriceTable:
+    """Test that valuations use the local table before the API"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = ValuationEngine()
+        engine.price_table = PriceTable(
+            str(tmp_path / "minifigure_database.db"), max_age_hours=24
+        )
+        engine.bricklink_client = Mock()
+        engine.bricklink_client.get_price_guide.return_value = MarketData(
+            current_price=99.0, times_sold=3
+        )
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_local_hit_skips_api(self, engine, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT)
+        engine.price_table.import_file(str(path))
+        item = LegoItem(
+            item_number="sw0001a",
+            item_type=ItemType.MINIFIGURE,
+            condition=ItemCondition.USED_COMPLETE,
+        )
+
+        market_data = await engine._get_market_data(item)
+
+        assert market_data.current_price == 12.5
+        engine.bricklink_client.get_price_guide.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_miss_calls_api_and_writes_through(self, engine, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text(CSV_EXPORT)
+        engine.price_table.import_file(str(path))
+        item = LegoItem(
+            item_number="sw0999",
+            item_type=ItemType.MINIFIGURE,
+            condition=ItemCondition.USED_COMPLETE,
+        )
+
+        first = await engine._get_market_data(item)
+        second = await engine._get_market_data(item)
+
+        assert first.current_price == second.current_price == 99.0
+        engine.bricklink_client.get_price_guide.assert_called_once_with(
+            "MINIFIG", "sw0999", "U"
+        )
+
+    @pytest.mark.asyncio
+    async def test_no_table_no_write_through(self, engine, tmp_path):
+        """Without an import the API result is not persisted"""
+        item = LegoItem(
+            item_number="sw0999",
+            item_type=ItemType.MINIFIGURE,
+            condition=ItemCondition.USED_COMPLETE,
+        )
+
+        await engine._get_market_data(item)
+
+        assert not (tmp_path / "minifigure_database.db").exists()
@@ -0,0 +1,123 @@
+import pytest
+from unittest.mock import patch
+
+from src.utils.rate_limiter import (
+    BrickLinkRateLimiter,
+    CircuitBreaker,
+    QuotaExceededError,
+    backoff_delay,
+)
+
+
+class TestBrickLinkRateLimiter:
+    """Test the BrickLink token bucket"""
+
+    def test_burst_is_free(self):
+        """Requests within the burst size do not wait"""
+        limiter = BrickLinkRateLimiter(
+            requests_per_second=1.0, burst=3, daily_quota=100
+        )
+
+        waits = [limiter._reserve() for _ in range(3)]
+
+        assert waits == [0.0, 0.0, 0.0]
+
+    def test_waits_when_bucket_empty(self):
+        """Requests beyond the burst wait for the refill rate"""
+        limiter = BrickLinkRateLimiter(
+            requests_per_second=2.0, burst=1, daily_quota=100
+        )
+
+        limiter._reserve()
+        wait_time = limiter._reserve()
+
+        assert 0.4 < wait_time <= 0.5
+
+    def test_daily_quota_enforced(self):
+        """The daily quota raises instead of waiting"""
+        limiter = BrickLinkRateLimiter(
+            requests_per_second=100.0, burst=100, daily_quota=2
+        )
+
+        limiter._reserve()
+        limiter._reserve()
+        with pytest.raises(QuotaExceededError):
+            limiter._reserve()
+
+        assert limiter.get_usage_stats()["daily_remaining"] == 0
+
+    def test_adaptive_rate(self):
+        """Throttling halves the rate and successes restore it"""
+        limiter = BrickLinkRateLimiter(
+            requests_per_second=4.0, burst=4, daily_quota=100
+        )
+
+        limiter.record_throttled()
+        assert limiter.rate == 2.0
+
+        for _ in range(10):
+            limiter.record_success()
+        assert limiter.rate == 4.0
+
+    @pytest.mark.asyncio
+    async def test_acquire_async(self):
+        """Async acquire sleeps rather than blocking"""
+        limiter = BrickLinkRateLimiter(
+            requests_per_second=100.0, burst=1, daily_quota=100
+        )
+
+        with patch("src.utils.rate_limiter.asyncio.sleep") as mock_sleep:
+            await limiter.acquire_async()
+            await limiter.acquire_async()
+
+        mock_sleep.assert_called_once()
+
+
+class TestCircuitBreaker:
+    """Test circuit breaker state transitions"""
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+
+        for _ in range(3):
+            assert breaker.allow_request()
+            breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_success_resets_failures(self):
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=60)
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_probe(self):
+        """After the recovery timeout a single probe is allowed through"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+        assert not breaker.allow_request()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=60)
+        breaker._state = CircuitBreaker.HALF_OPEN
+
+        breaker.record_failure()
+
+        assert breaker.is_open
+
+
+def test_backoff_delay_is_bounded():
+    """Jittered delays stay within the exponential envelope"""
+    for attempt in range(6):
+        delay = backoff_delay(attempt, base_delay=0.5, max_delay=4.0)
+        assert 0 <= delay <= min(4.0, 0.5 * 2**attempt)
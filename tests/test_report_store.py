@@ -0,0 +1,115 @@
+import gzip
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, inspect, text
+
+from src.database import report_store
+from src.database.migrations import run_migrations
+from src.database.models import Base, ValuationRecord
+from .conftest import make_report
+
+
+class TestReportStore:
+    """Test materialised report blobs written alongside valuations"""
+
+    def stored(self, db_manager, valuation_id):
+        with db_manager.get_session_context() as session:
+            record = session.get(ValuationRecord, valuation_id)
+            return record.report_blob, record.report_schema_version, record.created_at
+
+    def test_save_valuation_writes_blob(self, db_manager, repository):
+        report = make_report(1)
+        valuation_id = repository.save_valuation(report)
+
+        blob, version, created_at = self.stored(db_manager, valuation_id)
+        assert version == report_store.REPORT_SCHEMA_VERSION
+        document = report_store.decode_document(blob)
+        assert document["id"] == valuation_id
+        assert document["created_at"] == created_at.isoformat()
+        assert document["identification"]["identified_items"][0]["name"] == "Figure 1"
+
+        rebuilt = report_store.report_from_document(document)
+        assert rebuilt.identification == report.identification
+        assert rebuilt.valuation == report.valuation
+        assert rebuilt.notes == "Boxed"
+
+    def test_bulk_save_writes_blobs(self, db_manager, repository):
+        ids = repository.save_valuations_bulk(
+            [make_report(i) for i in range(5)], chunk_size=2
+        )
+
+        for i, valuation_id in enumerate(ids):
+            blob, version, _ = self.stored(db_manager, valuation_id)
+            document = report_store.decode_document(blob)
+            assert document["id"] == valuation_id
+            assert document["image_filename"] == f"figure{i}.jpg"
+
+    def test_blob_is_deterministic_gzip(self):
+        created_at = datetime(2024, 1, 2)
+        blob = report_store.encode_report(7, make_report(7), created_at)
+
+        assert blob == report_store.encode_report(7, make_report(7), created_at)
+        assert gzip.decompress(blob).startswith(b"{")
+
+    def test_rejects_newer_schema_version(self):
+        document = report_store.render_document(1, make_report(1), datetime(2024, 1, 2))
+        document["schema_version"] = report_store.REPORT_SCHEMA_VERSION + 1
+
+        with pytest.raises(ValueError):
+            report_store.decode_document(report_store.encode_document(document))
+
+    def test_report_from_legacy_record(self, db_manager):
+        with db_manager.get_session_context() as session:
+            session.add(
+                ValuationRecord(
+                    image_filename="legacy.jpg",
+                    identification_data={
+                        "confidence_score": 0.7,
+                        "identified_items": [],
+                        "description": "Old",
+                    },
+                    estimated_value=12.0,
+                    valuation_confidence=0.5,
+                    recommendation_category="collection",
+                    reasoning="Legacy",
+                    suggested_platforms=[],
+                    created_at=datetime(2023, 5, 1),
+                )
+            )
+            session.add(
+                ValuationRecord(
+                    image_filename="broken.jpg", identification_data="not json"
+                )
+            )
+            session.flush()
+            legacy, broken = (
+                session.query(ValuationRecord).order_by(ValuationRecord.id).all()
+            )
+
+            report = report_store.report_from_record(legacy)
+            assert report.valuation.estimated_value == 12.0
+            assert report.identification.description == "Old"
+            assert report_store.report_from_record(broken) is None
+
+    def test_migration_adds_columns(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE valuation_records DROP COLUMN report_blob"))
+            conn.execute(
+                text("ALTER TABLE valuation_records DROP COLUMN report_schema_version")
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO valuation_records (image_filename, created_at) VALUES ('old.jpg', '2023-05-01 00:00:00')"
+                )
+            )
+
+        assert 4 in run_migrations(engine)
+
+        columns = {
+            column["name"]
+            for column in inspect(engine).get_columns("valuation_records")
+        }
+        assert {"report_blob", "report_schema_version"} <= columns
+        engine.dispose()
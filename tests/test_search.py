@@ -0,0 +1,165 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.database.models import Base, ValuationRecord
+from src.database.repository import ValuationRepository
+from src.database.search import FTS5, LIKE, fts5_match, search_backend
+
+
+def identification(*items):
+    return {
+        "confidence_score": 0.9,
+        "identified_items": [
+            {"item_number": number, "name": name, "theme": theme}
+            for number, name, theme in items
+        ],
+    }
+
+
+SEED = [
+    (
+        "boba.jpg",
+        identification(("sw0002", "Boba Fett", "Star Wars")),
+        "Classic bounty hunter",
+        None,
+    ),
+    (
+        "jango.jpg",
+        identification(("sw0468", "Jango Fett", "Star Wars")),
+        "Father of Boba",
+        None,
+    ),
+    (
+        "batman.jpg",
+        identification(("sh0016", "Batman", "Super Heroes")),
+        "Common figure",
+        "Cape torn",
+    ),
+    ("broken.jpg", "not json at all", "Identification failed", None),
+]
+
+
+class TestValuationSearch:
+    """Test FTS5 valuation search kept in sync by triggers"""
+
+    @pytest.fixture
+    def db_manager(self, db_manager):
+        with db_manager.get_session_context() as session:
+            for i, (filename, ident, reasoning, notes) in enumerate(SEED):
+                session.add(
+                    ValuationRecord(
+                        image_filename=filename,
+                        identification_data=ident,
+                        reasoning=reasoning,
+                        notes=notes,
+                        created_at=datetime(2024, 1, i + 1),
+                    )
+                )
+        return db_manager
+
+    def filenames(self, records):
+        return [record.image_filename for record in records]
+
+    def test_ranks_item_names_above_reasoning(self, repository):
+        assert self.filenames(repository.search_valuations("Boba")) == [
+            "boba.jpg",
+            "jango.jpg",
+        ]
+        # Every word must match, but not necessarily in the same column
+        assert self.filenames(repository.search_valuations("Boba Fett")) == [
+            "boba.jpg",
+            "jango.jpg",
+        ]
+        assert self.filenames(repository.search_valuations("Boba bounty")) == [
+            "boba.jpg"
+        ]
+
+    def test_item_numbers_themes_and_prefixes(self, repository):
+        assert self.filenames(repository.search_valuations("sw0468")) == ["jango.jpg"]
+        assert self.filenames(repository.search_valuations("super heroes")) == [
+            "batman.jpg"
+        ]
+        assert self.filenames(repository.search_valuations("bat")) == ["batman.jpg"]
+        assert self.filenames(repository.search_valuations("torn")) == ["batman.jpg"]
+
+    def test_triggers_follow_updates_and_deletes(self, db_manager, repository):
+        with db_manager.get_session_context() as session:
+            batman = (
+                session.query(ValuationRecord)
+                .filter_by(image_filename="batman.jpg")
+                .one()
+            )
+            batman.notes = "Sold to a Boba collector"
+            jango = (
+                session.query(ValuationRecord)
+                .filter_by(image_filename="jango.jpg")
+                .one()
+            )
+            session.delete(jango)
+
+        assert self.filenames(repository.search_valuations("Boba")) == [
+            "boba.jpg",
+            "batman.jpg",
+        ]
+        assert repository.search_valuations("torn") == []
+
+    def test_pagination(self, repository):
+        assert self.filenames(repository.search_valuations("boba", limit=1)) == [
+            "boba.jpg"
+        ]
+        assert self.filenames(
+            repository.search_valuations("boba", limit=1, offset=1)
+        ) == ["jango.jpg"]
+        assert repository.search_valuations("boba", limit=1, offset=2) == []
+
+    def test_query_syntax_is_escaped(self, repository):
+        for term in ['"unbalanced', "NOT AND OR", "(boba", "sw*", "   "]:
+            repository.search_valuations(term)
+
+    def test_uses_fts_index(self, db_manager):
+        with db_manager.engine.connect() as conn:
+            assert search_backend("sqlite", True) == FTS5
+            plan = [
+                row[3]
+                for row in conn.execute(
+                    text(
+                        "EXPLAIN QUERY PLAN SELECT valuation_records.id FROM valuation_records "
+                        "JOIN valuation_search ON valuation_search.rowid = valuation_records.id "
+                        "WHERE valuation_search MATCH '\"boba\"*'"
+                    )
+                )
+            ]
+        assert any("VIRTUAL TABLE INDEX" in detail for detail in plan)
+        assert not any(detail.startswith("SCAN valuation_records") for detail in plan)
+
+    def test_like_fallback_without_index(self, tmp_path):
+        """Databases that never ran the migrations still search by substring"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'plain.db'}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        try:
+            session.add(
+                ValuationRecord(
+                    image_filename="boba.jpg",
+                    identification_data=identification(
+                        ("sw0002", "Boba Fett", "Star Wars")
+                    ),
+                )
+            )
+            session.commit()
+            repository = ValuationRepository(session)
+
+            assert self.filenames(repository.search_valuations("Boba Fett")) == [
+                "boba.jpg"
+            ]
+            assert repository.search_valuations("Jango") == []
+        finally:
+            session.close()
+
+    def test_fts5_match(self):
+        assert fts5_match("Boba Fett") == '"Boba" "Fett"*'
+        assert fts5_match('say "hi"') == '"say" """hi"""*'
+        assert fts5_match("  ") is None
+        assert search_backend("sqlite", False) == LIKE
@@ -0,0 +1,180 @@
+import asyncio
+import os
+import pytest
+
+from src.core.staged_pipeline import (
+    EXECUTOR_PROCESS,
+    EXECUTOR_THREAD,
+    Stage,
+    StagedPipeline,
+)
+
+
+def square(value):
+    return value * value
+
+
+_initialized_pid = None
+
+
+def initialize():
+    global _initialized_pid
+    _initialized_pid = os.getpid()
+    return _initialized_pid
+
+
+def initialized_pid(_):
+    return _initialized_pid, os.getpid()
+
+
+class TestStagedPipeline:
+    """Test the staged pipeline executor"""
+
+    def test_items_flow_through_every_executor(self):
+        async def add_one(value):
+            return value + 1
+
+        pipeline = StagedPipeline(
+            [
+                Stage("add", add_one),
+                Stage("square", square, executor=EXECUTOR_PROCESS),
+                Stage("negate", lambda value: -value, executor=EXECUTOR_THREAD),
+            ]
+        )
+
+        async def run():
+            try:
+                return await asyncio.gather(*(pipeline.submit(n) for n in range(5)))
+            finally:
+                await pipeline.stop()
+
+        assert asyncio.run(run()) == [-1, -4, -9, -16, -25]
+        assert [stage["processed"] for stage in pipeline.stats()] == [5, 5, 5]
+
+    def test_stage_concurrency_is_bounded(self):
+        running, peak = 0, 0
+
+        async def slow(value):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return value
+
+        pipeline = StagedPipeline([Stage("slow", slow, workers=2)])
+
+        async def run():
+            try:
+                await asyncio.gather(*(pipeline.submit(n) for n in range(10)))
+            finally:
+                await pipeline.stop()
+
+        asyncio.run(run())
+        assert peak == 2
+        assert pipeline.stats()[0]["mean_seconds"] > 0
+
+    def test_backpressure_from_blocked_stage(self):
+        release = asyncio.Event()
+
+        async def fast(value):
+            return value
+
+        async def blocked(value):
+            await release.wait()
+            return value
+
+        pipeline = StagedPipeline(
+            [
+                Stage("fast", fast, queue_size=1),
+                Stage("blocked", blocked, queue_size=1),
+            ]
+        )
+
+        async def run():
+            submitted = [asyncio.create_task(pipeline.submit(n)) for n in range(10)]
+            await asyncio.sleep(0.05)
+            # One item in "blocked", one queued for it, one held by "fast", one queued for "fast"
+            fast_stats, blocked_stats = pipeline.stats()
+            snapshot = (
+                fast_stats["processed"],
+                fast_stats["queue_depth"],
+                blocked_stats["queue_depth"],
+            )
+            release.set()
+            results = await asyncio.gather(*submitted)
+            await pipeline.stop()
+            return snapshot, results
+
+        snapshot, results = asyncio.run(run())
+        assert snapshot == (3, 1, 1)
+        assert results == list(range(10))
+
+    def test_failures_and_skips(self):
+        async def check(value):
+            if value == 2:
+                raise ValueError("bad item")
+            return value
+
+        pipeline = StagedPipeline(
+            [
+                Stage("check", check),
+                Stage(
+                    "tenfold",
+                    lambda item: item["value"] * 10,
+                    executor=EXECUTOR_THREAD,
+                    when=lambda value: value % 3 != 0,
+                    select=lambda value: {"value": value},
+                    apply=lambda value, result: result,
+                ),
+            ]
+        )
+
+        async def run():
+            try:
+                return await asyncio.gather(
+                    *(pipeline.submit(n) for n in range(4)), return_exceptions=True
+                )
+            finally:
+                await pipeline.stop()
+
+        results = asyncio.run(run())
+        assert results[0] == 0  # Skipped by when
+        assert results[1] == 10
+        assert isinstance(results[2], ValueError)
+        assert results[3] == 3  # Skipped by when
+        check_stats, tenfold_stats = pipeline.stats()
+        assert (check_stats["processed"], check_stats["failed"]) == (3, 1)
+        assert (tenfold_stats["processed"], tenfold_stats["skipped"]) == (1, 2)
+
+    def test_process_stage_spawns_and_initializes(self):
+        """Process pools are spawned, and warm_up runs the initializer in each process first"""
+        pipeline = StagedPipeline(
+            [
+                Stage(
+                    "pid",
+                    initialized_pid,
+                    workers=2,
+                    executor=EXECUTOR_PROCESS,
+                    initializer=initialize,
+                ),
+            ]
+        )
+
+        warmed = pipeline.warm_up()
+
+        async def run():
+            try:
+                return await asyncio.gather(*(pipeline.submit(n) for n in range(4)))
+            finally:
+                await pipeline.stop()
+
+        assert len(warmed["pid"]) == 2
+        assert os.getpid() not in warmed["pid"]
+        for initialized, pid in asyncio.run(run()):
+            assert initialized == pid != os.getpid()
+        assert _initialized_pid is None  # Nothing ran in the parent
+
+    def test_requires_a_stage(self):
+        with pytest.raises(ValueError):
+            StagedPipeline([])